@@ -0,0 +1,148 @@
+import argparse
+import copy
+import io
+import json
+import os
+import random
+import time
+from contextlib import redirect_stdout
+from threading import Event
+
+from src.coursescheduler.constraints import professor_teaching_load, professor_on_leave, \
+    course_preferences_constraint, course_timeslot_conflicts, time_slot_constraint, catalog_conflict_table
+from src.coursescheduler.csp import CSP, numpy
+from src.coursescheduler.datamodels import transform_input, timeslot_determination
+
+################################################################
+# Optimizer benchmark:
+# Times the hill climbing optimization of both CSPs with value by value and vectorized evaluation, on the sample
+# department scaled up a number of times: each copy of a professor can teach the courses of every copy of the
+# department, so both the number of courses and the number of professors per course grow with the scale.
+# e.g. python -m benchmarks.optimizer_benchmark --scale 10
+
+input_directory = os.path.join(os.path.dirname(__file__), "..", "src", "coursescheduler", "temp_json_input")
+
+
+def load_sample_input():
+    with open(os.path.join(input_directory, "schedule_object.json")) as schedule_file:
+        schedule = json.load(schedule_file)
+    with open(os.path.join(input_directory, "professor_object.json")) as prof_file:
+        professors = json.load(prof_file)
+    return schedule, professors
+
+
+# Copy the department scale times, with the professor ids and course codes of each copy suffixed by its number.
+def scale_input(schedule, professors, scale):
+    scaled_schedule = {semester: [] for semester in schedule}
+    for semester, offerings in schedule.items():
+        for copy_number in range(scale):
+            for offering in offerings:
+                offering = copy.deepcopy(offering)
+                offering["course"]["code"] += "-" + str(copy_number)
+                scaled_schedule[semester].append(offering)
+
+    scaled_professors = []
+    for copy_number in range(scale):
+        for professor in professors:
+            professor = copy.deepcopy(professor)
+            professor["id"] += "-" + str(copy_number)
+            professor["coursePreferences"] = [dict(preference, courseCode=preference["courseCode"] + "-" + str(i))
+                                              for preference in professor["coursePreferences"] for i in range(scale)]
+            scaled_professors.append(professor)
+    return scaled_schedule, scaled_professors
+
+
+# CSP 1 as set up by the scheduler.
+def make_csp_1(courses, professors):
+    domains = {course: [prof_id for prof_id, _ in course_data["qualifiedProfessors"]]
+               for semester_courses in courses.values() for course, course_data in semester_courses.items()
+               if course_data["professor"] is None and course_data["qualifiedProfessors"]}
+    variables = list(domains.keys())
+    csp = CSP(variables, domains)
+    professor_courses = {prof_id: [] for prof_id in professors}
+    for course in variables:
+        for prof_id in domains[course]:
+            professor_courses[prof_id].append(course)
+    for prof_id, prof_courses in professor_courses.items():
+        if prof_courses:
+            csp.add_constraint(professor_teaching_load(prof_courses, professors, prof_id))
+            csp.add_constraint(professor_on_leave(prof_courses, professors, prof_id))
+    csp.add_soft_constraint(course_preferences_constraint(variables, professors))
+    return csp
+
+
+# CSP 2 as set up by the scheduler, with the courses of each copy of the department grouped by year separately.
+def make_csp_2(courses, professors, solution_csp_1):
+    timeslot_configs = timeslot_determination()
+    conflict_table = catalog_conflict_table()
+    timeslot_ids = list(timeslot_configs.keys())
+    variables = list(solution_csp_1.keys())
+    csp = CSP(variables, {course: timeslot_ids for course in variables})
+    groups = {}
+    for course in variables:
+        semester = course.split("_")[1]
+        copy_number = course.split("_")[0].split("-")[1]
+        year = courses[semester][course]["yearRequired"]
+        groups.setdefault((semester, copy_number, year), []).append(course)
+        groups.setdefault((semester, solution_csp_1[course]), []).append(course)
+    for group in groups.values():
+        if len(group) > 1:
+            csp.add_constraint(course_timeslot_conflicts(group, timeslot_configs, [], conflict_table))
+    csp.add_soft_constraint(time_slot_constraint(variables, professors, timeslot_configs, solution_csp_1))
+    return csp
+
+
+def search(csp, seed):
+    config = {"solver": "min_conflicts", "max_steps": 1000000, "seed": seed}
+    with redirect_stdout(io.StringIO()):
+        return csp.solve(config=config, stop_event=Event(), result_object={})
+
+
+# Optimize the solution with the given evaluation, returning the runtime and the optimized solution.
+def time_optimize(csp, solution, max_steps, vectorized, seed):
+    random.seed(seed)
+    config = {"method": "hill_climbing", "max_steps": max_steps, "vectorized": vectorized}
+    start_time = time.perf_counter()
+    with redirect_stdout(io.StringIO()):
+        optimized = csp.optimize(dict(solution), config=config, stop_event=Event(), result_object={})
+    return time.perf_counter() - start_time, optimized
+
+
+def run_benchmark(csp, solution, max_steps, seed, name):
+    value_time, value_solution = time_optimize(csp, solution, max_steps, False, seed)
+    vectorized_time, vectorized_solution = time_optimize(csp, solution, max_steps, True, seed)
+    print(name + ": " + str(len(solution)) + " courses, value by value " + format(value_time, ".3f") +
+          "s, vectorized " + format(vectorized_time, ".3f") + "s, speedup " +
+          format(value_time / vectorized_time, ".1f") + "x, same solution: " +
+          str(value_solution == vectorized_solution))
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description="Benchmark the vectorized evaluation of the optimizer.")
+    parser.add_argument("--scale", type=int, default=10, help="number of copies of the sample department")
+    parser.add_argument("--steps", type=int, default=1000, help="hill climbing steps per CSP")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(args)
+
+    schedule, professors = load_sample_input()
+    courses, professors = transform_input(*scale_input(schedule, professors, args.scale))
+    print("Scale " + str(args.scale) + ": " + str(len(professors)) + " professors, NumPy " +
+          ("installed" if numpy is not None else "not installed (pure Python fallback)"))
+
+    csp_1 = make_csp_1(courses, professors)
+    solution_csp_1 = search(csp_1, args.seed)
+    if solution_csp_1 is None:
+        print("CSP 1 has no solution")
+        return
+    run_benchmark(csp_1, solution_csp_1, args.steps, args.seed, "CSP 1")
+
+    csp_2 = make_csp_2(courses, professors, solution_csp_1)
+    solution_csp_2 = search(csp_2, args.seed)
+    if solution_csp_2 is None:
+        print("CSP 2 has no solution")
+        return
+    run_benchmark(csp_2, solution_csp_2, args.steps, args.seed, "CSP 2")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+import argparse
+import time
+
+from src.coursescheduler.models import Schedule, Professor, validate_schedule_structure, \
+    validate_professors_structure
+from benchmarks.optimizer_benchmark import load_sample_input, scale_input
+
+################################################################
+# Validation benchmark:
+# Times the validation of the inputs with the schema library (Schedule.validate and Professor.validate, as the
+# scheduler used to) and with the compiled validator, on the sample department scaled up a number of times.
+# e.g. python -m benchmarks.validation_benchmark --scale 50
+
+
+def schema_validation(schedule, professors):
+    Schedule.validate(schedule)
+    for professor in professors:
+        Professor.validate(professor)
+
+
+def compiled_validation(schedule, professors):
+    validate_schedule_structure(schedule, print_output=False)
+    validate_professors_structure(professors, print_output=False)
+
+
+# Best runtime of a number of repeats.
+def time_validation(validate, schedule, professors, repeats):
+    best_time = None
+    for _ in range(repeats):
+        start_time = time.perf_counter()
+        validate(schedule, professors)
+        runtime = time.perf_counter() - start_time
+        best_time = runtime if best_time is None else min(best_time, runtime)
+    return best_time
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description="Benchmark the compiled input validation.")
+    parser.add_argument("--scale", type=int, default=10, help="number of copies of the sample department")
+    parser.add_argument("--repeats", type=int, default=5, help="runs of each validation, the best one is reported")
+    args = parser.parse_args(args)
+
+    schedule, professors = load_sample_input()
+    schedule, professors = scale_input(schedule, professors, args.scale)
+    num_sections = sum(len(offering["sections"]) for offerings in schedule.values() for offering in offerings)
+    print("Scale " + str(args.scale) + ": " + str(len(professors)) + " professors, " + str(num_sections) +
+          " sections")
+
+    schema_time = time_validation(schema_validation, schedule, professors, args.repeats)
+    compiled_time = time_validation(compiled_validation, schedule, professors, args.repeats)
+    print("schema " + format(schema_time, ".3f") + "s, compiled " + format(compiled_time, ".3f") + "s, speedup " +
+          format(schema_time / compiled_time, ".1f") + "x")
+
+
+if __name__ == '__main__':
+    main()
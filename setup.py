@@ -28,5 +28,6 @@ setuptools.setup(
     packages=setuptools.find_packages(where="src"),
 
     install_requires=['schema==0.7.5'],
+    extras_require={'numpy': ['numpy']},
     python_requires=">=3.9",
 )
@@ -1,2 +1,5 @@
-from .scheduler import generate_schedule
+from .scheduler import generate_schedule, generate_schedule_async
+from .batch import generate_schedules
+from .cache import SolutionCache
+from .loader import load_input, load_schedule, iter_professors
 from .models import validate_schedule_structure, validate_professor_structure, validate_professors_structure
@@ -0,0 +1,137 @@
+import argparse
+import copy
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from contextlib import redirect_stdout
+
+from .csp import CancellationToken
+from .loader import load_schedule
+from .models import validate_schedule_structure
+from .scheduler import generate_schedule_timer, prepare_schedule, max_time_seconds
+
+################################################################
+# Batch scheduling:
+# Many scenarios (e.g. variants of professor availability) are scheduled against the same course offering in a
+# process pool. The shared schedule is validated and prepared (see prepare_schedule) once, in the parent process, and
+# sent to each worker process once, so that each scenario only transforms its own professors. The results are
+# streamed back as the scenarios finish, so memory use does not grow with the size of the batch.
+
+# Set in each worker process by init_batch_worker.
+batch_schedule = None
+batch_prepared_schedule = None
+
+
+def init_batch_worker(schedule, prepared_schedule) -> None:
+    global batch_schedule, batch_prepared_schedule
+    batch_schedule = schedule
+    batch_prepared_schedule = prepared_schedule
+    # Log messages go to stderr, keeping stdout free for the results.
+    sys.stdout = sys.stderr
+
+
+# Generate the schedule of a single scenario in a worker process.
+# Invalid input is reported in the result rather than raised, so that it does not stop the rest of the batch.
+def run_scenario(scenario_id, professors, schedule, timeout):
+    prepared_schedule = None
+    if schedule is None:
+        # The output is written into the schedule, so each scenario works on its own copy.
+        schedule = copy.deepcopy(batch_schedule)
+        prepared_schedule = batch_prepared_schedule
+    result_object = {
+        "schedule": None,
+        "message": None
+    }
+    try:
+        generate_schedule_timer(professors, schedule, result_object, False, CancellationToken(timeout=timeout),
+                                prepared_schedule=prepared_schedule)
+    except Exception as e:
+        result_object["schedule"] = None
+        result_object["message"] = "Error: Invalid input. " + str(e)
+
+    if result_object["schedule"] is None and result_object["message"] is None:
+        result_object["message"] = "No schedule could be generated."
+    return {"id": scenario_id, "schedule": result_object["schedule"], "error": result_object["message"]}
+
+
+# Generate the schedules of a batch of scenarios in parallel.
+# batch: iterable of scenarios, dictionaries with "professors", an optional "id" (defaults to the position in the
+# batch) and an optional "schedule" (defaults to the shared schedule). It is consumed lazily.
+# Returns an iterator yielding {"id": ..., "schedule": ..., "error": ...} for each scenario as soon as it finishes, in
+# completion order. The shared schedule is validated and prepared by the call itself, before any result is requested.
+def generate_schedules(batch, schedule=None, max_workers=None, timeout=max_time_seconds):
+    prepared_schedule = None
+    if schedule is not None:
+        validate_schedule_structure(schedule)
+        prepared_schedule = prepare_schedule(schedule)
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    return iter_schedules(batch, schedule, prepared_schedule, max_workers, timeout)
+
+
+# The generator behind generate_schedules, started once the first result is requested.
+def iter_schedules(batch, schedule, prepared_schedule, max_workers, timeout):
+    # Only a few scenarios per worker are submitted ahead, so the batch is never held in memory.
+    max_pending = 2 * max_workers
+
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=init_batch_worker,
+                             initargs=(schedule, prepared_schedule)) as executor:
+        pending = set()
+        for index, scenario in enumerate(batch):
+            if scenario.get("schedule") is None and schedule is None:
+                raise ValueError("Scenario " + str(scenario.get("id", index)) + " has no schedule and no shared "
+                                 "schedule was given")
+            if len(pending) >= max_pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+            pending.add(executor.submit(run_scenario, scenario.get("id", index), scenario["professors"],
+                                        scenario.get("schedule"), timeout))
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+
+
+# Read the scenarios of a JSONL file (one JSON scenario per line), one line at a time.
+def read_scenarios(scenarios_file):
+    for line in scenarios_file:
+        if line.strip():
+            yield json.loads(line)
+
+
+# Command line batch mode: schedules the scenarios of a JSONL file against a shared schedule, writing one JSON result
+# per line as soon as each scenario finishes.
+# e.g. python -m coursescheduler.batch scenarios.jsonl --schedule schedule.json --output results.jsonl
+def main(args=None):
+    parser = argparse.ArgumentParser(description="Generate the schedules of a batch of scenarios.")
+    parser.add_argument("scenarios", help="JSONL file of scenarios, one per line (- for stdin)")
+    parser.add_argument("--schedule", help="JSON schedule shared by the scenarios without their own")
+    parser.add_argument("--output", default="-", help="JSONL file the results are written to (- for stdout)")
+    parser.add_argument("--workers", type=int, default=None, help="number of worker processes")
+    parser.add_argument("--timeout", type=float, default=max_time_seconds, help="max runtime of each scenario")
+    args = parser.parse_args(args)
+
+    schedule = None
+    if args.schedule is not None:
+        # Validated by generate_schedules
+        schedule = load_schedule(args.schedule, trusted=True)
+
+    scenarios_file = sys.stdin if args.scenarios == "-" else open(args.scenarios)
+    output_file = sys.stdout if args.output == "-" else open(args.output, "w")
+    try:
+        # Log messages go to stderr, keeping stdout free for the results.
+        with redirect_stdout(sys.stderr):
+            for result in generate_schedules(read_scenarios(scenarios_file), schedule, args.workers, args.timeout):
+                output_file.write(json.dumps(result) + "\n")
+                output_file.flush()
+    finally:
+        if scenarios_file is not sys.stdin:
+            scenarios_file.close()
+        if output_file is not sys.stdout:
+            output_file.close()
+
+
+if __name__ == '__main__':
+    main()
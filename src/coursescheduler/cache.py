@@ -0,0 +1,136 @@
+import copy
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+################################################################
+# Solution cache:
+# Generated schedules keyed by a hash of the canonical JSON of the inputs and the solver config, so that identical
+# requests are answered without solving again. The most recently used schedules are kept in memory, and with a
+# directory they are also written to disk (one JSON file per schedule), where the least recently used files are
+# removed once the directory grows beyond max_disk_bytes. Only successfully generated schedules are cached.
+# The cache can be shared between threads.
+class SolutionCache:
+    def __init__(self, capacity=128, directory=None, max_disk_bytes=100 * 1024 * 1024) -> None:
+        self.capacity = capacity
+        self.directory = directory
+        self.max_disk_bytes = max_disk_bytes
+        # key -> schedule, in order of use (least recent first)
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    # Canonical hash of the inputs: the JSON encoding does not depend on the order of the dictionary keys, and tuples
+    # are encoded like lists.
+    def key(self, professors, schedule, config) -> str:
+        payload = json.dumps({"professors": professors, "schedule": schedule, "config": config}, sort_keys=True,
+                             separators=(",", ":"))
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    # Returns a copy of the cached schedule, or None on a miss.
+    def get(self, key):
+        with self.lock:
+            schedule = self.entries.get(key)
+            if schedule is not None:
+                self.entries.move_to_end(key)
+                self.memory_hits += 1
+                return copy.deepcopy(schedule)
+
+            schedule = self.read_file(key)
+            if schedule is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self.store(key, schedule)
+            return copy.deepcopy(schedule)
+
+    def put(self, key, schedule) -> None:
+        schedule = copy.deepcopy(schedule)
+        with self.lock:
+            self.store(key, schedule)
+            if self.directory is not None:
+                self.write_file(key, schedule)
+                self.evict_files()
+
+    # Counters for instrumentation.
+    def stats(self):
+        with self.lock:
+            return {
+                "hits": self.memory_hits + self.disk_hits,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "memory_entries": len(self.entries)
+            }
+
+    # Remove every cached schedule, in memory and on disk.
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+            if self.directory is not None:
+                for path, _, _ in self.cache_files():
+                    os.remove(path)
+
+    # Add the schedule to the memory tier, evicting the least recently used one if it is full.
+    def store(self, key, schedule) -> None:
+        self.entries[key] = schedule
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+
+    def file_path(self, key) -> str:
+        return os.path.join(self.directory, key + ".json")
+
+    def read_file(self, key):
+        if self.directory is None:
+            return None
+        path = self.file_path(key)
+        try:
+            with open(path) as cache_file:
+                schedule = json.load(cache_file)
+            # The modification time records the last use, for eviction.
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        return schedule
+
+    # The file is written under a temporary name first, so that a partially written file is never read.
+    def write_file(self, key, schedule) -> None:
+        path = self.file_path(key)
+        temporary_path = path + ".tmp"
+        with open(temporary_path, "w") as cache_file:
+            json.dump(schedule, cache_file)
+        os.replace(temporary_path, path)
+
+    # (path, size, last use) of each file of the disk tier.
+    def cache_files(self):
+        files = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                status = os.stat(path)
+            except OSError:
+                continue
+            files.append((path, status.st_size, status.st_mtime))
+        return files
+
+    # Remove the least recently used files until the disk tier fits in max_disk_bytes.
+    def evict_files(self) -> None:
+        files = sorted(self.cache_files(), key=lambda file: file[2])
+        total_size = sum(size for _, size, _ in files)
+        for path, size, _ in files:
+            if total_size <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total_size -= size
@@ -1,8 +1,10 @@
-from typing import List, TypeVar
+from functools import lru_cache
+from typing import TypeVar
 
 from .csp import Constraint
 from .csp import SoftConstraint
-import datetime
+from .csp import numpy
+from .datamodels import timeslot_determination, enthusiasm_scores, preferred_time_minutes
 
 # from tests.datamodels_tester import temp_profs, temp_courses
 # from coursescheduler.csp import Constraint
@@ -10,6 +12,8 @@ import datetime
 V = TypeVar('V')  # variable type
 D = TypeVar('D')  # domain type
 
+SEMESTERS = ["fall", "spring", "summer"]
+
 
 # Hard constraint: instructors may only be assigned to courses for which they are qualified.
 # Note: this constraint currently isn't used.
@@ -25,12 +29,7 @@ class qualified_course_prof(Constraint):
             return True
 
         prof = assignment[course]
-        for i in range(len(self.professors[prof]["qualifiedCoursePreferences"])):
-            if course in self.professors[prof]["qualifiedCoursePreferences"][i]["courseCode"] and \
-                    self.professors[prof]["qualifiedCoursePreferences"][i]["enthusiasmScore"] != 0:
-                return True
-
-        return False
+        return enthusiasm_scores(self.professors[prof]).get(course.split("_")[0], 0) != 0
 
 
 # Hard Constraint: Checks if the course requires a PENG
@@ -53,12 +52,42 @@ class course_requires_peng(Constraint):
 
 
 # Hard Constraint: Checks if the professor's assigned courses doesn't surpass their maximum teaching load
+# If a professor is given, only that professor's load is limited, so the scope only needs to contain the courses
+# the professor could be assigned to. Otherwise the loads of all professors are limited.
 class professor_teaching_load(Constraint):
-    def __init__(self, courses, professors) -> None:
+    def __init__(self, courses, professors, professor=None) -> None:
         super().__init__(courses)
         self.professors = professors
+        self.professor = professor
+        # Per-professor course counters, maintained by the CSP through assign/unassign during a search.
+        # None outside of a search (see release), in which case satisfied() falls back to a full scan.
+        self.teaching_loads = None
+
+    def reset(self) -> None:
+        if self.professor is not None:
+            self.teaching_loads = {self.professor: 0}
+        else:
+            self.teaching_loads = {prof: 0 for prof in self.professors}
+
+    def assign(self, variable, value) -> None:
+        if self.teaching_loads is not None and value in self.teaching_loads:
+            self.teaching_loads[value] += 1
+
+    def unassign(self, variable, value) -> None:
+        if self.teaching_loads is not None and value in self.teaching_loads:
+            self.teaching_loads[value] -= 1
+
+    def release(self) -> None:
+        self.teaching_loads = None
 
     def satisfied(self, variable, assignment) -> bool:
+        # Only the professor of the newly assigned course can have exceeded their load.
+        if self.teaching_loads is not None and variable in assignment:
+            prof = assignment[variable]
+            if prof not in self.teaching_loads:
+                return True
+            return self.teaching_loads[prof] <= self.professors[prof]["teachingObligations"]
+
         teaching_loads_dict = {prof: 0 for prof in self.professors}
 
         for course in self.variables:
@@ -68,73 +97,155 @@ class professor_teaching_load(Constraint):
             teaching_loads_dict[prof] += 1
 
         for prof, teachingLoad in teaching_loads_dict.items():
+            if self.professor is not None and prof != self.professor:
+                continue
             if teachingLoad > self.professors[prof]["teachingObligations"]:
                 return False
 
         return True
 
+    # Professors whose load is already full.
+    def infeasible_values(self, variable, assignment):
+        if self.teaching_loads is None:
+            return None
+        return {prof for prof, teaching_load in self.teaching_loads.items()
+                if teaching_load + 1 > self.professors[prof]["teachingObligations"]}
+
+    # Only the other courses assigned to the same professor are responsible for exceeding their load.
+    def conflicts(self, variable, assignment):
+        prof = assignment[variable]
+        return [course for course in self.variables
+                if course != variable and course in assignment and assignment[course] == prof]
+
+
+# Determine whether two timeslot configurations (lists of [day, start, end]) overlap.
+def timeslot_configs_conflict(timeslot_config_1, timeslot_config_2) -> bool:
+    num_days_1 = len(timeslot_config_1)
+    num_days_2 = len(timeslot_config_2)
+
+    # If the timeslot configurations have the same number of days:
+    if num_days_1 == num_days_2:
+        # If the day of the first timeslot in each configuration is not the same,
+        # then they must be 3-hour slots on different days, and cannot overlap.
+        if timeslot_config_1[0][0] != timeslot_config_2[0][0]:
+            return False
+        # Otherwise, they are either both TWF, or both MTh,
+        # so just check for an overlap on the first day,
+        # since the times will be the same on the other days.
+        return timeslots_conflict(timeslot_config_1[0], timeslot_config_2[0])
+
+    # If timeslot has only 1 number of days, it's an ANY day configuration, timeslot
+    # Meaning the other timeslot is MTh or TWF, all timeslots must be compared to ensure there's no overlap
+    elif num_days_1 == 1 or num_days_2 == 1:
+        for i in range(num_days_1):
+            for j in range(num_days_2):
+                if timeslots_conflict(timeslot_config_1[i], timeslot_config_2[j]):
+                    return True
+
+    return False
+
+
+# Determine whether two single-day timeslots of the form [day, start, end] overlap in time.
+def timeslots_conflict(timeslot_1, timeslot_2) -> bool:
+    course_start_time = timeslot_1[1]
+    course_end_time = timeslot_1[2]
+
+    compare_course_start_time = timeslot_2[1]
+    compare_course_end_time = timeslot_2[2]
+
+    # Checks if the start time of course 2 is in between the course 1 time
+    if (course_start_time <= compare_course_start_time) and (course_end_time >= compare_course_start_time):
+        return True
+
+    # Checks if the start time of course 1 is in between the course 2 time
+    if (compare_course_start_time <= course_start_time) and (compare_course_end_time >= course_start_time):
+        return True
+
+    return False
+
+
+# Precompute the overlap relation between every pair of timeslot ids.
+# Returns a dictionary mapping each timeslot id to the set of timeslot ids it conflicts with.
+def timeslot_conflict_table(timeslot_configs):
+    conflict_table = {timeslot_id: set() for timeslot_id in timeslot_configs}
+    timeslot_ids = list(timeslot_configs.keys())
+    for i, timeslot_id_1 in enumerate(timeslot_ids):
+        for timeslot_id_2 in timeslot_ids[i:]:
+            if timeslot_configs_conflict(timeslot_configs[timeslot_id_1], timeslot_configs[timeslot_id_2]):
+                conflict_table[timeslot_id_1].add(timeslot_id_2)
+                conflict_table[timeslot_id_2].add(timeslot_id_1)
+    return {timeslot_id: frozenset(conflicts) for timeslot_id, conflicts in conflict_table.items()}
+
+
+# Conflict table of the timeslot catalog (see timeslot_determination), computed once per process and shared by every
+# schedule generated in it. Must not be modified.
+@lru_cache(maxsize=None)
+def catalog_conflict_table():
+    return timeslot_conflict_table(timeslot_determination())
+
 
 # Hard Constraint: Checks a given time slot and compares if it conflicts with a list of other time slots
 class course_timeslot_conflicts(Constraint):
-    def __init__(self, courses, timeslot_configs, static_courses) -> None:
+    def __init__(self, courses, timeslot_configs, static_courses, conflict_table=None) -> None:
         super().__init__(courses)
         self.timeslot_configs = timeslot_configs
-        self.static_courses = static_courses
+        self.static_courses = set(static_courses)
+        # The conflict table can be shared between constraints, since it only depends on the timeslot configs.
+        if conflict_table is None:
+            conflict_table = timeslot_conflict_table(timeslot_configs)
+        self.conflict_table = conflict_table
 
     def satisfied(self, variable, assignment) -> bool:
+        # Only the newly assigned course needs to be compared against the rest of its group.
+        if variable in self.variables:
+            if variable not in assignment:
+                return True
+            return self.course_satisfied(variable, assignment)
+
         for course in self.variables:
             if course not in assignment:
                 continue
-
-            other_courses = [x for x in assignment if x != course and x in self.variables]
-
-            for compare_course in other_courses:
-                if course in self.static_courses and compare_course in self.static_courses:
-                    continue
-                timeslot_config_1 = self.timeslot_configs[assignment[course]]
-                timeslot_config_2 = self.timeslot_configs[assignment[compare_course]]
-                num_days_1 = len(timeslot_config_1)
-                num_days_2 = len(timeslot_config_2)
-
-                # If the timeslot configurations have the same number of days:
-                if num_days_1 == num_days_2:
-                    # If the day of the first timeslot in each configuration is not the same,
-                    # then they must be 3-hour slots on different days, and cannot overlap.
-                    if timeslot_config_1[0][0] != timeslot_config_2[0][0]:
-                        continue
-                    # Otherwise, they are either both TWF, or both MTh,
-                    # so just check for an overlap on the first day,
-                    # since the times will be the same on the other days.
-                    if self.check_if_conflicts(timeslot_config_1[0], timeslot_config_2[0]):
-                        return False
-
-                # If timeslot has only 1 number of days, it's an ANY day configuration, timeslot
-                # Meaning the other timeslot is MTh or TWF, all timeslots must be compared to ensure there's no overlap
-                elif num_days_1 == 1 or num_days_2 == 1:
-
-                    for i in range(num_days_1):
-                        for j in range(num_days_2):
-
-                            if self.check_if_conflicts(timeslot_config_1[i], timeslot_config_2[j]):
-                                return False
+            if not self.course_satisfied(course, assignment):
+                return False
         return True
 
-    def check_if_conflicts(self, timeslot_1, timeslot_2):
-        course_start_time = timeslot_1[1]
-        course_end_time = timeslot_1[2]
-
-        compare_course_start_time = timeslot_2[1]
-        compare_course_end_time = timeslot_2[2]
+    # Check the timeslot of a single course against the timeslots of the other assigned courses in the constraint.
+    def course_satisfied(self, course, assignment) -> bool:
+        conflicts = self.conflict_table[assignment[course]]
+        course_is_static = course in self.static_courses
+        for compare_course in self.variables:
+            if compare_course == course or compare_course not in assignment:
+                continue
+            if course_is_static and compare_course in self.static_courses:
+                continue
+            if assignment[compare_course] in conflicts:
+                return False
+        return True
 
-        # Checks if the start time of course 2 is in between the course 1 time
-        if (course_start_time <= compare_course_start_time) and (course_end_time >= compare_course_start_time):
-            return True
+    # The timeslots overlapping those of the other assigned courses (conflicts are symmetric).
+    def infeasible_values(self, variable, assignment):
+        if variable not in self.variables:
+            return None
+        course_is_static = variable in self.static_courses
+        infeasible = set()
+        for compare_course in self.variables:
+            if compare_course == variable or compare_course not in assignment:
+                continue
+            if course_is_static and compare_course in self.static_courses:
+                continue
+            infeasible.update(self.conflict_table[assignment[compare_course]])
+        return infeasible
 
-        # Checks if the start time of course 1 is in between the course 2 time
-        if (compare_course_start_time <= course_start_time) and (compare_course_end_time >= course_start_time):
-            return True
+    # Only the courses whose timeslots overlap the course's timeslot are responsible for a conflict.
+    def conflicts(self, variable, assignment):
+        conflicts = self.conflict_table[assignment[variable]]
+        course_is_static = variable in self.static_courses
+        return [course for course in self.variables
+                if course != variable and course in assignment and assignment[course] in conflicts and
+                not (course_is_static and course in self.static_courses)]
 
-        return False
+    def check_if_conflicts(self, timeslot_1, timeslot_2):
+        return timeslots_conflict(timeslot_1, timeslot_2)
 
 
 # Hard Constraint: Checks if a research prof isn't assigned a course during their research semester
@@ -170,32 +281,50 @@ class research_professor_semester_off(Constraint):
 # no leave - 3 courses - 2 semesters on (1 semester off Hard Constraint) Already considered
 # half leave - 1 course - 1 semester on ( 2 semesters off Hard Constraint) Already considered
 # full leave - 0 courses - 0 semesters on ( 3 semesters off Hard Constraint) Already considered
+# If a professor is given, only that professor's leave is checked (see professor_teaching_load).
 class professor_on_leave(Constraint):
-    def __init__(self, courses, professors) -> None:
+    def __init__(self, courses, professors, professor=None) -> None:
         super().__init__(courses)
         self.professors = professors
+        self.professor = professor
+        self.course_set = set(courses)
 
     def satisfied(self, variable, assignment) -> bool:
-        professor_courses = {prof: [] for prof in self.professors}
+        # Each course is checked only against its own professor, so only the newly assigned course needs checking.
+        if variable in self.course_set:
+            if variable not in assignment:
+                return True
+            return self.course_satisfied(variable, assignment[variable])
 
         for course in self.variables:
             if course not in assignment:
                 continue
-            prof_id = assignment[course]
-            professor_courses[prof_id] += [course]
-
-        for prof_id, courses in professor_courses.items():
-            if self.professors[prof_id]["facultyType"] == "TEACHING":
-                for course in courses:
-                    semester = course.split("_")[1]
-                    if self.professors[prof_id]["teachingObligations"] == 3:
-                        if self.professors[prof_id]["preferredTimes"][semester] is None:
-                            return False
+            if not self.course_satisfied(course, assignment[course]):
+                return False
 
-                    if self.professors[prof_id]["teachingObligations"] == 2:
-                        if self.professors[prof_id]["preferredTimes"][semester] is None:
-                            return False
+        return True
 
+    # The constraint only depends on the course's own professor, so no other course is responsible.
+    def conflicts(self, variable, assignment):
+        return []
+
+    # Professors on leave during the semester of the course.
+    def infeasible_values(self, variable, assignment):
+        if variable not in self.course_set:
+            return None
+        if self.professor is not None:
+            return set() if self.course_satisfied(variable, self.professor) else {self.professor}
+        return {prof for prof in self.professors if not self.course_satisfied(variable, prof)}
+
+    # Check whether the professor is on leave during the semester of the course.
+    def course_satisfied(self, course, prof_id) -> bool:
+        if self.professor is not None and prof_id != self.professor:
+            return True
+        if self.professors[prof_id]["facultyType"] == "TEACHING":
+            semester = course.split("_")[1]
+            if self.professors[prof_id]["teachingObligations"] in [2, 3]:
+                if self.professors[prof_id]["preferredTimes"][semester] is None:
+                    return False
         return True
 
 
@@ -204,17 +333,177 @@ class course_preferences_constraint(SoftConstraint):
     def __init__(self, courses, professors) -> None:
         super().__init__(courses)
         self.professors = professors
+        # Cached per-professor aggregates for incremental evaluation, maintained through reset/commit:
+        # prof_id -> {"enthusiasm": sum of enthusiasm scores, "courses": number of courses,
+        #             "fall"/"spring"/"summer": number of courses in each semester}
+        self.prof_aggregates = {}
+        # Sum over the professors of their contribution to the score (see prof_contribution).
+        self.contribution_total = 0
+        # NumPy matrices of the same aggregates, indexed by professor (and course code or semester), used to score
+        # every professor for a course at once in score_deltas. Built by reset when NumPy is available.
+        self.matrices = None
+        # course -> (values, indexes of the values' professors in the matrices)
+        self.value_indexes = {}
+
+    def reset(self, assignment) -> None:
+        self.prof_aggregates = {}
+        self.contribution_total = 0
+        if numpy is not None:
+            if self.matrices is None:
+                self.build_matrices()
+            for name in ["enthusiasm", "courses", "semester_courses", "contribution"]:
+                self.matrices[name][:] = 0
+        for course, prof_id in assignment.items():
+            self.move_course(course, None, prof_id)
+
+    # Build the score matrices, with empty aggregates.
+    def build_matrices(self) -> None:
+        prof_ids = list(self.professors.keys())
+        course_codes = sorted({course.split("_")[0] for course in self.variables})
+        enthusiasm = numpy.zeros((len(prof_ids), len(course_codes)))
+        for i, prof_id in enumerate(prof_ids):
+            prof_scores = enthusiasm_scores(self.professors[prof_id])
+            for k, course_code in enumerate(course_codes):
+                enthusiasm[i, k] = prof_scores.get(course_code, 0)
+        self.matrices = {
+            "prof_index": {prof_id: i for i, prof_id in enumerate(prof_ids)},
+            "course_code_index": {course_code: k for k, course_code in enumerate(course_codes)},
+            "enthusiasm_scores": enthusiasm,
+            "teaching_obligations": numpy.array([self.professors[prof_id]["teachingObligations"]
+                                                 for prof_id in prof_ids], dtype=float),
+            "preferred_courses": numpy.array([[self.professors[prof_id]["preferredCoursesPerSemester"][semester]
+                                               for semester in SEMESTERS] for prof_id in prof_ids], dtype=float),
+            # The aggregates and contribution of each professor (see prof_aggregates).
+            "enthusiasm": numpy.zeros(len(prof_ids)),
+            "courses": numpy.zeros(len(prof_ids)),
+            "semester_courses": numpy.zeros((len(prof_ids), len(SEMESTERS))),
+            "contribution": numpy.zeros(len(prof_ids)),
+        }
+
+    def commit(self, assignment, variable, old_value, new_value) -> None:
+        self.move_course(variable, old_value, new_value)
+
+    # Only the aggregates of the professors losing and gaining the course change.
+    def score_delta(self, assignment, variable, value) -> float:
+        old_value = assignment[variable]
+        if value == old_value:
+            return 0
+        current_score = self.aggregate_score()
+        contribution_total = self.contribution_total
+        self.move_course(variable, old_value, value)
+        new_score = self.aggregate_score()
+        self.move_course(variable, value, old_value)
+        # Restored exactly, so that evaluating moves does not accumulate rounding errors.
+        self.contribution_total = contribution_total
+        return new_score - current_score
+
+    # The course is taken away from its professor, then given to every professor at once using the score matrices,
+    # computing each contribution the same way as prof_contribution.
+    def score_deltas(self, assignment, variable, values):
+        if self.matrices is None:
+            return super().score_deltas(assignment, variable, values)
+        matrices = self.matrices
+        old_value = assignment[variable]
+        course_code, semester = variable.split("_")[:2]
+
+        value_indexes = self.value_indexes.get(variable)
+        if value_indexes is None or value_indexes[0] is not values:
+            value_indexes = (values, numpy.array([matrices["prof_index"][value] for value in values]))
+            self.value_indexes[variable] = value_indexes
+        indexes = value_indexes[1]
+
+        current_score = self.aggregate_score()
+        contribution_total = self.contribution_total
+        self.move_course(variable, old_value, None)
+        removed_total = self.contribution_total
+        num_profs = len(self.prof_aggregates)
+
+        num_courses = matrices["courses"][indexes]
+        semester_courses = matrices["semester_courses"][indexes]
+        if semester in SEMESTERS:
+            semester_courses[:, SEMESTERS.index(semester)] += 1
+        with numpy.errstate(divide="ignore", invalid="ignore"):
+            enthusiasm_mean = ((matrices["enthusiasm"][indexes] +
+                                matrices["enthusiasm_scores"][indexes, matrices["course_code_index"][course_code]]) /
+                               (num_courses + 1))
+            exceeding = numpy.maximum(semester_courses - matrices["preferred_courses"][indexes], 0).sum(axis=1)
+            contribution = (((enthusiasm_mean - 20) / (195 - 20)) * 4 +
+                            (1 - exceeding / matrices["teaching_obligations"][indexes]))
+            new_scores = (((removed_total - matrices["contribution"][indexes]) + contribution) /
+                          (5 * (num_profs + (num_courses == 0))))
+        deltas = new_scores - current_score
+
+        self.move_course(variable, None, old_value)
+        self.contribution_total = contribution_total
+        deltas[indexes == matrices["prof_index"][old_value]] = 0
+        return deltas
+
+    # Same as satisfaction_score, computed from the cached aggregates.
+    def aggregate_score(self) -> float:
+        if not self.prof_aggregates:
+            return 0
+        return self.contribution_total / (5 * len(self.prof_aggregates))
+
+    # Move a course from one professor's aggregates to another's (either may be None).
+    def move_course(self, course, old_prof_id, new_prof_id) -> None:
+        course_code, semester = course.split("_")[:2]
+        for prof_id, change in [(old_prof_id, -1), (new_prof_id, 1)]:
+            if prof_id is None:
+                continue
+            aggregates = self.prof_aggregates.get(prof_id)
+            if aggregates is None:
+                aggregates = {"enthusiasm": 0, "courses": 0, "fall": 0, "spring": 0, "summer": 0}
+                self.prof_aggregates[prof_id] = aggregates
+            else:
+                self.contribution_total -= self.prof_contribution(prof_id, aggregates)
+            aggregates["enthusiasm"] += change * self.enthusiasm_score(prof_id, course_code)
+            aggregates["courses"] += change
+            if semester in aggregates:
+                aggregates[semester] += change
+            contribution = 0
+            if aggregates["courses"] == 0:
+                del self.prof_aggregates[prof_id]
+            else:
+                contribution = self.prof_contribution(prof_id, aggregates)
+                self.contribution_total += contribution
+            if self.matrices is not None:
+                i = self.matrices["prof_index"][prof_id]
+                self.matrices["enthusiasm"][i] = aggregates["enthusiasm"]
+                self.matrices["courses"][i] = aggregates["courses"]
+                self.matrices["semester_courses"][i] = [aggregates[semester] for semester in SEMESTERS]
+                self.matrices["contribution"][i] = contribution
+
+    # Weighted satisfaction of a single professor, as combined in satisfaction_score.
+    def prof_contribution(self, prof_id, aggregates) -> float:
+        prof_enthusiasm_mean = aggregates["enthusiasm"] / aggregates["courses"]
+        prof_enthusiasm_mean_normalized = (prof_enthusiasm_mean - 20) / (195 - 20)
+
+        total_courses_exceeding_pref_num_courses = 0
+        for semester in ["fall", "spring", "summer"]:
+            preferred_num_courses = self.professors[prof_id]["preferredCoursesPerSemester"][semester]
+            if aggregates[semester] > preferred_num_courses:
+                total_courses_exceeding_pref_num_courses += aggregates[semester] - preferred_num_courses
+        enthusiasm_preferred_courses_per_semester = (1 - (total_courses_exceeding_pref_num_courses /
+                                                          self.professors[prof_id]["teachingObligations"]))
+
+        return (prof_enthusiasm_mean_normalized * 4) + enthusiasm_preferred_courses_per_semester
+
+    def enthusiasm_score(self, prof_id, course_code) -> int:
+        return enthusiasm_scores(self.professors[prof_id]).get(course_code, 0)
 
     def satisfaction_score(self, assignment, variable=None) -> float:
         overall_enthusiasm_sum = 0
         overall_course_prefs_per_semester_sum = 0
         overall_pref_non_teach_semester_sum = 0
 
+        # Group the courses by the professor teaching them.
+        courses_by_prof = {}
+        for course, prof_id in assignment.items():
+            courses_by_prof.setdefault(prof_id, []).append(course)
+
         # For each professor:
-        profs = set(assignment.values())
-        for prof_id in profs:
-            # Get list of courses having the same professor as course currently under consideration.
-            prof_courses = [course for course in assignment.keys() if (assignment[course] == prof_id)]
+        for prof_id, prof_courses in courses_by_prof.items():
+            prof_scores = enthusiasm_scores(self.professors[prof_id])
 
             # Loop through prof's courses to compute satisfaction regarding the various soft constraints.
             prof_enthusiasm_sum = 0
@@ -223,9 +512,7 @@ class course_preferences_constraint(SoftConstraint):
             num_courses_summer = 0
             for course in prof_courses:
                 # Get sum of enthusiasm scores for professor assigned to course currently under consideration.
-                for course_preferences in self.professors[prof_id]["qualifiedCoursePreferences"]:
-                    if course_preferences["courseCode"] == course.split("_")[0]:
-                        prof_enthusiasm_sum += course_preferences["enthusiasmScore"]
+                prof_enthusiasm_sum += prof_scores.get(course.split("_")[0], 0)
 
                 # Record number of courses assigned to the professor for each semester.
                 # Used to compute the statisfaction regarding courses per semester and non-teaching semesters
@@ -287,9 +574,9 @@ class course_preferences_constraint(SoftConstraint):
             overall_pref_non_teach_semester_sum += enthusiasm_pref_non_teaching_semester
 
         # Compute aggregate satisfactions scores for each soft constraint.
-        overall_enthusiasm_mean = overall_enthusiasm_sum / len(profs)
-        overall_enthusiasm_mean_course_per_sem = overall_course_prefs_per_semester_sum / len(profs)
-        overall_enthusiasm_mean_non_teach_semester = overall_pref_non_teach_semester_sum / len(profs)
+        overall_enthusiasm_mean = overall_enthusiasm_sum / len(courses_by_prof)
+        overall_enthusiasm_mean_course_per_sem = overall_course_prefs_per_semester_sum / len(courses_by_prof)
+        overall_enthusiasm_mean_non_teach_semester = overall_pref_non_teach_semester_sum / len(courses_by_prof)
 
         # Compute and return a single overall satisfaction score combining all soft constraints.
         return ((overall_enthusiasm_mean * 4) + overall_enthusiasm_mean_course_per_sem) / 5
@@ -302,24 +589,71 @@ class time_slot_constraint(SoftConstraint):
         self.professors = professors
         self.timeslot_configs = timeslot_configs
         self.csp_1_result = csp_1_result
-
-    def satisfaction_score(self, assignment, variable) -> float:
-        if variable not in self.variables:
-            return 1
+        self.course_set = set(courses)
+        # The score only depends on the professor, the semester and the timeslot, so the scores of all the timeslots
+        # are computed together, the first time a (professor, semester) pair needs one:
+        # (prof_id, semester) -> {timeslot_id -> score}
+        self.score_tables = {}
+        # course -> score table of its professor and semester
+        self.course_score_tables = {}
+        # course -> (values, NumPy array of the scores of the values), for score_deltas
+        self.course_score_rows = {}
+
+    # Without a variable, the scores of all the assigned courses are summed.
+    def satisfaction_score(self, assignment, variable=None) -> float:
+        if variable is None:
+            return sum(self.timeslot_score(course, timeslot_id) for course, timeslot_id in assignment.items())
+        return self.timeslot_score(variable, assignment[variable])
+
+    # The score only depends on the course's own timeslot, so the delta just compares the two timeslots.
+    def score_delta(self, assignment, variable, value) -> float:
+        return self.timeslot_score(variable, value) - self.timeslot_score(variable, assignment[variable])
+
+    def score_deltas(self, assignment, variable, values):
+        current_score = self.timeslot_score(variable, assignment[variable])
+        if numpy is None:
+            return [self.timeslot_score(variable, value) - current_score for value in values]
+        score_row = self.course_score_rows.get(variable)
+        if score_row is None or score_row[0] is not values:
+            score_row = (values, numpy.array([self.timeslot_score(variable, value) for value in values], dtype=float))
+            self.course_score_rows[variable] = score_row
+        return score_row[1] - current_score
+
+    # The score is the sum of the courses' timeslot scores.
+    def value_score(self, variable, value) -> float:
+        return self.timeslot_score(variable, value)
+
+    # Satisfaction of the professor teaching the course if it is given the timeslot.
+    def timeslot_score(self, variable, timeslot_id) -> float:
+        score_table = self.course_score_tables.get(variable)
+        if score_table is None:
+            if variable not in self.course_set:
+                return 1
+            score_table = self.score_table(self.csp_1_result[variable], variable.split("_")[1])
+            self.course_score_tables[variable] = score_table
+        return score_table[timeslot_id]
+
+    def score_table(self, prof_id, semester):
+        score_table = self.score_tables.get((prof_id, semester))
+        if score_table is None:
+            score_table = {timeslot_id: self.compute_timeslot_score(prof_id, semester, timeslot_id)
+                           for timeslot_id in self.timeslot_configs}
+            self.score_tables[(prof_id, semester)] = score_table
+        return score_table
+
+    # Satisfaction of the professor if they teach a course in the semester in the timeslot.
+    def compute_timeslot_score(self, prof_id, semester, timeslot_id) -> float:
         # Check for this professor have scheduled them outside-of their preferred hours
 
         # Dictionary of time codes used in time slots preferences
         time_codes = {"monday": "M", "tuesday": "T",
                       "wednesday": "W", "thursday": "Th", "friday": "F"}
 
-        # Grab the professor for the course currently under consideration.
-        prof_id = self.csp_1_result[variable]
-
         # Grab the professor's preferred course day spread (list).
         preferred_course_day_spread_list = self.professors[prof_id]["preferredCourseDaySpreads"]
 
-        # Grab the timeslot configuration currently assigned to the variable.
-        timeslot_config = self.timeslot_configs[assignment[variable]]
+        # Grab the timeslot configuration under consideration.
+        timeslot_config = self.timeslot_configs[timeslot_id]
 
         # Compute satisfaction regarding preferred course day spreads.
         # *** NOTE ***
@@ -338,8 +672,8 @@ class time_slot_constraint(SoftConstraint):
                     enthusiasm_score_for_preferred_days += 1
 
         # CSP 2 Soft Constraint 2 for professor preferred teaching hour preferences.
-        semester = variable.split("_")[1]
-        prof_preferred_course_times_in_semester = self.professors[prof_id]["preferredTimes"][semester] # could be null
+        # Preferred times in minutes since midnight, could be null.
+        prof_preferred_course_times_in_semester = preferred_time_minutes(self.professors[prof_id])[semester]
 
         satisfaction_preferred_times = 1
         if prof_preferred_course_times_in_semester:
@@ -363,24 +697,18 @@ class time_slot_constraint(SoftConstraint):
                     start_time = timeslot_config[0][1]
                     end_time = timeslot_config[0][2]
                     worst_diffs = []
-                    for time_range in prof_preferred_course_times_in_semester[day]:
-                        # Get preferred start time.
-                        pref_start_time_tuple = time_range[0].split(":")
-                        preferred_start_time = datetime.datetime(100, 1, 1, int(pref_start_time_tuple[0]), int(pref_start_time_tuple[1]))
-                        # Get preferred end time.
-                        pref_end_time_tuple = time_range[1].split(":")
-                        preferred_end_time = datetime.datetime(100, 1, 1, int(pref_end_time_tuple[0]), int(pref_end_time_tuple[1]))
+                    for preferred_start_time, preferred_end_time in prof_preferred_course_times_in_semester[day]:
                         # If assigned time begins before preferred start time, record the difference.
-                        start_diff = datetime.timedelta(seconds=0)
+                        start_diff = 0
                         if start_time < preferred_start_time:
                             start_diff = preferred_start_time - start_time
                         # If assigned time ends after preferred end time, record the difference.
-                        end_diff = datetime.timedelta(seconds=0)
+                        end_diff = 0
                         if end_time > preferred_end_time:
                             end_diff = end_time - preferred_end_time
-                        # Determine which of the start time, end time is a worse violation of the preferred time.
-                        worst_diff = max(start_diff.seconds, end_diff.seconds)
-                        # Record the worst violation.
+                        # Determine which of the start time, end time is a worse violation of the preferred time,
+                        # and record it in seconds.
+                        worst_diff = max(start_diff, end_diff) * 60
                         worst_diffs.append(worst_diff)
                     # Compute satisfaction score for the assigned timeslot relative to
                     # the preferred time range to which the assigned timeslot is the closest.
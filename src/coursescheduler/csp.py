@@ -5,10 +5,21 @@
 ################################################################
 # CSP solver framework:
 import time
-from typing import Generic, TypeVar, Dict, List, Optional
+from typing import Generic, TypeVar, Dict, List, Optional, Set, FrozenSet, Tuple
 from abc import ABC, abstractmethod
+import functools
+import heapq
+import math
 import random
 import sys
+import threading
+from collections import deque, OrderedDict
+
+try:
+    import numpy
+except ImportError:
+    # NumPy is optional: without it the vectorized evaluation in CSP.optimize uses pure Python.
+    numpy = None
 
 
 def log_message(message):
@@ -18,6 +29,55 @@ V = TypeVar('V')  # variable type
 D = TypeVar('D')  # domain type
 
 
+# Decorator for the search methods of the CSP: whatever way the search returns, the constraints' incremental state
+# is released afterwards (see Constraint.release).
+def releasing_constraints(search):
+    @functools.wraps(search)
+    def search_releasing_constraints(csp, *args, **kwargs):
+        try:
+            return search(csp, *args, **kwargs)
+        finally:
+            csp.release_constraints()
+    return search_releasing_constraints
+
+
+# Cancellation token carried by a single search: cancelled explicitly through cancel(), or automatically once its
+# deadline (a time.time() timestamp, given directly or as a timeout in seconds from now) has passed.
+# It can be used wherever the searches expect a stop event. An existing event (e.g. a multiprocessing.Event shared
+# with other processes) can be given to be set on cancellation.
+class CancellationToken:
+    def __init__(self, timeout: Optional[float] = None, deadline: Optional[float] = None, event=None) -> None:
+        if timeout is not None:
+            timeout_deadline = time.time() + timeout
+            deadline = timeout_deadline if deadline is None else min(deadline, timeout_deadline)
+        self.deadline = deadline
+        self.event = threading.Event() if event is None else event
+
+    def cancel(self) -> None:
+        self.event.set()
+
+    def is_set(self) -> bool:
+        if self.event.is_set():
+            return True
+        if self.deadline is not None and time.time() >= self.deadline:
+            self.event.set()
+            return True
+        return False
+
+    # Seconds left until the deadline (None if there is none).
+    def remaining(self) -> Optional[float]:
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.time())
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        remaining = self.remaining()
+        if remaining is not None and (timeout is None or remaining < timeout):
+            timeout = remaining
+        self.event.wait(timeout)
+        return self.is_set()
+
+
 # Base class for all constraints
 class Constraint(Generic[V, D], ABC):
     # The variables that the constraint is between
@@ -30,6 +90,36 @@ class Constraint(Generic[V, D], ABC):
     def satisfied(self, assignment: Dict[V, D]) -> bool:
         return
 
+    # Hooks called by the CSP whenever one of this constraint's variables is assigned or unassigned.
+    # Constraints that keep incremental state (e.g. counters) override these so satisfied() can avoid
+    # rescanning the whole assignment. By default they do nothing.
+    def reset(self) -> None:
+        pass
+
+    def assign(self, variable: V, value: D) -> None:
+        pass
+
+    def unassign(self, variable: V, value: D) -> None:
+        pass
+
+    # Called by the CSP once a search returns: the incremental state only matched the search's assignment, so it is
+    # dropped and satisfied() checks the assignment it is given again. By default it does nothing.
+    def release(self) -> None:
+        pass
+
+    # Returns the assigned variables (other than the given one) responsible for the constraint being violated
+    # by the value of the given variable. Used for conflict-directed backjumping, so it may over-approximate:
+    # by default every other assigned variable in the constraint is blamed.
+    def conflicts(self, variable: V, assignment: Dict[V, D]) -> List[V]:
+        return [other for other in self.variables if other != variable and other in assignment]
+
+    # Vectorized feasibility check, used by CSP.optimize to evaluate every value of a variable at once.
+    # Returns the values the variable cannot take given the values of the other variables in the assignment, or None
+    # if the constraint does not support it (each value is then checked with satisfied()).
+    # Called while the variable is unassigned (see unassign), so its own value in the assignment is ignored.
+    def infeasible_values(self, variable: V, assignment: Dict[V, D]) -> Optional[Set[D]]:
+        return None
+
 
 class SoftConstraint(Generic[V, D], ABC):
     # The variables that the constraint is between
@@ -42,6 +132,214 @@ class SoftConstraint(Generic[V, D], ABC):
     def satisfaction_score(self, assignment: Dict[V, D], variable=None) -> float:
         return
 
+    # Incremental evaluation, used by CSP.optimize.
+    # reset() is called with the starting assignment, and commit() after a variable's value has changed in it.
+    # score_delta() returns how much satisfaction_score(assignment, variable) would change if the variable were given
+    # the new value. By default the score is recomputed on the modified assignment; constraints keeping cached
+    # aggregates override these to only look at what the change affects.
+    def reset(self, assignment: Dict[V, D]) -> None:
+        pass
+
+    def commit(self, assignment: Dict[V, D], variable: V, old_value: D, new_value: D) -> None:
+        pass
+
+    def score_delta(self, assignment: Dict[V, D], variable: V, value: D) -> float:
+        old_value = assignment[variable]
+        current_score = self.satisfaction_score(assignment, variable)
+        assignment[variable] = value
+        try:
+            new_score = self.satisfaction_score(assignment, variable)
+        finally:
+            assignment[variable] = old_value
+        return new_score - current_score
+
+    # score_delta for each of the values at once, as a sequence aligned with the values.
+    # Constraints keeping NumPy score matrices override this to return an array computed in one operation; those are
+    # given the whole domain, including values the hard constraints rule out, whose deltas are then ignored.
+    def score_deltas(self, assignment: Dict[V, D], variable: V, values: List[D]):
+        return [self.score_delta(assignment, variable, value) for value in values]
+
+    # For constraints whose score is a sum of independent per-variable scores: the score of the variable taking the
+    # value, used by CSP.branch_and_bound to bound the score of partial assignments. None if the score is not
+    # separable this way.
+    def value_score(self, variable: V, value: D) -> Optional[float]:
+        return None
+
+
+# Returns the i-th term (starting from 1) of the Luby sequence 1, 1, 2, 1, 1, 2, 4, 1, 1, 2, ...
+# used to schedule the failure limits of restarts.
+def luby(i: int) -> int:
+    k = 1
+    while (1 << k) - 1 < i:
+        k += 1
+    if i == (1 << k) - 1:
+        return 1 << (k - 1)
+    return luby(i - (1 << (k - 1)) + 1)
+
+
+# Constraint propagation over the domains of the variables during a search.
+# Pruned domains are replaced rather than modified in place, and the previous domains are recorded on a trail,
+# so backtracking restores them by popping the trail back to a mark instead of copying every domain at every node.
+# Modes:
+#   "forward_checking": after an assignment, remove the values of its unassigned neighbours that became inconsistent.
+#   "mac": forward checking followed by AC-3 from the neighbours whose domains shrank (maintaining arc consistency).
+# With explain set, the engine also records which assigned variables caused the values of each domain to be pruned,
+# for conflict-directed backjumping. Pruning done by AC-3 is blamed on every assigned variable.
+class PropagationEngine(Generic[V, D]):
+    def __init__(self, csp: "CSP[V, D]", assignment: Dict[V, D], neighbors: Dict[V, List[V]],
+                 mode: str = "forward_checking", explain: bool = False) -> None:
+        if mode not in ["forward_checking", "mac"]:
+            raise ValueError("Unknown propagation mode: " + str(mode))
+        self.csp = csp
+        self.assignment = assignment
+        self.neighbors = neighbors
+        self.mode = mode
+        self.explain = explain
+        # Current domain of each variable.
+        self.domains: Dict[V, List[D]] = {}
+        # With explain, the assigned variables responsible for the values pruned from each domain.
+        self.reasons: Dict[V, FrozenSet[V]] = {}
+        # The variable whose domain was wiped out by the last failed propagation.
+        self.wiped_out: Optional[V] = None
+        # Stack of (variable, previous domain, previous reasons) entries.
+        self.trail: List = []
+
+    # Remove the values which are inconsistent on their own and, with MAC, make every arc consistent.
+    # Returns False if some domain is wiped out, meaning there is no solution.
+    def initialize(self) -> bool:
+        for variable in self.csp.variables:
+            self.domains[variable] = [value for value in self.csp.domains[variable]
+                                      if self.csp.consistent_with(variable, value, self.assignment)]
+            if not self.domains[variable]:
+                return False
+        if self.mode == "mac":
+            return self.arc_consistency([(variable, neighbor) for variable in self.csp.variables
+                                         for neighbor in self.neighbors[variable]])
+        return True
+
+    def mark(self) -> int:
+        return len(self.trail)
+
+    # Restore every domain pruned since the given mark.
+    def undo(self, mark: int) -> None:
+        while len(self.trail) > mark:
+            variable, values, reasons = self.trail.pop()
+            self.domains[variable] = values
+            self.reasons[variable] = reasons
+
+    def restrict(self, variable: V, values: List[D], reasons=()) -> None:
+        previous_reasons = self.reasons.get(variable, frozenset())
+        self.trail.append((variable, self.domains[variable], previous_reasons))
+        self.domains[variable] = values
+        if reasons:
+            self.reasons[variable] = previous_reasons.union(reasons)
+
+    # Propagate the assignment of the given variable. Returns False if a dead end is found.
+    def propagate(self, variable: V) -> bool:
+        changed = []
+        for neighbor in self.neighbors[variable]:
+            if neighbor in self.assignment:
+                continue
+            values = self.domains[neighbor]
+            reasons = set()
+            if self.explain:
+                remaining = []
+                for value in values:
+                    culprits = self.csp.conflicts_with(neighbor, value, self.assignment)
+                    if culprits is None:
+                        remaining.append(value)
+                    else:
+                        reasons.update(culprits)
+            else:
+                remaining = [value for value in values if self.csp.consistent_with(neighbor, value, self.assignment)]
+            if len(remaining) < len(values):
+                self.restrict(neighbor, remaining, reasons)
+                if not remaining:
+                    self.wiped_out = neighbor
+                    return False
+                changed.append(neighbor)
+        if self.mode == "mac":
+            return self.arc_consistency([(other, neighbor) for neighbor in changed for other in self.neighbors[neighbor]
+                                         if other not in self.assignment])
+        return True
+
+    # AC-3 over a queue of arcs between unassigned variables.
+    # An arc (x, y) is consistent if every value of x is compatible with some value of y.
+    def arc_consistency(self, arcs) -> bool:
+        queue = deque(arcs)
+        queued = set(queue)
+        while queue:
+            arc = queue.popleft()
+            queued.discard(arc)
+            x, y = arc
+            if self.revise(x, y):
+                if not self.domains[x]:
+                    self.wiped_out = x
+                    return False
+                for z in self.neighbors[x]:
+                    if z != y and z not in self.assignment and (z, x) not in queued:
+                        queue.append((z, x))
+                        queued.add((z, x))
+        return True
+
+    # Remove the values of x which have no compatible value in the domain of y. Returns True if x was pruned.
+    def revise(self, x: V, y: V) -> bool:
+        values = self.domains[x]
+        remaining = [value for value in values if self.supported(x, value, y)]
+        if len(remaining) < len(values):
+            self.restrict(x, remaining, self.assignment.keys() if self.explain else ())
+            return True
+        return False
+
+    def supported(self, x: V, value: D, y: V) -> bool:
+        self.assignment[x] = value
+        self.csp.assign(x, value)
+        result = False
+        for other_value in self.domains[y]:
+            if self.csp.consistent_with(y, other_value, self.assignment):
+                result = True
+                break
+        self.csp.unassign(x, value)
+        del self.assignment[x]
+        return result
+
+
+# Bounded store of nogoods learned during the search: partial assignments, as sets of (variable, value) pairs,
+# which cannot be extended to a solution. When the store is full, the least recently used nogood is evicted.
+class NogoodStore(Generic[V, D]):
+    def __init__(self, capacity: int = 1000) -> None:
+        self.capacity = capacity
+        self.nogoods: "OrderedDict[FrozenSet, None]" = OrderedDict()
+        # Index of the stored nogoods containing each (variable, value) pair.
+        self.index: Dict[tuple, Set[FrozenSet]] = {}
+
+    def __len__(self) -> int:
+        return len(self.nogoods)
+
+    def add(self, nogood: Dict[V, D]) -> None:
+        key = frozenset(nogood.items())
+        if key in self.nogoods:
+            self.nogoods.move_to_end(key)
+            return
+        self.nogoods[key] = None
+        for pair in key:
+            self.index.setdefault(pair, set()).add(key)
+        if len(self.nogoods) > self.capacity:
+            evicted, _ = self.nogoods.popitem(last=False)
+            for pair in evicted:
+                self.index[pair].discard(evicted)
+                if not self.index[pair]:
+                    del self.index[pair]
+
+    # Returns a stored nogood which assigning the value to the variable would complete, or None.
+    def find(self, variable: V, value: D, assignment: Dict[V, D]) -> Optional[FrozenSet]:
+        for nogood in self.index.get((variable, value), ()):
+            if all(other == variable or (other in assignment and assignment[other] == other_value)
+                   for other, other_value in nogood):
+                self.nogoods.move_to_end(nogood)
+                return nogood
+        return None
+
 
 # A constraint satisfaction problem consists of variables of type V
 # that have ranges of values known as domains of type D and constraints
@@ -59,7 +357,11 @@ class CSP(Generic[V, D]):
 
         # Constraints
         self.constraints: Dict[V, List[Constraint[V, D]]] = {}
+        self.constraint_list: List[Constraint[V, D]] = []
+        # Index of the variables sharing a constraint with each variable, built on first use.
+        self.neighbor_index: Optional[Dict[V, List[V]]] = None
         self.soft_constraints: Dict[V, List[SoftConstraint[V, D]]] = {}
+        self.soft_constraint_list: List[SoftConstraint[V, D]] = []
         for variable in self.variables:
             self.constraints[variable] = []
             self.soft_constraints[variable] = []
@@ -68,17 +370,46 @@ class CSP(Generic[V, D]):
 
     def add_constraint(self, constraint: Constraint[V, D]) -> None:
         for variable in constraint.variables:
-            if variable not in self.variables:
+            if variable not in self.constraints:
                 raise LookupError("Variable in constraint not in CSP")
             else:
                 self.constraints[variable].append(constraint)
+        self.constraint_list.append(constraint)
+        self.neighbor_index = None
 
     def add_soft_constraint(self, soft_constraint: SoftConstraint[V, D]) -> None:
         for variable in soft_constraint.variables:
-            if variable not in self.variables:
+            if variable not in self.constraints:
                 raise LookupError("Variable in constraint not in CSP")
             else:
                 self.soft_constraints[variable].append(soft_constraint)
+        self.soft_constraint_list.append(soft_constraint)
+
+    # Notify the constraints of the given variable that it has been assigned a value.
+    def assign(self, variable: V, value: D) -> None:
+        for constraint in self.constraints[variable]:
+            constraint.assign(variable, value)
+
+    # Notify the constraints of the given variable that its value has been removed.
+    def unassign(self, variable: V, value: D) -> None:
+        for constraint in self.constraints[variable]:
+            constraint.unassign(variable, value)
+
+    # Reset the incremental state of every constraint to match the given assignment.
+    def reset_constraints(self, assignment: Dict[V, D]) -> None:
+        for constraint in self.constraint_list:
+            constraint.reset()
+        for variable, value in assignment.items():
+            self.assign(variable, value)
+
+    # Drop the incremental state of every constraint (see Constraint.release).
+    def release_constraints(self) -> None:
+        for constraint in self.constraint_list:
+            constraint.release()
+
+    # Overall quality of a complete assignment: the sum of the soft constraints' satisfaction scores.
+    def score(self, assignment: Dict[V, D]) -> float:
+        return sum(soft_constraint.satisfaction_score(assignment) for soft_constraint in self.soft_constraint_list)
 
     # Check if the value assignment is consistent by checking all constraints
     # for the given variable against it
@@ -88,19 +419,61 @@ class CSP(Generic[V, D]):
                 return False
         return True
 
-    def backtracking_search(self, config=None, stop_event=None, result_object=None) -> Optional[Dict[V, D]]:
-        if config is not None and config.get('mrv') is True and config.get('degree') is True:
-            print("Cannot use MRV and Degree variable heuristics simultaneously. Please modify config.")
-            exit()
+    # Check if assigning the value to the (unassigned) variable would be consistent with the assignment.
+    # The assignment and constraint state are left unchanged.
+    def consistent_with(self, variable: V, value: D, assignment: Dict[V, D]) -> bool:
+        assignment[variable] = value
+        self.assign(variable, value)
+        result = self.consistent(variable, assignment)
+        self.unassign(variable, value)
+        del assignment[variable]
+        return result
+
+    # Returns the assigned variables responsible for the value of the given variable violating a constraint,
+    # or None if the value is consistent.
+    def conflicts(self, variable: V, assignment: Dict[V, D]) -> Optional[List[V]]:
+        for constraint in self.constraints[variable]:
+            if not constraint.satisfied(variable, assignment):
+                return constraint.conflicts(variable, assignment)
+        return None
+
+    # Same as conflicts, for a value not yet assigned to the variable (see consistent_with).
+    def conflicts_with(self, variable: V, value: D, assignment: Dict[V, D]) -> Optional[List[V]]:
+        assignment[variable] = value
+        self.assign(variable, value)
+        result = self.conflicts(variable, assignment)
+        self.unassign(variable, value)
+        del assignment[variable]
+        return result
+
+    # Returns a dictionary mapping each variable to the other variables it shares a constraint with.
+    # The index is cached until another constraint is added.
+    def neighbors(self) -> Dict[V, List[V]]:
+        if self.neighbor_index is None:
+            self.neighbor_index = self.build_neighbor_index()
+        return self.neighbor_index
+
+    def build_neighbor_index(self) -> Dict[V, List[V]]:
+        neighbors: Dict[V, Dict[V, None]] = {variable: {} for variable in self.variables}
+        for constraint in self.constraint_list:
+            for variable in constraint.variables:
+                for other in constraint.variables:
+                    if other != variable:
+                        neighbors[variable][other] = None
+        return {variable: list(others) for variable, others in neighbors.items()}
 
-        # If using MRV heuristic, sort variables in increasing order of domain size.
-        if config is not None and config.get('mrv'):
+    @releasing_constraints
+    def backtracking_search(self, config=None, stop_event=None, result_object=None) -> Optional[Dict[V, D]]:
+        # If using MRV heuristic, the next variable is chosen dynamically at each node (see below).
+        # Variables are first sorted in increasing order of domain size so that ties keep a sensible order.
+        dynamic_ordering = config is not None and config.get('mrv')
+        if dynamic_ordering:
             def get_domain_size(var):
                 return len(self.domains[var])
             self.variables.sort(key=get_domain_size)
 
-        # If using degree heuristic, sort variables in decreasing order of degree.
-        if config is not None and config.get('degree'):
+        # If using degree heuristic alone, sort variables in decreasing order of degree.
+        elif config is not None and config.get('degree'):
             constraints_degrees = []
             for var in self.variables:
                 curr_constraints = self.constraints[var]
@@ -110,147 +483,857 @@ class CSP(Generic[V, D]):
                 constraints_degrees.append(curr_degree)
 
             zipped_degrees_constraints = list(zip(constraints_degrees, self.variables))
-            zipped_sorted = sorted(zipped_degrees_constraints, key=lambda x: x[0])
-            self.variables = list(zip(*zipped_sorted))[1]
-
-        variable_conflict_set = {}
-        if config["forward_checking"]:
-            for variable in self.variables:
-                curr_conflicting_variables = []
-                for constraint in self.constraints[variable]:
-                    for const_var in constraint.variables:
-                        if const_var != variable and const_var not in curr_conflicting_variables:
-                            curr_conflicting_variables.append(const_var)
-                variable_conflict_set[variable] = curr_conflicting_variables
+            zipped_sorted = sorted(zipped_degrees_constraints, key=lambda x: -x[0])
+            self.variables = list(list(zip(*zipped_sorted))[1])
+
+        # Constraint propagation: "forward_checking" or "mac". The legacy forward_checking flag selects the former.
+        # Dynamic variable ordering needs the pruned domains, so it implies at least forward checking.
+        propagation = config.get("propagation") if config is not None else None
+        if propagation is None and config is not None and config.get("forward_checking"):
+            propagation = "forward_checking"
+        if propagation is None and dynamic_ordering:
+            propagation = "forward_checking"
 
         # Error case: the backtracking search setup took too long.
-        if stop_event.isSet():
+        if stop_event.is_set():
             result_object["schedule"] = None
             result_object["message"] = "Error: Timeout during course scheduling. Please relax the constraints or add " \
                                        "more professor and timeslot availability. "
             return None
 
-        # Backtracking search with no forward checking
-        def backtracking_search_recursive(assignment_: Dict[V, D] = {}) -> Optional[Dict[V, D]]:
-            # Assignment is complete if every variable is assigned (our base case)
-            if len(assignment_) == len(self.variables):
-                return assignment_
+        # Conflict-directed backjumping: when every value of a variable fails, the search jumps straight back to the
+        # most recently assigned variable responsible for the failure, skipping the variables in between.
+        # The responsible variables are also learned as a nogood, checked before each value is tried.
+        backjumping = config is not None and config.get("backjumping")
+        nogoods: Optional[NogoodStore[V, D]] = None
+        if backjumping:
+            nogoods = NogoodStore(config.get("nogood_capacity", 1000))
 
-            # Get all variables in the CSP but not in the assignment
-            unassigned: List[V] = [v for v in self.variables if v not in assignment_]
+        # Randomized restarts: an attempt is abandoned once it has rejected more values than the current limit,
+        # which grows according to a Luby or geometric schedule. Restarted attempts break ties in the variable order
+        # randomly and shuffle the values of each domain within a small window, so a run stuck in a bad part of the
+        # search space is not repeated. Learned nogoods are kept across restarts.
+        restarts = config.get("restarts") if config is not None else None
+        if restarts not in [None, "luby", "geometric"]:
+            raise ValueError("Unknown restart strategy: " + str(restarts))
+        restart_base = config.get("restart_base", 100) if config is not None else 100
+        restart_factor = config.get("restart_factor", 1.5) if config is not None else 1.5
+        value_noise = config.get("value_noise", 2) if config is not None else 2
+        rng = random.Random(config.get("seed") if config is not None else None)
+        failure_limit: Optional[int] = None
+        failures = 0
+        aborted = False
+        randomize = False
 
-            # Get the every possible domain value of the first unassigned variable
-            first: V = unassigned[0]
-            for value in self.domains[first]:
-                # Error case: the backtracking search could not find a solution in the given amount of time
-                if stop_event.isSet():
-                    result_object["schedule"] = None
-                    result_object["message"] = "Error: Timeout during course scheduling. Please relax the constraints " \
-                                               "or add more professor and timeslot availability. "
-                    return None
-                local_assignment = assignment_.copy()
-                local_assignment[first] = value
-                # If we're still consistent, we recurse (continue)
-                if self.consistent(first, local_assignment):
-                    result_: Optional[Dict[V, D]] = backtracking_search_recursive(local_assignment)
-                    # If we didn't find the result, we will end up backtracking
-                    if result_ is not None:
-                        return result_
-            return None
+        # Backtracking search.
+        # A single assignment is modified in place. The trail records the variables in the order they were
+        # assigned, so its length is also the index of the next variable to assign and backtracking pops from it.
+        assignment: Dict[V, D] = {}
+        trail: List[V] = []
+        neighbors = self.neighbors()
+        engine: Optional[PropagationEngine[V, D]] = None
+
+        # For dynamic variable ordering, the number of unassigned neighbours of each variable.
+        # It is updated only for the neighbours of the variable just assigned, and restored when backtracking.
+        unassigned_degree: Dict[V, int] = {}
+        # For dynamic variable ordering, a lazy heap of (domain size, -unassigned degree, tie breaker, variable)
+        # entries. An entry is pushed whenever the domain size or degree of a variable changes, or the variable is
+        # unassigned, so every unassigned variable always has an entry with its current key. Entries which no longer
+        # match are discarded when they reach the top, and the heap is rebuilt once stale entries pile up.
+        candidates: List[Tuple] = []
+        position = {variable_: index_ for index_, variable_ in enumerate(self.variables)}
+
+        # Set up the search state for a new attempt. Returns False if some variable has no consistent value at all.
+        def start_attempt() -> bool:
+            nonlocal engine, failures, aborted
+            assignment.clear()
+            trail.clear()
+            failures = 0
+            aborted = False
+            self.reset_constraints(assignment)
+            if propagation is not None:
+                engine = PropagationEngine(self, assignment, neighbors, propagation, explain=backjumping)
+                if not engine.initialize():
+                    return False
+            if dynamic_ordering:
+                for variable_ in self.variables:
+                    unassigned_degree[variable_] = len(neighbors[variable_])
+                rebuild_candidates()
+            return True
+
+        # Heap entry of an unassigned variable. Ties are broken by the order of the variables, or randomly once
+        # restarted.
+        def candidate(variable_: V) -> Tuple:
+            tie = rng.random() if randomize else position[variable_]
+            return len(engine.domains[variable_]), -unassigned_degree[variable_], tie, variable_
+
+        def rebuild_candidates() -> None:
+            candidates[:] = [candidate(variable_) for variable_ in self.variables if variable_ not in assignment]
+            heapq.heapify(candidates)
+
+        def push_candidates(variables_) -> None:
+            for variable_ in variables_:
+                if variable_ not in assignment:
+                    heapq.heappush(candidates, candidate(variable_))
+            if len(candidates) > 4 * len(self.variables):
+                rebuild_candidates()
+
+        # The variables whose domains were pruned since the mark, read from the propagation trail.
+        def pruned_since(mark_: int) -> List[V]:
+            return [entry[0] for entry in engine.trail[mark_:]]
+
+        # Undo the propagation since the mark, with the restored domains becoming candidates again.
+        def undo_propagation(mark_: int) -> None:
+            restored = pruned_since(mark_) if dynamic_ordering else None
+            engine.undo(mark_)
+            if dynamic_ordering:
+                push_candidates(restored)
+
+        # Choose the unassigned variable with the fewest consistent values remaining (MRV),
+        # breaking ties by the largest number of unassigned neighbours (degree), then randomly if restarted.
+        def select_unassigned_variable() -> V:
+            if dynamic_ordering:
+                while True:
+                    size, negative_degree, _, variable_ = heapq.heappop(candidates)
+                    if variable_ not in assignment and size == len(engine.domains[variable_]) and \
+                            negative_degree == -unassigned_degree[variable_]:
+                        return variable_
+            return self.variables[len(trail)]
+
+        # Once restarted, values may move up to value_noise positions away from their place in the domain.
+        def order_values(values: List[D]) -> List[D]:
+            if not randomize:
+                return values
+            return [value for _, value in sorted(enumerate(values),
+                                                 key=lambda pair: pair[0] + rng.random() * value_noise)]
+
+        def update_degrees(variable: V, change: int) -> None:
+            for neighbor in neighbors[variable]:
+                unassigned_degree[neighbor] += change
+            push_candidates(neighbors[variable])
+
+        # With backjumping, the conflict set of the last variable whose values were exhausted.
+        failed_conflict_set: Set[V] = set()
+
+        def backtracking_search_recursive() -> Optional[Dict[V, D]]:
+            nonlocal failed_conflict_set, failures, aborted
 
-        # Backtracking with forward checking enabled
-        def backtracking_search_fc(domains, assignment: Dict[V, D] = {}) -> Optional[Dict[V, D]]:
             # Assignment is complete if every variable is assigned (our base case)
-            if len(assignment) == len(self.variables):
+            if len(trail) == len(self.variables):
                 return assignment
 
-            # Get all variables in the CSP but not in the assignment
-            unassigned: List[V] = [v for v in self.variables if v not in assignment]
-
-            # Get the every possible domain value of the first unassigned variable
-            first: V = unassigned[0]
-            for value in domains[first]:
+            # Get the every possible domain value of the next unassigned variable.
+            # With propagation, values already pruned from the domain are skipped.
+            first: V = select_unassigned_variable()
+            values = order_values(engine.domains[first] if engine is not None else self.domains[first])
+            trail.append(first)
+            # Assigned variables responsible for rejecting the values of this variable.
+            conflict_set: Set[V] = set()
+            for value in values:
                 # Error case: the backtracking search could not find a solution in the given amount of time
-                if stop_event.isSet():
+                if stop_event.is_set():
                     result_object["schedule"] = None
                     result_object["message"] = "Error: Timeout during course scheduling. Please relax the constraints " \
                                                "or add more professor and timeslot availability. "
                     return None
-                local_assignment = assignment.copy()
-                local_assignment[first] = value
+                # The failure limit for this attempt has been reached, so give up and restart.
+                if failure_limit is not None and failures > failure_limit:
+                    aborted = True
+                    return None
+                if nogoods is not None:
+                    nogood = nogoods.find(first, value, assignment)
+                    if nogood is not None:
+                        conflict_set.update(variable for variable, _ in nogood if variable != first)
+                        continue
+                assignment[first] = value
+                self.assign(first, value)
+                culprits = self.conflicts(first, assignment) if backjumping else None
                 # If we're still consistent, we recurse (continue)
-                if self.consistent(first, local_assignment):
-                    domains_copy = {k: v.copy() for (k, v) in domains.items()}
-                    # For each neighbor of the current variable:
-                    for neighbor in variable_conflict_set[first]:
-                        # For each value in the neighbor's domain:
-                        for value_ in domains_copy[neighbor]:
-                            local_assignment_copy = local_assignment.copy()
-                            local_assignment_copy[neighbor] = value_
-                            # If not consistent:
-                            if not self.consistent(neighbor, local_assignment_copy):
-                                # Remove value from neighbor's domain.
-                                del domains_copy[neighbor][value_]
-                            # If neighbor's domain is now empty:
-                            if len(domains_copy[neighbor]) <= 0:
-                                # Backtrack
+                if culprits is None and (backjumping or self.consistent(first, assignment)):
+                    mark = engine.mark() if engine is not None else 0
+                    if engine is None or engine.propagate(first):
+                        if dynamic_ordering:
+                            push_candidates(pruned_since(mark))
+                            update_degrees(first, -1)
+                        result_: Optional[Dict[V, D]] = backtracking_search_recursive()
+                        # If we didn't find the result, we will end up backtracking
+                        if result_ is not None:
+                            return result_
+                        if stop_event.is_set() or aborted:
+                            return None
+                        if dynamic_ordering:
+                            update_degrees(first, 1)
+                        if backjumping:
+                            if first not in failed_conflict_set:
+                                # This variable did not cause the failure below, so jump back over it.
+                                if engine is not None:
+                                    undo_propagation(mark)
+                                self.unassign(first, value)
+                                del assignment[first]
+                                trail.pop()
+                                if dynamic_ordering:
+                                    push_candidates([first])
                                 return None
-
-                    result_: Optional[Dict[V, D]] = backtracking_search_fc(domains=domains_copy,
-                                                                           assignment=local_assignment)
-                    # If we didn't find the result, we will end up backtracking
-                    if result_ is not None:
-                        return result_
+                            conflict_set.update(failed_conflict_set)
+                    elif backjumping:
+                        # Propagation wiped out the domain of another variable.
+                        conflict_set.update(engine.reasons.get(engine.wiped_out, ()))
+                    if engine is not None:
+                        undo_propagation(mark)
+                elif backjumping:
+                    conflict_set.update(culprits)
+                self.unassign(first, value)
+                del assignment[first]
+                failures += 1
+            trail.pop()
+            if dynamic_ordering:
+                push_candidates([first])
+            if backjumping:
+                # Values pruned from this variable's domain before it was chosen are blamed on their causes as well.
+                if engine is not None:
+                    conflict_set.update(engine.reasons.get(first, ()))
+                conflict_set.discard(first)
+                failed_conflict_set = conflict_set
+                if conflict_set:
+                    nogoods.add({variable: assignment[variable] for variable in conflict_set})
             return None
 
-        if config["forward_checking"]:
-            domains_initial = self.domains.copy()
-            result = backtracking_search_fc(domains=domains_initial)
-        else:
+        attempt = 0
+        while True:
+            # Error case: some variable has no consistent value at all.
+            if not start_attempt():
+                return None
+            if restarts == "luby":
+                failure_limit = restart_base * luby(attempt + 1)
+            elif restarts == "geometric":
+                failure_limit = int(min(restart_base * restart_factor ** attempt, sys.maxsize))
             result = backtracking_search_recursive()
-        return result
+            # Without hitting the failure limit, the attempt either found a solution or proved there is none.
+            if result is not None or not aborted:
+                return result
+            attempt += 1
+            randomize = True
+            log_message("Restarting search (attempt " + str(attempt + 1) + ")")
+
+    # Solve the CSP with the solver selected by config["solver"]: "backtracking" (the default) or "min_conflicts".
+    # If min-conflicts search fails to find a solution, backtracking search is run instead unless
+    # config["fallback"] is False.
+    def solve(self, config=None, stop_event=None, result_object=None) -> Optional[Dict[V, D]]:
+        solver = config.get("solver", "backtracking")
+        if solver == "min_conflicts":
+            solution = self.min_conflicts_search(config=config, stop_event=stop_event, result_object=result_object)
+            if solution is not None or stop_event.is_set() or not config.get("fallback", True):
+                return solution
+            log_message("Min-conflicts search failed, falling back to backtracking search")
+        elif solver != "backtracking":
+            raise ValueError("Unknown solver: " + str(solver))
+        return self.backtracking_search(config=config, stop_event=stop_event, result_object=result_object)
+
+    # Number of constraints of the variable violated if it is given the value. The assignment is left unchanged.
+    def count_conflicts(self, variable: V, value: D, assignment: Dict[V, D]) -> int:
+        old_value = assignment[variable]
+        if value != old_value:
+            self.set_value(assignment, variable, value)
+        count = 0
+        for constraint in self.constraints[variable]:
+            if not constraint.satisfied(variable, assignment):
+                count += 1
+        if value != old_value:
+            self.set_value(assignment, variable, old_value)
+        return count
+
+    # Min-conflicts local search: starting from a greedy complete assignment, repeatedly pick a random conflicted
+    # variable and give it the value violating the fewest of its constraints (ties broken randomly, preferring a
+    # change of value so that plateaus are crossed). With probability walk_probability a random value is chosen
+    # instead, and after plateau_limit steps without reducing the number of conflicts perturbation_size random
+    # variables are reassigned at random. Returns None if no solution is found within max_steps.
+    @releasing_constraints
+    def min_conflicts_search(self, config=None, stop_event=None, result_object=None) -> Optional[Dict[V, D]]:
+        rng = random.Random(config.get("seed"))
+        walk_probability = config.get("walk_probability", 0.02)
+        plateau_limit = config.get("plateau_limit", 100)
+        perturbation_size = config.get("perturbation_size", 3)
+        neighbors = self.neighbors()
+        domain_lists = {variable: list(self.domains[variable]) for variable in self.variables}
+        if any(len(domain) == 0 for domain in domain_lists.values()):
+            log_message("Min-conflicts search failed: a variable has an empty domain")
+            return None
+
+        # Greedy initial assignment, each variable taking the value with the fewest conflicts so far.
+        assignment: Dict[V, D] = {}
+        self.reset_constraints(assignment)
+        for variable in self.variables:
+            best_values = []
+            best_count = None
+            for value in domain_lists[variable]:
+                assignment[variable] = value
+                self.assign(variable, value)
+                count = sum(1 for constraint in self.constraints[variable]
+                            if not constraint.satisfied(variable, assignment))
+                self.unassign(variable, value)
+                if best_count is None or count < best_count:
+                    best_values = [value]
+                    best_count = count
+                elif count == best_count:
+                    best_values.append(value)
+            assignment[variable] = rng.choice(best_values)
+            self.assign(variable, assignment[variable])
+
+        # Number of violated constraints per variable, and the variables with at least one.
+        conflict_counts = {variable: self.count_conflicts(variable, assignment[variable], assignment)
+                           for variable in self.variables}
+        conflicted: Dict[V, None] = {variable: None for variable, count in conflict_counts.items() if count > 0}
+        total_conflicts = sum(conflict_counts.values())
+        best_total = total_conflicts
+        steps_without_improvement = 0
+
+        def change(variable: V, value: D) -> None:
+            nonlocal total_conflicts
+            self.set_value(assignment, variable, value)
+            for other in [variable] + neighbors[variable]:
+                count = self.count_conflicts(other, assignment[other], assignment)
+                total_conflicts += count - conflict_counts[other]
+                conflict_counts[other] = count
+                if count > 0:
+                    conflicted[other] = None
+                else:
+                    conflicted.pop(other, None)
+
+        for step in range(config["max_steps"]):
+            if stop_event.is_set():
+                result_object["schedule"] = None
+                result_object["message"] = "Error: Timeout during course scheduling. Please relax the constraints " \
+                                           "or add more professor and timeslot availability. "
+                return None
+            if not conflicted:
+                log_message("Min-conflicts search found a solution on step " + str(step))
+                return assignment
+
+            variable = rng.choice(list(conflicted))
+            current_value = assignment[variable]
+            if rng.random() < walk_probability:
+                value = rng.choice(domain_lists[variable])
+            else:
+                best_values = []
+                best_count = None
+                for candidate in domain_lists[variable]:
+                    count = self.count_conflicts(variable, candidate, assignment)
+                    if best_count is None or count < best_count:
+                        best_values = [candidate]
+                        best_count = count
+                    elif count == best_count:
+                        best_values.append(candidate)
+                if len(best_values) > 1 and current_value in best_values:
+                    best_values.remove(current_value)
+                value = rng.choice(best_values)
+            if value != current_value:
+                change(variable, value)
+
+            if total_conflicts < best_total:
+                best_total = total_conflicts
+                steps_without_improvement = 0
+            else:
+                steps_without_improvement += 1
+            # Escape the plateau by reassigning a few random variables.
+            if steps_without_improvement >= plateau_limit:
+                for other in rng.sample(self.variables, min(perturbation_size, len(self.variables))):
+                    change(other, rng.choice(domain_lists[other]))
+                best_total = total_conflicts
+                steps_without_improvement = 0
+
+        if not conflicted:
+            return assignment
+        log_message("Min-conflicts search failed: " + str(len(conflicted)) + " variables still in conflict after " +
+                    str(config["max_steps"]) + " steps")
+        return None
+
+    # Warm start: repair a previous assignment (hint: variable -> value) instead of solving from scratch.
+    # The hinted values are kept, in the order of the variables, as long as they are consistent with the ones kept
+    # before them. The variables left over (dropped or without a hint) are then solved with backtracking_search while
+    # every other variable keeps its value. If that fails, the neighbourhood is widened to the variables sharing a
+    # constraint with the free ones, up to config["max_radius"] times (default 2). Free variables try their hinted
+    # value first, so as few values as possible change.
+    # Returns (solution, the variables whose value differs from their hint), or None if no repair was found.
+    @releasing_constraints
+    def repair(self, hint, config=None, stop_event=None, result_object=None) -> Optional[Tuple[Dict[V, D], List[V]]]:
+        config = config if config is not None else {}
+        assignment: Dict[V, D] = {}
+        self.reset_constraints(assignment)
+        free: Set[V] = set()
+        for variable in self.variables:
+            value = hint.get(variable)
+            if value is not None and value in self.domains[variable]:
+                assignment[variable] = value
+                self.assign(variable, value)
+                if self.consistent(variable, assignment):
+                    continue
+                self.unassign(variable, value)
+                del assignment[variable]
+            free.add(variable)
+        self.release_constraints()
+        if not free:
+            return assignment, []
+        log_message("Repairing " + str(len(free)) + " of " + str(len(self.variables)) + " variables")
+
+        domains = self.domains
+        neighbors = self.neighbors()
+        try:
+            for radius in range(config.get("max_radius", 2) + 1):
+                if radius > 0:
+                    widened = free.union(*(neighbors[variable] for variable in free))
+                    if len(widened) == len(free):
+                        break
+                    free = widened
+                    for variable in free:
+                        assignment.pop(variable, None)
+                self.domains = {}
+                for variable in self.variables:
+                    if variable not in free:
+                        self.domains[variable] = [assignment[variable]]
+                    elif hint.get(variable) in domains[variable]:
+                        self.domains[variable] = [hint[variable]] + [value for value in domains[variable]
+                                                                     if value != hint[variable]]
+                    else:
+                        self.domains[variable] = domains[variable]
+                solution = self.backtracking_search(config=config, stop_event=stop_event,
+                                                    result_object=result_object)
+                if solution is not None:
+                    return solution, [variable for variable in self.variables
+                                      if solution[variable] != hint.get(variable)]
+                if stop_event is not None and stop_event.is_set():
+                    return None
+        finally:
+            self.domains = domains
+        return None
+
+    # Branch and bound: a depth-first search (with forward checking, MRV and the values tried in decreasing order of
+    # score) for the assignment maximizing the sum of the soft constraints' value_scores, which must all be defined.
+    # A partial assignment is bounded by its score plus the best score each unassigned variable can still get from
+    # its remaining domain, an admissible bound, and subtrees whose bound does not beat the incumbent by more than
+    # the optimality gap are pruned. initial_assignment: optional solution used as the first incumbent.
+    # config:
+    #   "gap": relative optimality gap; the result is within gap * |score| of the optimum (0 for an optimal result)
+    #   "time_limit": seconds after which the search stops (None for no limit)
+    # When the time limit is reached or the stop_event is set, the incumbent is returned. The proven upper bound on
+    # the optimal score is stored in result_object["upper_bound"].
+    @releasing_constraints
+    def branch_and_bound(self, initial_assignment=None, config=None, stop_event=None,
+                         result_object=None) -> Optional[Dict[V, D]]:
+        config = config if config is not None else {}
+        gap = config.get("gap", 0)
+        time_limit = config.get("time_limit")
+        deadline = None if time_limit is None else time.time() + time_limit
+
+        # Score of each value of each variable, and the values ordered by decreasing score.
+        value_scores: Dict[V, Dict[D, float]] = {}
+        ordered_values: Dict[V, List[D]] = {}
+        for variable in self.variables:
+            scores = {}
+            for value in self.domains[variable]:
+                score = 0
+                for soft_constraint in self.soft_constraints[variable]:
+                    value_score = soft_constraint.value_score(variable, value)
+                    if value_score is None:
+                        raise ValueError("Branch and bound requires soft constraints with value scores")
+                    score += value_score
+                scores[value] = score
+            value_scores[variable] = scores
+            ordered_values[variable] = sorted(self.domains[variable], key=lambda value_: -scores[value_])
+
+        def total_score(assignment_) -> float:
+            return sum(value_scores[variable_][value_] for variable_, value_ in assignment_.items())
+
+        incumbent = None
+        incumbent_score = -math.inf
+        if initial_assignment is not None:
+            incumbent = dict(initial_assignment)
+            incumbent_score = total_score(incumbent)
+
+        def prune_below() -> float:
+            return incumbent_score + max(1e-9, gap * abs(incumbent_score))
+
+        assignment: Dict[V, D] = {}
+        self.reset_constraints(assignment)
+        engine = PropagationEngine(self, assignment, self.neighbors(), "forward_checking")
+        feasible = engine.initialize()
+
+        # Best score each variable can get from its current domain, cached per domain: the engine replaces the
+        # domains it prunes, and keeping the domain in the cache keeps its id from being reused.
+        best_scores: Dict[int, Tuple[List[D], float]] = {}
+
+        def best_score(variable_) -> float:
+            domain = engine.domains[variable_]
+            cached = best_scores.get(id(domain))
+            if cached is None:
+                scores_ = value_scores[variable_]
+                cached = (domain, max((scores_[value_] for value_ in domain), default=-math.inf))
+                best_scores[id(domain)] = cached
+            return cached[1]
+
+        # Each frame of the search: [variable, values in decreasing order of score, index of the next value, current
+        # value (None if not assigned), propagation mark, score of the assignment above the frame, best score of the
+        # other unassigned variables].
+        stack = []
+
+        def push_frame(assigned_score_) -> None:
+            unassigned = [variable_ for variable_ in self.variables if variable_ not in assignment]
+            variable_ = min(unassigned, key=lambda variable__: len(engine.domains[variable__]))
+            domain = set(engine.domains[variable_])
+            values = [value_ for value_ in ordered_values[variable_] if value_ in domain]
+            rest = sum(best_score(other) for other in unassigned if other != variable_)
+            stack.append([variable_, values, 0, None, None, assigned_score_, rest])
+
+        stopped = False
+        if feasible and self.variables:
+            push_frame(0)
+        elif feasible:
+            incumbent, incumbent_score = {}, 0
+        while stack:
+            if (stop_event is not None and stop_event.is_set()) or (deadline is not None and time.time() >= deadline):
+                stopped = True
+                break
+            frame = stack[-1]
+            variable, values, index, current_value, mark, frame_score, rest = frame
+            if current_value is not None:
+                del assignment[variable]
+                self.unassign(variable, current_value)
+                engine.undo(mark)
+                frame[3] = None
+            # The values are in decreasing order of score, so once a value's bound is too low, so are the others'.
+            if index >= len(values) or frame_score + value_scores[variable][values[index]] + rest <= prune_below():
+                stack.pop()
+                continue
+            value = values[index]
+            frame[2] = index + 1
+
+            assignment[variable] = value
+            self.assign(variable, value)
+            mark = engine.mark()
+            if not self.consistent(variable, assignment) or not engine.propagate(variable):
+                engine.undo(mark)
+                self.unassign(variable, value)
+                del assignment[variable]
+                continue
+            frame[3] = value
+            frame[4] = mark
+            assigned_score = frame_score + value_scores[variable][value]
+
+            if len(assignment) == len(self.variables):
+                incumbent = dict(assignment)
+                incumbent_score = assigned_score
+                log_message("Branch and bound found a solution with score " + str(incumbent_score))
+            else:
+                push_frame(assigned_score)
 
+        # Unless the search was stopped, every assignment it did not visit is within the gap of the incumbent.
+        # Otherwise, the unvisited assignments are bounded by the bounds of the values each frame has left to try
+        # (including its current one).
+        upper_bound = incumbent_score + gap * abs(incumbent_score)
+        if stopped:
+            upper_bound = incumbent_score
+            for variable, values, index, current_value, _, frame_score, rest in stack:
+                start = index - 1 if current_value is not None else index
+                if start < len(values):
+                    upper_bound = max(upper_bound, frame_score + value_scores[variable][values[start]] + rest)
+            log_message("Branch and bound stopped with score " + str(incumbent_score) + ", upper bound " +
+                        str(upper_bound))
+        if result_object is not None:
+            result_object["upper_bound"] = upper_bound if incumbent is not None else None
+            if incumbent is None and stopped:
+                result_object["schedule"] = None
+                result_object["message"] = "Error: Timeout during course scheduling. Please relax the constraints " \
+                                           "or add more professor and timeslot availability. "
+        return incumbent
+
+    # Union of the values the variable cannot take according to its constraints (see Constraint.infeasible_values),
+    # or None if one of them does not support the vectorized check.
+    def infeasible_values(self, variable: V, assignment: Dict[V, D]) -> Optional[Set[D]]:
+        infeasible: Set[D] = set()
+        for constraint in self.constraints[variable]:
+            values = constraint.infeasible_values(variable, assignment)
+            if values is None:
+                return None
+            infeasible.update(values)
+        return infeasible
+
+    # Sum of the soft constraints' score_deltas for each of the values (a NumPy array if NumPy is available).
+    def score_deltas(self, assignment: Dict[V, D], variable: V, values: List[D]):
+        if numpy is not None:
+            deltas = numpy.zeros(len(values))
+            for soft_constraint in self.soft_constraints[variable]:
+                deltas += soft_constraint.score_deltas(assignment, variable, values)
+            return deltas
+        deltas = [0] * len(values)
+        for soft_constraint in self.soft_constraints[variable]:
+            deltas = [delta + other for delta, other in
+                      zip(deltas, soft_constraint.score_deltas(assignment, variable, values))]
+        return deltas
+
+    @releasing_constraints
     def optimize(self, initial_assignment, config=None, stop_event=None, result_object=None) -> Optional[Dict[V, D]]:
-        # Determines quality of an assignment of a value to a variable.
+        # Select the optimizer: greedy hill climbing (the default), simulated annealing or tabu search.
+        method = config.get("method", "hill_climbing")
+        if method == "simulated_annealing":
+            return self.optimize_annealing(initial_assignment, config, stop_event, result_object)
+        if method == "tabu":
+            return self.optimize_tabu(initial_assignment, config, stop_event, result_object)
+        if method != "hill_climbing":
+            raise ValueError("Unknown optimization method: " + str(method))
+
+        # Determines the change in quality of the assignment if the variable is given the value.
         # Higher quality assignments are those violating fewer soft constraints.
-        # Assignment violating any hard constraints have a quality score of 0 (the lowest possible score).
-        def compute_quality(variable_, assignment):
-            # Verify that no hard constraints are violated.
-            for constraint in self.constraints[variable_]:
-                if not constraint.satisfied(variable_, assignment):
-                    return 0
-            # Determine quality of the assignment.
-            quality_ = 0
-            for soft_constraint in self.soft_constraints[variable_]:
-                quality_ += soft_constraint.satisfaction_score(assignment, variable_)
-            return quality_
+        # Values violating any hard constraints are never chosen (None is returned).
+        # The soft constraints are evaluated incrementally (see SoftConstraint.score_delta), and the assignment is
+        # modified in place and restored rather than copied.
+        def compute_quality_delta(variable_, value_, assignment) -> Optional[float]:
+            old_value = assignment[variable_]
+            assignment[variable_] = value_
+            self.assign(variable_, value_)
+            consistent = self.consistent(variable_, assignment)
+            self.unassign(variable_, value_)
+            assignment[variable_] = old_value
+            if not consistent:
+                return None
+            return sum(soft_constraint.score_delta(assignment, variable_, value_)
+                       for soft_constraint in self.soft_constraints[variable_])
+
+        # Vectorized evaluation: with every constraint of the variable supporting it, all values are checked and
+        # scored at once (see Constraint.infeasible_values and SoftConstraint.score_deltas), and the first value
+        # with the highest quality is selected, as in the value by value evaluation.
+        vectorized = config.get("vectorized", True)
+        # NumPy arrays of the domains, built on first use.
+        value_arrays = {}
+
+        # With NumPy, the whole domain is scored and the infeasible values are masked out afterwards, otherwise
+        # only the feasible values are scored.
+        def select_best_value(variable_, infeasible, current_value_) -> Optional[D]:
+            values = domain_lists[variable_]
+            if numpy is not None:
+                value_array = value_arrays.get(variable_)
+                if value_array is None:
+                    value_array = numpy.array(values)
+                    value_arrays[variable_] = value_array
+                feasible = value_array != current_value_
+                if infeasible:
+                    feasible &= ~numpy.isin(value_array, list(infeasible))
+                candidates = numpy.where(feasible, self.score_deltas(current, variable_, values), -numpy.inf)
+                index = int(numpy.argmax(candidates))
+                return values[index] if candidates[index] > 1e-9 else None
+            values = [value_ for value_ in values if value_ != current_value_ and value_ not in infeasible]
+            best_value_ = None
+            best_delta_ = 1e-9
+            for value_, delta in zip(values, self.score_deltas(current, variable_, values)):
+                if delta > best_delta_:
+                    best_value_ = value_
+                    best_delta_ = delta
+            return best_value_
 
         # Loop for a number of times modifying the assignment each time until a max threshold of steps is reached.
+        # With config["variables"], only those variables are changed (e.g. the ones repaired by CSP.repair).
+        # The variables are chosen with config["seed"], so that the same seed gives the same assignment.
+        rng = random.Random(config.get("seed"))
         current = initial_assignment
+        variables = list(config.get("variables") or current.keys())
+        domain_lists = {variable: list(self.domains[variable]) for variable in variables}
+        self.reset_constraints(current)
+        for soft_constraint in self.soft_constraint_list:
+            soft_constraint.reset(current)
         for it in range(config["max_steps"]):
-            if stop_event.isSet():
+            if stop_event.is_set():
                 result_object["schedule"] = None
                 result_object["message"] = "Error: Timeout during course scheduling. Please relax the constraints " \
                                            "or add more professor and timeslot availability. "
                 return None
 
             # Choose a variable at random.
-            var = random.choice(list(current.keys()))
+            var = rng.choice(variables)
 
             # For the current variable, find the highest-quality value.
-            initial_quality = compute_quality(var, current)
+            # Improvements smaller than the floating point error of the incremental scores are ignored.
             best_value = None
-            best_quality = initial_quality
-            for value in self.domains[var]:
-                assignment_copy = current.copy()
-                assignment_copy[var] = value
-                quality = compute_quality(var, assignment_copy)
-                if quality > best_quality:
-                    best_value = value
-                    best_quality = quality
+            best_delta = 1e-9
+            current_value = current[var]
+            self.unassign(var, current_value)
+            infeasible = self.infeasible_values(var, current) if vectorized else None
+            if infeasible is not None:
+                best_value = select_best_value(var, infeasible, current_value)
+            else:
+                for value in self.domains[var]:
+                    if value == current_value:
+                        continue
+                    delta = compute_quality_delta(var, value, current)
+                    if delta is not None and delta > best_delta:
+                        best_value = value
+                        best_delta = delta
 
             # If a value was found producing an assignment of higher quality, assign it to the variable.
-            if best_quality > initial_quality:
+            if best_value is not None:
                 log_message("optimization found on iteration " + str(it))
                 current[var] = best_value
+                for soft_constraint in self.soft_constraints[var]:
+                    soft_constraint.commit(current, var, current_value, best_value)
+            self.assign(var, current[var])
         return current
+
+    # Change the value of an assigned variable, keeping the hard constraint state up to date.
+    def set_value(self, assignment: Dict[V, D], variable: V, value: D) -> None:
+        self.unassign(variable, assignment[variable])
+        assignment[variable] = value
+        self.assign(variable, value)
+
+    # Same as set_value, also keeping the soft constraint state up to date.
+    def change_value(self, assignment: Dict[V, D], variable: V, value: D) -> None:
+        old_value = assignment[variable]
+        self.set_value(assignment, variable, value)
+        for soft_constraint in self.soft_constraints[variable]:
+            soft_constraint.commit(assignment, variable, old_value, value)
+
+    # Determines the change in quality of the assignment if the move, a list of (variable, new value) changes,
+    # were applied. Returns None if the resulting assignment would violate a hard constraint.
+    # The assignment is left unchanged.
+    def evaluate_move(self, assignment: Dict[V, D], move: List[Tuple[V, D]]) -> Optional[float]:
+        old_values = [(variable, assignment[variable]) for variable, _ in move]
+        for variable, value in move:
+            self.set_value(assignment, variable, value)
+        consistent = all(self.consistent(variable, assignment) for variable, _ in move)
+        for variable, old_value in reversed(old_values):
+            self.set_value(assignment, variable, old_value)
+        if not consistent:
+            return None
+
+        # The soft constraints are only evaluated on feasible assignments.
+        delta = 0
+        for variable, value in move:
+            for soft_constraint in self.soft_constraints[variable]:
+                delta += soft_constraint.score_delta(assignment, variable, value)
+            self.change_value(assignment, variable, value)
+        for variable, old_value in reversed(old_values):
+            self.change_value(assignment, variable, old_value)
+        return delta
+
+    # Choose a random move: give a random variable another value from its domain or, with the given probability,
+    # swap the values of two variables (e.g. exchange two courses between professors, which keeps their loads).
+    # holders maps each value to the variables currently assigned it. Returns None if no move was found.
+    def random_move(self, assignment: Dict[V, D], variables: List[V], holders: Dict[D, Dict[V, None]],
+                    domain_lists: Dict[V, List[D]], rng: random.Random,
+                    swap_probability: float) -> Optional[List[Tuple[V, D]]]:
+        variable = rng.choice(variables)
+        value = rng.choice(domain_lists[variable])
+        old_value = assignment[variable]
+        if value == old_value:
+            return None
+        if rng.random() < swap_probability:
+            others = [other for other in holders.get(value, {}) if old_value in self.domains[other]]
+            if others:
+                return [(variable, value), (rng.choice(others), old_value)]
+        return [(variable, value)]
+
+    # Set up the shared state of the local search optimizers.
+    def start_local_search(self, assignment: Dict[V, D]):
+        self.reset_constraints(assignment)
+        for soft_constraint in self.soft_constraint_list:
+            soft_constraint.reset(assignment)
+        holders: Dict[D, Dict[V, None]] = {}
+        for variable, value in assignment.items():
+            holders.setdefault(value, {})[variable] = None
+        domain_lists = {variable: list(self.domains[variable]) for variable in assignment}
+        return holders, domain_lists
+
+    def apply_move(self, assignment: Dict[V, D], move: List[Tuple[V, D]], holders: Dict[D, Dict[V, None]]) -> None:
+        for variable, value in move:
+            del holders[assignment[variable]][variable]
+            holders.setdefault(value, {})[variable] = None
+            self.change_value(assignment, variable, value)
+
+    # Simulated annealing with single-variable and swap moves.
+    # Worse moves are accepted with probability exp(delta / temperature), and the temperature is multiplied by
+    # cooling_rate after every step. The best assignment found is returned.
+    def optimize_annealing(self, initial_assignment, config, stop_event=None,
+                           result_object=None) -> Optional[Dict[V, D]]:
+        rng = random.Random(config.get("seed"))
+        temperature = config.get("initial_temperature", 0.01)
+        cooling_rate = config.get("cooling_rate", 0.995)
+        min_temperature = config.get("min_temperature", 1e-6)
+        swap_probability = config.get("swap_probability", 0.3)
+
+        current = initial_assignment
+        variables = list(current.keys())
+        holders, domain_lists = self.start_local_search(current)
+        current_score = 0
+        best = dict(current)
+        best_score = 0
+        for it in range(config["max_steps"]):
+            if stop_event.is_set():
+                result_object["schedule"] = None
+                result_object["message"] = "Error: Timeout during course scheduling. Please relax the constraints " \
+                                           "or add more professor and timeslot availability. "
+                return None
+
+            temperature = max(temperature * cooling_rate, min_temperature)
+            move = self.random_move(current, variables, holders, domain_lists, rng, swap_probability)
+            if move is None:
+                continue
+            delta = self.evaluate_move(current, move)
+            if delta is None:
+                continue
+            if delta >= 0 or rng.random() < math.exp(delta / temperature):
+                self.apply_move(current, move, holders)
+                current_score += delta
+                if current_score > best_score + 1e-9:
+                    log_message("optimization found on iteration " + str(it))
+                    best = dict(current)
+                    best_score = current_score
+        return best
+
+    # Tabu search with single-variable and swap moves.
+    # Each step samples neighborhood_size random moves and applies the best one, even if it is worse, unless it gives
+    # a variable back a value it had in the last tabu_tenure steps (allowed only if it beats the best found so far).
+    # The best assignment found is returned.
+    def optimize_tabu(self, initial_assignment, config, stop_event=None, result_object=None) -> Optional[Dict[V, D]]:
+        rng = random.Random(config.get("seed"))
+        tabu_tenure = config.get("tabu_tenure", 10)
+        neighborhood_size = config.get("neighborhood_size", 20)
+        swap_probability = config.get("swap_probability", 0.3)
+
+        current = initial_assignment
+        variables = list(current.keys())
+        holders, domain_lists = self.start_local_search(current)
+        # (variable, value) -> the step until which giving the variable that value again is forbidden.
+        tabu: Dict[Tuple[V, D], int] = {}
+        current_score = 0
+        best = dict(current)
+        best_score = 0
+        for it in range(config["max_steps"]):
+            if stop_event.is_set():
+                result_object["schedule"] = None
+                result_object["message"] = "Error: Timeout during course scheduling. Please relax the constraints " \
+                                           "or add more professor and timeslot availability. "
+                return None
+
+            best_move = None
+            best_delta = None
+            for _ in range(neighborhood_size):
+                move = self.random_move(current, variables, holders, domain_lists, rng, swap_probability)
+                if move is None:
+                    continue
+                delta = self.evaluate_move(current, move)
+                if delta is None:
+                    continue
+                is_tabu = any(tabu.get((variable, value), -1) > it for variable, value in move)
+                if is_tabu and current_score + delta <= best_score + 1e-9:
+                    continue
+                if best_delta is None or delta > best_delta:
+                    best_move = move
+                    best_delta = delta
+
+            if best_move is None:
+                continue
+            for variable, _ in best_move:
+                tabu[(variable, current[variable])] = it + tabu_tenure
+            self.apply_move(current, best_move, holders)
+            current_score += best_delta
+            if current_score > best_score + 1e-9:
+                log_message("optimization found on iteration " + str(it))
+                best = dict(current)
+                best_score = current_score
+        return best
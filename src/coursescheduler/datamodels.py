@@ -1,8 +1,18 @@
-import datetime
+from collections import namedtuple
+from functools import lru_cache
 
 
 # This function transforms the input data into data which is optimal for use in the algorithm.
 def transform_input(schedule_input, professors_input):
+    courses = transform_schedule(schedule_input)
+    professors = transform_professors(professors_input)
+    add_qualified_professors(courses, professors)
+    return courses, professors
+
+
+# The courses of the schedule, as used by the algorithm (see transform_input). They only depend on the schedule, so
+# the courses of a schedule can be reused with different professors, each time on a copy (see copy_courses).
+def transform_schedule(schedule_input):
     courses = {
         "fall": {},
         "spring": {},
@@ -33,7 +43,18 @@ def transform_input(schedule_input, professors_input):
                         "timeSlots": section["timeSlots"] if section["timeSlots"] is not None else [],
                         # "academicYear": course["academicYear"] # Unsure of redundancy with yearRequired
                     }
+    return courses
+
+
+# Copy of transformed courses, which the algorithm can assign professors and timeslots to without changing the
+# original ones.
+def copy_courses(courses):
+    return {semester: {course: dict(course_data) for course, course_data in semester_courses.items()}
+            for semester, semester_courses in courses.items()}
+
 
+# The professors as used by the algorithm (see transform_input), by ID.
+def transform_professors(professors_input):
     professors = {}
     for professor in professors_input:
         sorted_course_prefs = sorted(professor["coursePreferences"], key=lambda d: d['enthusiasmScore'], reverse=True)
@@ -48,7 +69,105 @@ def transform_input(schedule_input, professors_input):
             "preferredNonTeachingSemester": professor["preferredNonTeachingSemester"],
             "preferredCourseDaySpreads": professor["preferredCourseDaySpreads"]
         }
-    return courses, professors
+        enthusiasm_scores(professors[professor["id"]])
+        preferred_time_minutes(professors[professor["id"]])
+    return professors
+
+
+# Give each course of the transformed courses the professors who can be assigned to it (see transform_input).
+def add_qualified_professors(courses, professors):
+    # Index of the professors qualified for each course code (non-zero enthusiasm score),
+    # in descending order of enthusiasm score.
+    course_code_professors = {}
+    for prof_id, professor in professors.items():
+        for course_code, score in professor["enthusiasmScores"].items():
+            if score != 0:
+                course_code_professors.setdefault(course_code, []).append((prof_id, score))
+    for qualified_professors in course_code_professors.values():
+        qualified_professors.sort(reverse=True, key=lambda prof_score: prof_score[1])
+
+    # Each course gets the professors who can be assigned to it: qualified, holding a PEng if required and not on
+    # their research semester.
+    for semester, semester_courses in courses.items():
+        for course, course_data in semester_courses.items():
+            qualified_professors = []
+            for prof_id, score in course_code_professors.get(course.split("_")[0], []):
+                professor = professors[prof_id]
+                if course_data["pengRequired"] and not professor["isPeng"]:
+                    continue
+                if professor["facultyType"] == "RESEARCH" and professor["preferredNonTeachingSemester"] and \
+                        semester == professor["preferredNonTeachingSemester"].lower():
+                    continue
+                qualified_professors.append((prof_id, score))
+            course_data["qualifiedProfessors"] = qualified_professors
+
+
+# The professor's enthusiasm score for each course code, as a dictionary (set up by transform_input).
+# Professor data that did not go through transform_input gets it built on first use.
+def enthusiasm_scores(professor):
+    scores = professor.get("enthusiasmScores")
+    if scores is None:
+        scores = {}
+        for course_preferences in professor["qualifiedCoursePreferences"]:
+            course_code = course_preferences["courseCode"]
+            scores[course_code] = scores.get(course_code, 0) + course_preferences["enthusiasmScore"]
+        professor["enthusiasmScores"] = scores
+    return scores
+
+
+# The professor's preferred times with the "HH:MM" strings parsed into minutes since midnight
+# (set up by transform_input): semester -> None or {day -> None or [(start, end), ...]}.
+# Professor data that did not go through transform_input gets it built on first use.
+def preferred_time_minutes(professor):
+    preferred_times = professor.get("preferredTimeMinutes")
+    if preferred_times is None:
+        preferred_times = {}
+        for semester, days in professor["preferredTimes"].items():
+            if days is None:
+                preferred_times[semester] = None
+                continue
+            preferred_times[semester] = {
+                day: None if time_ranges is None else
+                [(time_string_to_minutes(time_range[0]), time_string_to_minutes(time_range[1]))
+                 for time_range in time_ranges]
+                for day, time_ranges in days.items()}
+        professor["preferredTimeMinutes"] = preferred_times
+    return preferred_times
+
+
+# The professor and timeslots of each course of the schedule input in a previous output schedule, used as hints to
+# repair the previous schedule rather than generate a new one. Courses are named as in transform_input, and matched
+# to the previous output by semester, course code and section index.
+# Returns {course: {"professor": id or None, "timeSlots": ((day, start, end), ...) in minutes, or None}}.
+def previous_assignments(schedule_input, previous_schedule):
+    previous_sections = {}
+    for semester, offering_list in previous_schedule.items():
+        for offering in offering_list:
+            previous_sections[(semester, offering["course"]["code"])] = offering["sections"]
+
+    hints = {}
+    for semester, offering_list in schedule_input.items():
+        for offering in offering_list:
+            course = offering["course"]
+            sections = previous_sections.get((semester, course["code"]), [])
+            for index, section in enumerate(offering["sections"]):
+                if index >= len(sections):
+                    continue
+                if section["professor"] is None and len(section["timeSlots"]) <= 0:
+                    course_id = course["code"] + "_" + semester
+                else:
+                    course_id = course["code"] + "_" + semester + "_" + str(index)
+                previous_section = sections[index]
+                timeslots = None
+                if previous_section["timeSlots"]:
+                    timeslots = tuple((timeslot["dayOfWeek"], time_string_to_minutes(timeslot["timeRange"][0]),
+                                       time_string_to_minutes(timeslot["timeRange"][1]))
+                                      for timeslot in previous_section["timeSlots"])
+                hints[course_id] = {
+                    "professor": (previous_section["professor"] or {}).get("id"),
+                    "timeSlots": timeslots
+                }
+    return hints
 
 
 # Fill in the schedule object with the output data from the algorithm
@@ -86,8 +205,8 @@ def transform_output(alg_output, schedule_input, professors):
                     output_timeslots = []
                     for timeslot in alg_output_timeslots:
                         output_timeslot = {
-                            "dayOfWeek": timeslot[0].upper(),
-                            "timeRange": (timeslot[1].strftime("%H:%M"), timeslot[2].strftime("%H:%M"))
+                            "dayOfWeek": timeslot.day,
+                            "timeRange": (timeslot.start_string, timeslot.end_string)
                         }
                         output_timeslots.append(output_timeslot)
 
@@ -97,27 +216,49 @@ def transform_output(alg_output, schedule_input, professors):
     return schedule_input
 
 
-# This function returns a dictionary containing a time slot ID and time slot configuration
+# A single day of a timeslot configuration.
+# Start and end times are stored as minutes since midnight, with the "HH:MM" output strings preformatted.
+Timeslot = namedtuple("Timeslot", ["day", "start", "end", "start_string", "end_string"])
+
+
+# Convert a "HH:MM" (or "H:MM") time string to minutes since midnight.
+def time_string_to_minutes(time_string):
+    hours, minutes = time_string.split(":")
+    return int(hours) * 60 + int(minutes)
+
+
+# Convert minutes since midnight to a "HH:MM" time string.
+def minutes_to_time_string(minutes):
+    return "%02d:%02d" % divmod(minutes, 60)
+
+
+# This function returns a dictionary containing a time slot ID and time slot configuration.
+# The catalog never changes, so it is built once per process and shared between calls. It must not be modified.
 def timeslot_determination():
+    return _timeslot_catalog()
+
+
+@lru_cache(maxsize=None)
+def _timeslot_catalog():
     count = 0
     timeslots_dict = {}
     timeslots_dict_twf = {}
     timeslots_dict_mr = {}
 
-    scheduled_start_time = datetime.datetime(100, 1, 1, 8, 30)
+    scheduled_start_time = time_string_to_minutes("8:30")
     twf_dict = scheduled_times(scheduled_start_time, 50)
     for start_time, scheduled_end_time in twf_dict.items():  # 830-320 330-920
-        timeslots_dict_twf[count] = [["TUESDAY", start_time, scheduled_end_time],
-                                     ["WEDNESDAY", start_time, scheduled_end_time],
-                                     ["FRIDAY", start_time, scheduled_end_time]]
+        timeslots_dict_twf[count] = (make_timeslot("TUESDAY", start_time, scheduled_end_time),
+                                     make_timeslot("WEDNESDAY", start_time, scheduled_end_time),
+                                     make_timeslot("FRIDAY", start_time, scheduled_end_time))
         count += 1
 
-    scheduled_start_time = datetime.datetime(100, 1, 1, 8, 30)
+    scheduled_start_time = time_string_to_minutes("8:30")
     mr_dict = scheduled_times(scheduled_start_time, 80)
 
     for start_time, scheduled_end_time in mr_dict.items():
-        timeslots_dict_mr[count] = [["MONDAY", start_time, scheduled_end_time],
-                                    ["THURSDAY", start_time, scheduled_end_time]]
+        timeslots_dict_mr[count] = (make_timeslot("MONDAY", start_time, scheduled_end_time),
+                                    make_timeslot("THURSDAY", start_time, scheduled_end_time))
         count += 1
 
     # In timeslots_dict, alternate between TWF and MR configurations.
@@ -128,36 +269,40 @@ def timeslot_determination():
         timeslots_dict[i + len(timeslots_dict_twf)] = timeslots_dict_mr[i + len(timeslots_dict_twf)]
     timeslots_dict[len(timeslots_dict_twf) - 1] = timeslots_dict_twf[len(timeslots_dict_twf) - 1]
 
-    scheduled_start_time = datetime.datetime(100, 1, 1, 13, 00)
+    scheduled_start_time = time_string_to_minutes("13:00")
     any_dict = scheduled_times(scheduled_start_time, 170)
     for start_time, scheduled_end_time in any_dict.items():
-        timeslots_dict[count] = [["MONDAY", start_time, scheduled_end_time]]
-        count += 1
-        timeslots_dict[count] = [["TUESDAY", start_time, scheduled_end_time]]
-        count += 1
-        timeslots_dict[count] = [["WEDNESDAY", start_time, scheduled_end_time]]
-        count += 1
-        timeslots_dict[count] = [["THURSDAY", start_time, scheduled_end_time]]
-        count += 1
-        timeslots_dict[count] = [["FRIDAY", start_time, scheduled_end_time]]
-        count += 1
+        for day in ["MONDAY", "TUESDAY", "WEDNESDAY", "THURSDAY", "FRIDAY"]:
+            timeslots_dict[count] = (make_timeslot(day, start_time, scheduled_end_time),)
+            count += 1
 
     return timeslots_dict
 
 
+# Returns a dictionary mapping the (day, start, end) tuples of each timeslot configuration to its timeslot ID.
+@lru_cache(maxsize=None)
+def timeslot_config_ids():
+    return {tuple(timeslot[:3] for timeslot in config): timeslot_id
+            for timeslot_id, config in _timeslot_catalog().items()}
+
+
+# Helper function for timeslot_determination
+def make_timeslot(day, start_time, end_time):
+    return Timeslot(day, start_time, end_time, minutes_to_time_string(start_time), minutes_to_time_string(end_time))
+
+
 # Helper function for timeslot_determination
+# Start times and class lengths are in minutes.
 def scheduled_times(start_time, class_length):
-    end_time = start_time + datetime.timedelta(minutes=class_length)
+    end_time = start_time + class_length
     timeslot_dict = {start_time: end_time}
-    timeslot_array = {(start_time, end_time)}
 
-    while end_time.time() < datetime.time(21, 50):
-        if start_time.time() == datetime.time(19, 00) and class_length == 170:
+    while end_time < time_string_to_minutes("21:50"):
+        if start_time == time_string_to_minutes("19:00") and class_length == 170:
             break
-        start_time += datetime.timedelta(minutes=30)
-        end_time = start_time + datetime.timedelta(minutes=class_length)
+        start_time += 30
+        end_time = start_time + class_length
 
         timeslot_dict[start_time] = end_time
-        timeslot_array.add((start_time, end_time))
 
     return timeslot_dict
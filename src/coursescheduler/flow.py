@@ -0,0 +1,129 @@
+import heapq
+from collections import deque
+from typing import List, Optional, Tuple
+
+
+################################################################
+# Minimum cost flow:
+# Successive shortest paths with Johnson potentials. The potentials start from a Bellman-Ford pass (the costs may be
+# negative), after which every shortest path is found with Dijkstra on the reduced costs. Each augmentation sends as
+# much flow as the path allows, so the runtime is polynomial in the size of the network and the amount of flow.
+class MinCostFlow:
+    def __init__(self, num_nodes: int) -> None:
+        self.num_nodes = num_nodes
+        # Edges are stored in pairs: edge i and its residual edge i ^ 1.
+        self.heads: List[int] = []
+        self.capacities: List[int] = []
+        self.costs: List[float] = []
+        self.flows: List[int] = []
+        # node -> indexes of the edges leaving it (residual edges included)
+        self.adjacency: List[List[int]] = [[] for _ in range(num_nodes)]
+
+    def add_node(self) -> int:
+        self.adjacency.append([])
+        self.num_nodes += 1
+        return self.num_nodes - 1
+
+    # Add an edge and return its index, through which its flow can be read after solving (see flow).
+    def add_edge(self, tail: int, head: int, capacity: int, cost: float) -> int:
+        index = len(self.heads)
+        for edge_head, edge_capacity, edge_cost, node in [(head, capacity, cost, tail), (tail, 0, -cost, head)]:
+            self.heads.append(edge_head)
+            self.capacities.append(edge_capacity)
+            self.costs.append(edge_cost)
+            self.flows.append(0)
+            self.adjacency[node].append(len(self.heads) - 1)
+        return index
+
+    def flow(self, edge: int) -> int:
+        return self.flows[edge]
+
+    # Send as much flow as possible (up to max_flow) from the source to the sink at the minimum cost.
+    # Returns (flow, cost), or None if the stop_event was set before the flow was complete.
+    def solve(self, source: int, sink: int, max_flow: Optional[int] = None, stop_event=None) -> Optional[Tuple]:
+        potentials = self.initial_potentials(source)
+        total_flow = 0
+        total_cost = 0
+        while max_flow is None or total_flow < max_flow:
+            if stop_event is not None and stop_event.is_set():
+                return None
+            distances, parents = self.shortest_paths(source, sink, potentials)
+            if distances[sink] is None:
+                break
+            # Nodes further than the sink (or not reached) are treated as being at the sink's distance, which keeps
+            # the reduced costs non-negative.
+            sink_distance = distances[sink]
+            for node in range(self.num_nodes):
+                distance = distances[node]
+                potentials[node] += sink_distance if distance is None or distance > sink_distance else distance
+
+            # Find the bottleneck of the path, then push the flow along it.
+            amount = None if max_flow is None else max_flow - total_flow
+            node = sink
+            while node != source:
+                edge = parents[node]
+                residual = self.capacities[edge] - self.flows[edge]
+                amount = residual if amount is None else min(amount, residual)
+                node = self.heads[edge ^ 1]
+            node = sink
+            while node != source:
+                edge = parents[node]
+                self.flows[edge] += amount
+                self.flows[edge ^ 1] -= amount
+                total_cost += amount * self.costs[edge]
+                node = self.heads[edge ^ 1]
+            total_flow += amount
+        return total_flow, total_cost
+
+    # Distances from the source with Bellman-Ford (a queue based variant), valid for negative costs as long as there
+    # is no negative cycle. Nodes the source cannot reach get a potential of 0.
+    def initial_potentials(self, source: int) -> List[float]:
+        distances: List[Optional[float]] = [None] * self.num_nodes
+        distances[source] = 0
+        queue = deque([source])
+        queued = [False] * self.num_nodes
+        queued[source] = True
+        while queue:
+            node = queue.popleft()
+            queued[node] = False
+            for edge in self.adjacency[node]:
+                if self.capacities[edge] - self.flows[edge] <= 0:
+                    continue
+                head = self.heads[edge]
+                distance = distances[node] + self.costs[edge]
+                if distances[head] is None or distance < distances[head]:
+                    distances[head] = distance
+                    if not queued[head]:
+                        queued[head] = True
+                        queue.append(head)
+        return [0 if distance is None else distance for distance in distances]
+
+    # Dijkstra on the reduced costs (cost + potential of the tail - potential of the head, never negative), stopped
+    # once the sink is reached. Returns the reduced distances (None for the nodes not reached) and the edge through
+    # which each node is reached.
+    def shortest_paths(self, source: int, sink: int, potentials: List[float]) -> Tuple[List, List]:
+        distances: List[Optional[float]] = [None] * self.num_nodes
+        parents: List[Optional[int]] = [None] * self.num_nodes
+        done = [False] * self.num_nodes
+        distances[source] = 0
+        heap = [(0, source)]
+        while heap:
+            distance, node = heapq.heappop(heap)
+            if done[node]:
+                continue
+            done[node] = True
+            if node == sink:
+                break
+            for edge in self.adjacency[node]:
+                if self.capacities[edge] - self.flows[edge] <= 0:
+                    continue
+                head = self.heads[edge]
+                if done[head]:
+                    continue
+                # Reduced costs are clamped at 0 against floating point error.
+                new_distance = distance + max(0, self.costs[edge] + potentials[node] - potentials[head])
+                if distances[head] is None or new_distance < distances[head]:
+                    distances[head] = new_distance
+                    parents[head] = edge
+                    heapq.heappush(heap, (new_distance, head))
+        return distances, parents
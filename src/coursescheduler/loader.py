@@ -0,0 +1,181 @@
+import codecs
+import json
+import mmap
+import re
+from contextlib import contextmanager
+
+from .datamodels import transform_input
+from .models import semester_keys, check_keys, check_type, check_professor, check_offering, raise_errors
+
+################################################################
+# Streaming loader:
+# Professor and schedule JSON files are memory-mapped and decoded a chunk at a time, one array element (a professor
+# or a course offering) after the other, so that neither the whole file nor its text is held in memory. Each
+# element is validated (see models.py) as it is decoded, and every error is raised together once the file has been
+# read. Professors are normalized as they stream past and can be consumed by transform_input directly, without the
+# list of raw professors ever being built.
+# e.g. courses, professors = transform_input(load_schedule(schedule_path), iter_professors(professors_path))
+
+default_chunk_size = 1 << 20
+whitespace = re.compile(r"[ \t\n\r]*")
+
+
+class JSONStream:
+    def __init__(self, data, chunk_size=default_chunk_size) -> None:
+        self.data = data
+        self.chunk_size = chunk_size
+        # Bytes of data decoded into the buffer so far
+        self.offset = 0
+        self.text_decoder = codecs.getincrementaldecoder("utf-8")()
+        self.json_decoder = json.JSONDecoder()
+        # Text not yet parsed starts at buffer[position]
+        self.buffer = ""
+        self.position = 0
+
+    def at_end(self) -> bool:
+        return self.offset >= len(self.data)
+
+    # Append the next chunk of the data to the buffer, dropping the text already parsed.
+    # Returns False at the end of the data.
+    def read_chunk(self) -> bool:
+        if self.at_end():
+            return False
+        chunk = self.data[self.offset:self.offset + self.chunk_size]
+        self.offset += len(chunk)
+        self.buffer = self.buffer[self.position:] + self.text_decoder.decode(chunk, final=self.at_end())
+        self.position = 0
+        return True
+
+    # The next character after any whitespace, or None at the end of the data.
+    def peek(self):
+        while True:
+            self.position = whitespace.match(self.buffer, self.position).end()
+            if self.position < len(self.buffer):
+                return self.buffer[self.position]
+            if not self.read_chunk():
+                return None
+
+    def expect(self, characters):
+        character = self.peek()
+        if character is None or character not in characters:
+            raise json.JSONDecodeError("Expecting " + " or ".join(repr(expected) for expected in characters),
+                                       self.buffer, self.position)
+        self.position += 1
+        return character
+
+    # Decode the next value. A value reaching the end of the buffer may be cut short (a number, or an error for
+    # anything else), so it is decoded again with the next chunk appended until it ends before the buffer does.
+    def decode_value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = self.json_decoder.raw_decode(self.buffer, self.position)
+                if end < len(self.buffer) or self.at_end():
+                    self.position = end
+                    return value
+            except json.JSONDecodeError:
+                if self.at_end():
+                    raise
+            self.read_chunk()
+
+    # Yield the elements of the next value, which must be an array, one at a time.
+    def iter_array(self):
+        self.expect("[")
+        if self.peek() == "]":
+            self.position += 1
+            return
+        while True:
+            yield self.decode_value()
+            if self.expect(",]") == "]":
+                return
+
+    # Yield the keys of the next value, which must be an object. The value of each key must be read (e.g. with
+    # decode_value or iter_array) before the next key is requested.
+    def iter_object(self):
+        self.expect("{")
+        if self.peek() == "}":
+            self.position += 1
+            return
+        while True:
+            key = self.decode_value()
+            if not isinstance(key, str):
+                raise json.JSONDecodeError("Expecting property name enclosed in double quotes", self.buffer,
+                                           self.position)
+            self.expect(":")
+            yield key
+            if self.expect(",}") == "}":
+                return
+
+    def expect_end(self) -> None:
+        if self.peek() is not None:
+            raise json.JSONDecodeError("Extra data", self.buffer, self.position)
+
+
+@contextmanager
+def open_stream(path, chunk_size=default_chunk_size):
+    with open(path, "rb") as json_file:
+        # An empty file cannot be memory-mapped, and has no JSON value to decode anyway.
+        if json_file.seek(0, 2) == 0:
+            raise json.JSONDecodeError("Expecting value", "", 0)
+        with mmap.mmap(json_file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            yield JSONStream(data, chunk_size)
+
+
+# Preferred times as per the specification: each day's list of time ranges as a list of tuples, or None if empty.
+def normalize_preferred_times(professor) -> None:
+    for days in professor["preferredTimes"].values():
+        if days is not None:
+            for day, time_ranges in days.items():
+                days[day] = [tuple(time_range) for time_range in time_ranges] if len(time_ranges) > 0 else None
+
+
+# Yield the professors of a professor file (an array of Professor objects), validated unless trusted and normalized.
+# Once a professor is invalid, the following ones are only validated, and the errors are raised as one SchemaError
+# at the end of the file. When the stop_event is set, the professors left are not read.
+def iter_professors(path, trusted=False, stop_event=None, chunk_size=default_chunk_size):
+    errors = []
+    with open_stream(path, chunk_size) as stream:
+        for index, professor in enumerate(stream.iter_array()):
+            if stop_event is not None and stop_event.is_set():
+                return
+            if not trusted:
+                check_professor(professor, (index,), errors)
+            if errors:
+                continue
+            normalize_preferred_times(professor)
+            yield professor
+        stream.expect_end()
+    raise_errors(errors)
+
+
+# Load a schedule file (a Schedule object), decoding and validating its course offerings one at a time.
+def load_schedule(path, trusted=False, chunk_size=default_chunk_size):
+    schedule = {}
+    errors = []
+    with open_stream(path, chunk_size) as stream:
+        for semester in stream.iter_object():
+            if stream.peek() != "[" or semester not in semester_keys:
+                schedule[semester] = stream.decode_value()
+                if not trusted and semester in semester_keys:
+                    check_type(schedule[semester], list, (semester,), errors)
+                continue
+            offerings = []
+            for index, offering in enumerate(stream.iter_array()):
+                if not trusted:
+                    check_offering(offering, (semester, index), errors)
+                offerings.append(offering)
+            schedule[semester] = offerings
+        stream.expect_end()
+    if not trusted:
+        check_keys(schedule, semester_keys, (), errors)
+    raise_errors(errors)
+    return schedule
+
+
+# Load both files and transform them for the algorithm (see transform_input), streaming the professors into it.
+# Returns (schedule, courses, professors): the schedule is returned as well since it receives the output (see
+# transform_output).
+def load_input(schedule_path, professors_path, trusted=False, chunk_size=default_chunk_size):
+    schedule = load_schedule(schedule_path, trusted, chunk_size)
+    courses, professors = transform_input(schedule, iter_professors(professors_path, trusted, chunk_size=chunk_size))
+    return schedule, courses, professors
@@ -1,5 +1,6 @@
 import re
-from schema import Schema, Or, And, Optional
+from functools import lru_cache
+from schema import Schema, SchemaError, Or, And, Optional
 
 twentyFourHourTimeRegex = r'^((0?|1)[0-9]|2[0-3]):[0-5][0-9]$'
 
@@ -89,23 +90,253 @@ Schedule = Schema({
 })
 
 
-def validate_schedule_structure(schedule, print_output=True):
-    Schedule.validate(schedule)
+################################################################
+# Compiled validation:
+# The schemas above are checked by hand in a single pass over the input, with the same acceptance rules as
+# Schema.validate. Rather than stopping at the first error, every error is collected, and they are raised together
+# as one SchemaError. Each error message has the schema library's wording, preceded by the path to the invalid value
+# ("Key 'fall' error:" for a key, "Index 0 error:" for a list element).
+time_range_pattern = re.compile(twentyFourHourTimeRegex)
+semester_keys = ("fall", "spring", "summer")
+day_keys = ("monday", "tuesday", "wednesday", "thursday", "friday")
+professor_keys = ("id", "name", "isPeng", "facultyType", "coursePreferences", "teachingObligations",
+                  "preferredTimes", "preferredCoursesPerSemester", "preferredNonTeachingSemester",
+                  "preferredCourseDaySpreads")
+course_keys = ("code", "title", "pengRequired", "yearRequired")
+section_keys = ("professor", "capacity", "timeSlots")
+faculty_types = ("RESEARCH", "TEACHING")
+non_teaching_semesters = ("FALL", "SPRING", "SUMMER", None)
+day_spreads = ("TWF", "MTh", "M", "T", "W", "Th", "F")
+years = (1, 2, 3, 4)
+days_of_week = ("MONDAY", "TUESDAY", "WEDNESDAY", "THURSDAY", "FRIDAY")
+
+
+def add_error(errors, path, message):
+    lines = [("Index %d error:" % key) if isinstance(key, int) else ("Key '%s' error:" % key) for key in path]
+    errors.append("\n".join(lines + [message]))
+
+
+# As in the schema library, a bool is not accepted as an int.
+def instance_of(data, expected_type) -> bool:
+    return isinstance(data, expected_type) and not (isinstance(data, bool) and expected_type is int)
+
+
+def check_type(data, expected_type, path, errors):
+    if instance_of(data, expected_type):
+        return True
+    add_error(errors, path, "%r should be instance of %r" % (data, expected_type.__name__))
+    return False
+
+
+# Like Or(*choices) with values and types as choices.
+def check_choice(data, choices, path, errors):
+    for choice in choices:
+        if instance_of(data, choice) if isinstance(choice, type) else data == choice:
+            return
+    add_error(errors, path, "Or(%s) did not validate %r" % (", ".join(repr(choice) for choice in choices), data))
+
+
+# Check that data is a dictionary with the required keys, the optional ones, and no other key.
+def check_keys(data, keys, path, errors, optional_keys=()):
+    if not check_type(data, dict, path, errors):
+        return False
+    missing_keys = [key for key in keys if key not in data]
+    if missing_keys:
+        s_missing_keys = ", ".join(repr(key) for key in sorted(missing_keys, key=repr))
+        add_error(errors, path, "Missing key%s: %s" % ("s" if len(missing_keys) > 1 else "", s_missing_keys))
+    if len(data) + len(missing_keys) > len(keys):
+        wrong_keys = [key for key in data if key not in keys and key not in optional_keys]
+        if wrong_keys:
+            s_wrong_keys = ", ".join(repr(key) for key in sorted(wrong_keys, key=repr))
+            add_error(errors, path, "Wrong key%s %s in %r" % ("s" if len(wrong_keys) > 1 else "", s_wrong_keys, data))
+    return True
+
+
+# The same rule as validate_time_ranges; time ranges repeat a lot, so the results are memoized.
+@lru_cache(maxsize=4096)
+def time_range_valid(start, end) -> bool:
+    return bool(time_range_pattern.match(start) and time_range_pattern.match(end) and
+                int(start.replace(":", "")) < int(end.replace(":", "")))
+
+
+def check_time_range(time_range, path, errors):
+    if not isinstance(time_range, (list, tuple)):
+        add_error(errors, path, "Or(%r, %r) did not validate %r" % (list, tuple, time_range))
+        return
+    if len(time_range) == 2 and type(time_range[0]) is str and type(time_range[1]) is str and \
+            time_range_valid(time_range[0], time_range[1]):
+        return
+    # Invalid: the message names the exception validate_time_ranges raises.
+    try:
+        validate_time_ranges(time_range)
+    except Exception as exception:
+        add_error(errors, path, "validate_time_ranges(%r) raised %r" % (time_range, exception))
+
+
+def check_non_negative(data, path, errors):
+    if check_type(data, int, path, errors) and not data >= 0:
+        add_error(errors, path, "<lambda>(%r) should evaluate to True" % data)
+
+
+def check_professor(professor, path, errors):
+    if not check_keys(professor, professor_keys, path, errors):
+        return
+    for key in ("id", "name"):
+        if key in professor:
+            check_type(professor[key], str, path + (key,), errors)
+    if "isPeng" in professor:
+        check_type(professor["isPeng"], bool, path + ("isPeng",), errors)
+    if "facultyType" in professor:
+        check_choice(professor["facultyType"], faculty_types, path + ("facultyType",), errors)
+    if "coursePreferences" in professor:
+        preferences_path = path + ("coursePreferences",)
+        if check_type(professor["coursePreferences"], list, preferences_path, errors):
+            for index, preference in enumerate(professor["coursePreferences"]):
+                preference_path = preferences_path + (index,)
+                if check_keys(preference, ("courseCode", "enthusiasmScore"), preference_path, errors):
+                    if "courseCode" in preference:
+                        check_type(preference["courseCode"], str, preference_path + ("courseCode",), errors)
+                    if "enthusiasmScore" in preference:
+                        check_type(preference["enthusiasmScore"], int, preference_path + ("enthusiasmScore",),
+                                   errors)
+    if "teachingObligations" in professor:
+        check_type(professor["teachingObligations"], int, path + ("teachingObligations",), errors)
+    if "preferredTimes" in professor:
+        times_path = path + ("preferredTimes",)
+        if check_keys(professor["preferredTimes"], semester_keys, times_path, errors):
+            for semester, days in professor["preferredTimes"].items():
+                if days is None or semester not in semester_keys:
+                    continue
+                semester_path = times_path + (semester,)
+                if not check_keys(days, day_keys, semester_path, errors):
+                    continue
+                for day, time_ranges in days.items():
+                    if day not in day_keys:
+                        continue
+                    day_path = semester_path + (day,)
+                    if check_type(time_ranges, list, day_path, errors):
+                        for index, time_range in enumerate(time_ranges):
+                            check_time_range(time_range, day_path + (index,), errors)
+    if "preferredCoursesPerSemester" in professor:
+        courses_path = path + ("preferredCoursesPerSemester",)
+        if check_keys(professor["preferredCoursesPerSemester"], semester_keys, courses_path, errors):
+            for semester, num_courses in professor["preferredCoursesPerSemester"].items():
+                if semester in semester_keys:
+                    check_non_negative(num_courses, courses_path + (semester,), errors)
+    if "preferredNonTeachingSemester" in professor:
+        check_choice(professor["preferredNonTeachingSemester"], non_teaching_semesters,
+                     path + ("preferredNonTeachingSemester",), errors)
+    if "preferredCourseDaySpreads" in professor:
+        spreads_path = path + ("preferredCourseDaySpreads",)
+        if check_type(professor["preferredCourseDaySpreads"], list, spreads_path, errors):
+            for index, spread in enumerate(professor["preferredCourseDaySpreads"]):
+                check_choice(spread, day_spreads, spreads_path + (index,), errors)
+
+
+def check_course(course, path, errors):
+    if not check_keys(course, course_keys, path, errors):
+        return
+    for key in ("code", "title"):
+        if key in course:
+            check_type(course[key], str, path + (key,), errors)
+    if "pengRequired" in course:
+        peng_path = path + ("pengRequired",)
+        if check_keys(course["pengRequired"], semester_keys, peng_path, errors):
+            for semester, peng_required in course["pengRequired"].items():
+                if semester in semester_keys:
+                    check_type(peng_required, bool, peng_path + (semester,), errors)
+    if "yearRequired" in course:
+        check_choice(course["yearRequired"], years, path + ("yearRequired",), errors)
+
+
+def check_section(section, path, errors):
+    if not check_keys(section, section_keys, path, errors, optional_keys=("maxCapacity",)):
+        return
+    professor = section.get("professor")
+    if professor is not None:
+        professor_path = path + ("professor",)
+        if not isinstance(professor, dict):
+            add_error(errors, professor_path, "Or(None, %r) did not validate %r" % (ProfessorSlim, professor))
+        elif check_keys(professor, ("id", "name"), professor_path, errors):
+            for key in ("id", "name"):
+                if key in professor:
+                    check_type(professor[key], str, professor_path + (key,), errors)
+    for key in ("maxCapacity", "capacity"):
+        if key in section:
+            check_choice(section[key], (None, int), path + (key,), errors)
+    if "timeSlots" in section:
+        timeslots_path = path + ("timeSlots",)
+        timeslots = section["timeSlots"]
+        if not check_type(timeslots, list, timeslots_path, errors):
+            return
+        for index, timeslot in enumerate(timeslots):
+            timeslot_path = timeslots_path + (index,)
+            if check_keys(timeslot, ("dayOfWeek", "timeRange"), timeslot_path, errors):
+                if "dayOfWeek" in timeslot:
+                    check_choice(timeslot["dayOfWeek"], days_of_week, timeslot_path + ("dayOfWeek",), errors)
+                if "timeRange" in timeslot:
+                    check_time_range(timeslot["timeRange"], timeslot_path + ("timeRange",), errors)
+        if len(timeslots) not in [0, 1, 2, 3]:
+            add_error(errors, timeslots_path, "<lambda>(%r) should evaluate to True" % timeslots)
+
+
+def check_offering(offering, path, errors):
+    if not check_keys(offering, ("course", "sections"), path, errors):
+        return
+    if "course" in offering:
+        check_course(offering["course"], path + ("course",), errors)
+    if "sections" in offering:
+        sections_path = path + ("sections",)
+        if check_type(offering["sections"], list, sections_path, errors):
+            for index, section in enumerate(offering["sections"]):
+                check_section(section, sections_path + (index,), errors)
+
+
+def check_schedule(schedule, errors):
+    if not check_keys(schedule, semester_keys, (), errors):
+        return
+    for semester, offerings in schedule.items():
+        if semester not in semester_keys or not check_type(offerings, list, (semester,), errors):
+            continue
+        for index, offering in enumerate(offerings):
+            check_offering(offering, (semester, index), errors)
+
+
+def raise_errors(errors):
+    if errors:
+        raise SchemaError(errors)
+
+
+# trusted: skip the validation (and the output) for inputs which are known to be valid, e.g. validated by the caller.
+def validate_schedule_structure(schedule, print_output=True, trusted=False):
+    if trusted:
+        return True
+    errors = []
+    check_schedule(schedule, errors)
+    raise_errors(errors)
     if print_output:
         print("Schedule adheres to specification")
     return True
 
 
-def validate_professor_structure(professor, print_output=True):
-    Professor.validate(professor)
+def validate_professor_structure(professor, print_output=True, trusted=False):
+    if trusted:
+        return True
+    errors = []
+    check_professor(professor, (), errors)
+    raise_errors(errors)
     if print_output:
         print("Professor adheres to specification")
     return True
 
 
-def validate_professors_structure(professors, print_output=True):
-    for professor in professors:
-        validate_professor_structure(professor, print_output=False)
+def validate_professors_structure(professors, print_output=True, trusted=False):
+    if trusted:
+        return True
+    errors = []
+    for index, professor in enumerate(professors):
+        check_professor(professor, (index,), errors)
+    raise_errors(errors)
     if print_output:
         print("All professors adhere to specification")
     return True
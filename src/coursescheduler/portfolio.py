@@ -0,0 +1,115 @@
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+from .csp import CancellationToken
+
+################################################################
+# Parallel solver portfolio:
+# Several search and optimization configurations of the same CSP are run at once in a process pool.
+# The CSP is sent to each worker process once, when the worker starts, so only the configurations and the
+# solutions travel between processes afterwards.
+
+# Set in each worker process by init_worker.
+worker_csp = None
+worker_cancel_event = None
+
+
+def log_message(message):
+    print("[SCHEDULER] " + message)
+
+
+def init_worker(csp, cancel_event) -> None:
+    global worker_csp, worker_cancel_event
+    worker_csp = csp
+    worker_cancel_event = cancel_event
+
+
+# Solve and optimize the worker's CSP with one configuration of the portfolio.
+# Returns the index of the configuration, the solution (None if none was found) and its score.
+def run_configuration(index, config, config_opt, deadline):
+    stop_event = CancellationToken(deadline=deadline, event=worker_cancel_event)
+    result_object = {"schedule": None, "message": None}
+    solution = worker_csp.solve(config=config, stop_event=stop_event, result_object=result_object)
+    if solution is None:
+        return index, None, None
+
+    # The optimizers only ever move between feasible assignments, so if they are stopped early the assignment they
+    # were given is still a solution.
+    solution = dict(solution)
+    optimized = worker_csp.optimize(dict(solution), config=config_opt, stop_event=stop_event,
+                                    result_object=result_object)
+    if optimized is not None:
+        solution = optimized
+    return index, solution, worker_csp.score(solution)
+
+
+# Build the list of (search config, optimization config) pairs of a portfolio of config_portfolio["size"]
+# configurations, applying the overrides of config_portfolio["variants"] in turn to the base configurations and
+# giving each configuration its own seed.
+def portfolio_configurations(config, config_opt, config_portfolio):
+    variants = config_portfolio["variants"]
+    configurations = []
+    for i in range(config_portfolio["size"]):
+        variant = variants[i % len(variants)]
+        configuration = dict(config, **variant.get("search", {}))
+        configuration_opt = dict(config_opt, **variant.get("optimization", {}))
+        if "max_steps_factor" in variant:
+            configuration_opt["max_steps"] = variant["max_steps_factor"] * config_opt["max_steps"]
+        configuration["seed"] = config.get("seed", 0) + i
+        configuration_opt["seed"] = config_opt.get("seed", 0) + i
+        configurations.append((configuration, configuration_opt))
+    return configurations
+
+
+# Run the configurations of the portfolio on the CSP in parallel.
+# config_portfolio:
+#   "max_workers": number of worker processes (None for one per CPU)
+#   "objective": "first" to return the first solution found, or "best" to wait for every configuration (or the
+#                deadline) and return the highest scoring solution found by then
+#   "time_limit": seconds after which the searches still running are stopped (None for no limit)
+#   "start_method": multiprocessing start method of the workers (None for the platform default)
+# The remaining searches are cancelled once the result is known or the scheduler's stop_event is set, and they
+# also stop at the stop_event's own deadline if it is a CancellationToken.
+def portfolio_search(csp, configurations, config_portfolio, stop_event, result_object):
+    objective = config_portfolio.get("objective", "first")
+    if objective not in ["first", "best"]:
+        raise ValueError("Unknown portfolio objective: " + str(objective))
+    time_limit = config_portfolio.get("time_limit")
+    deadline = getattr(stop_event, "deadline", None)
+    if time_limit is not None:
+        deadline = time.time() + time_limit if deadline is None else min(deadline, time.time() + time_limit)
+
+    context = multiprocessing.get_context(config_portfolio.get("start_method"))
+    cancel_event = context.Event()
+    executor = ProcessPoolExecutor(max_workers=config_portfolio.get("max_workers"), mp_context=context,
+                                   initializer=init_worker, initargs=(csp, cancel_event))
+    best_solution = None
+    best_score = None
+    try:
+        pending = {executor.submit(run_configuration, index, config, config_opt, deadline)
+                   for index, (config, config_opt) in enumerate(configurations)}
+        while pending:
+            # Poll so that the scheduler's stop_event is noticed while waiting.
+            done, pending = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+            for future in done:
+                index, solution, score = future.result()
+                if solution is None:
+                    continue
+                log_message("Configuration " + str(index) + " found a solution with score " + str(score))
+                if best_solution is None or score > best_score:
+                    best_solution = solution
+                    best_score = score
+            if best_solution is not None and objective == "first":
+                break
+            # At the deadline, the best solution found so far is kept; it is only a timeout if there is none.
+            if stop_event.is_set():
+                if best_solution is None:
+                    result_object["schedule"] = None
+                    result_object["message"] = "Error: Timeout during course scheduling. Please relax the " \
+                                               "constraints or add more professor and timeslot availability. "
+                break
+    finally:
+        cancel_event.set()
+        executor.shutdown(wait=True, cancel_futures=True)
+    return best_solution
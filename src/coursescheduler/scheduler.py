@@ -1,80 +1,298 @@
-import json
+import asyncio
 import os
-import datetime
 import time
 
-from threading import Thread, Event
+from collections import namedtuple
+from threading import Thread
 
 from .constraints import professor_teaching_load, course_timeslot_conflicts, course_preferences_constraint, \
-    time_slot_constraint, research_professor_semester_off, professor_on_leave
-from .csp import CSP
-from .datamodels import transform_input, timeslot_determination, transform_output
+    time_slot_constraint, research_professor_semester_off, professor_on_leave, catalog_conflict_table
+from .csp import CSP, CancellationToken
+from .datamodels import transform_schedule, transform_professors, add_qualified_professors, copy_courses, \
+    timeslot_determination, transform_output, timeslot_config_ids, time_string_to_minutes, enthusiasm_scores, \
+    previous_assignments
+from .flow import MinCostFlow
+from .loader import iter_professors, load_schedule
 from .models import validate_schedule_structure, validate_professors_structure
+from .portfolio import portfolio_search, portfolio_configurations
 
 # Set max runtime to five minutes
 max_time_seconds = 5 * 60
-stop_event = Event()
+
+# CSP 1 search config values
+config_csp_1 = {
+    "solver": "backtracking",
+    "mrv": True,
+    "degree": False,
+    "forward_checking": False,
+    "propagation": None,
+    "backjumping": False,
+    "nogood_capacity": 1000,
+    "restarts": None,
+    "restart_base": 100,
+    "seed": 0,
+    "max_steps": 50000
+}
+
+# CSP 1 optimization config values
+# method: "hill_climbing", "simulated_annealing" (initial_temperature, cooling_rate, min_temperature) or
+# "tabu" (tabu_tenure, neighborhood_size); the latter two also use swap_probability. All of them use seed.
+# vectorized: hill climbing evaluates all the values of a variable at once (with NumPy if installed).
+config_opt_csp_1 = {
+    "method": "hill_climbing",
+    "max_steps": 1000,
+    "vectorized": True,
+    "seed": 0
+}
+
+# CSP 1 min cost flow config values (see flow_assignment): when enabled, CSP 1 is solved exactly as a flow
+# problem instead of being searched (and the portfolio is not used), before being optimized as usual.
+# overload_penalty: cost of each course beyond a professor's preferred number of courses in a semester, in
+# enthusiasm score points (175 / 4 weighs it as in course_preferences_constraint).
+config_flow = {
+    "enabled": False,
+    "overload_penalty": 44
+}
+
+# CSP 2 search config values
+config_csp_2 = {
+    "solver": "backtracking",
+    "mrv": True,
+    "degree": False,
+    "forward_checking": False,
+    "propagation": None,
+    "backjumping": False,
+    "nogood_capacity": 1000,
+    "restarts": None,
+    "restart_base": 100,
+    "seed": 0,
+    "max_steps": 50000
+}
+
+# CSP 2 optimization config values
+# method: "hill_climbing", "simulated_annealing" (initial_temperature, cooling_rate, min_temperature) or
+# "tabu" (tabu_tenure, neighborhood_size); the latter two also use swap_probability. All of them use seed.
+# vectorized: hill climbing evaluates all the values of a variable at once (with NumPy if installed).
+config_opt_csp_2 = {
+    "method": "hill_climbing",
+    "max_steps": 500,
+    "vectorized": True,
+    "seed": 0
+}
+
+# CSP 2 branch and bound config values (see CSP.branch_and_bound): when enabled, the solution found is improved
+# by branch and bound instead of the optimizer (and the portfolio is not used), until it is within "gap" of
+# the optimum or "time_limit" seconds have passed. The time limit is capped at half of the time left before
+# the scheduler's deadline, so that the best solution found is still returned when it is reached.
+config_bnb = {
+    "enabled": False,
+    "gap": 0,
+    "time_limit": 60
+}
+
+# Portfolio config values (see portfolio_search): when enabled, "size" configurations derived from the
+# ones above are run in parallel worker processes for each CSP.
+# variants: overrides of the search ("search") and optimization ("optimization") configs, taken in turn by the
+# configurations of the portfolio (see portfolio_configurations). "max_steps_factor" multiplies the optimizer's
+# max_steps, e.g. for simulated annealing, whose steps are cheaper and less effective than hill climbing's.
+config_portfolio = {
+    "enabled": False,
+    "size": 4,
+    "max_workers": None,
+    "objective": "first",
+    "time_limit": None,
+    "start_method": None,
+    "variants": [
+        {"search": {}, "optimization": {}},
+        {"search": {"solver": "min_conflicts"}, "optimization": {"method": "tabu"}},
+        {"search": {"propagation": "mac"}, "optimization": {"method": "simulated_annealing"}, "max_steps_factor": 20},
+        {"search": {"restarts": "geometric"}, "optimization": {"method": "hill_climbing"}}
+    ]
+}
+
+# Every config value, part of the key of the solution cache (see cache.py).
+solver_config = {
+    "csp_1": config_csp_1,
+    "csp_1_optimization": config_opt_csp_1,
+    "csp_1_flow": config_flow,
+    "csp_2": config_csp_2,
+    "csp_2_optimization": config_opt_csp_2,
+    "csp_2_branch_and_bound": config_bnb,
+    "portfolio": config_portfolio
+}
 
 
 def log_message(message):
     print("[SCHEDULER] " + message)
 
 
-def generate_schedule(professors, schedule, jsonDebug=False):
+# Each call carries its own cancellation token, so concurrent calls and calls following a timeout are independent.
+# timeout: max runtime in seconds. cancellation_token: optional CancellationToken through which the caller can
+# cancel the call; its deadline, if any, also applies.
+# cache: optional SolutionCache returning the schedule generated earlier for the same inputs and solver config.
+# previous_schedule: optional output schedule of an earlier call, repaired rather than replaced where possible (see
+# generate_schedule_timer).
+# trusted_input: skip validating the professors and schedule, for inputs which have already been validated.
+def generate_schedule(professors, schedule, jsonDebug=False, timeout=max_time_seconds, cancellation_token=None,
+                      cache=None, previous_schedule=None, trusted_input=False):
     result_object = {
         "schedule": None,
         "message": None
     }
-    main_alg_thread = Thread(target=generate_schedule_timer, args=(professors, schedule, result_object, jsonDebug))
+    cache_key = cached_schedule_key(professors, schedule, cache, previous_schedule)
+    if cache_key is not None:
+        cached_schedule = cache.get(cache_key)
+        if cached_schedule is not None:
+            return restore_cached_schedule(schedule, cached_schedule), None
+    cancellation_token = call_cancellation_token(timeout, cancellation_token)
+    main_alg_thread = Thread(target=generate_schedule_timer,
+                             args=(professors, schedule, result_object, jsonDebug, cancellation_token),
+                             kwargs={"previous_schedule": previous_schedule, "trusted_input": trusted_input})
     main_alg_thread.start()
-    main_alg_thread.join(timeout=max_time_seconds)
+    main_alg_thread.join(timeout=cancellation_token.remaining())
     if main_alg_thread.is_alive():
-        stop_event.set()
+        cancellation_token.cancel()
         main_alg_thread.join()
 
     if result_object["schedule"] is None and result_object["message"] is None:
         result_object["message"] = "No schedule could be generated."
+    if cache_key is not None and result_object["schedule"] is not None:
+        cache.put(cache_key, result_object["schedule"])
+    return result_object["schedule"], result_object["message"]
+
+
+# Cancellation token of a single call, with the call's own timeout. If the caller gave a token, cancelling either
+# one cancels the call, and the caller's deadline also applies.
+def call_cancellation_token(timeout, cancellation_token=None):
+    if cancellation_token is None:
+        return CancellationToken(timeout=timeout)
+    return CancellationToken(timeout=timeout, deadline=cancellation_token.deadline, event=cancellation_token.event)
+
+
+# Key of the inputs in the cache, computed before the schedule (which receives the output) is modified.
+# Inputs loaded from the sample files (jsonDebug) are not cached.
+def cached_schedule_key(professors, schedule, cache, previous_schedule=None):
+    if cache is None or professors is None or schedule is None:
+        return None
+    if previous_schedule is not None:
+        return cache.key(professors, schedule, {"solver": solver_config, "previous_schedule": previous_schedule})
+    return cache.key(professors, schedule, solver_config)
+
+
+# Fill the schedule in with a cached schedule, in place, as transform_output does with a generated one.
+def restore_cached_schedule(schedule, cached_schedule):
+    for semester, offerings in cached_schedule.items():
+        if isinstance(schedule.get(semester), list):
+            schedule[semester][:] = offerings
+        else:
+            schedule[semester] = offerings
+    return schedule
+
+
+# Coroutine version of generate_schedule for asyncio applications: the schedule is generated in a worker thread, so
+# the event loop is not blocked, and cancelling the awaiting task cancels the search.
+# progress: optional asyncio.Queue receiving progress events (see generate_schedule_timer) as they happen.
+# The other parameters are the same as generate_schedule's.
+async def generate_schedule_async(professors, schedule, jsonDebug=False, timeout=max_time_seconds, progress=None,
+                                  cache=None, previous_schedule=None, trusted_input=False, cancellation_token=None):
+    result_object = {
+        "schedule": None,
+        "message": None
+    }
+    cache_key = cached_schedule_key(professors, schedule, cache, previous_schedule)
+    if cache_key is not None:
+        cached_schedule = cache.get(cache_key)
+        if cached_schedule is not None:
+            return restore_cached_schedule(schedule, cached_schedule), None
+    loop = asyncio.get_running_loop()
+    cancellation_token = call_cancellation_token(timeout, cancellation_token)
+
+    report_progress = None
+    if progress is not None:
+        def queue_progress(event):
+            try:
+                loop.call_soon_threadsafe(progress.put_nowait, event)
+            except RuntimeError:
+                # The event loop has been closed.
+                pass
+        report_progress = queue_progress
+
+    try:
+        await loop.run_in_executor(None, generate_schedule_timer, professors, schedule, result_object, jsonDebug,
+                                   cancellation_token, report_progress, None, previous_schedule, trusted_input)
+    except asyncio.CancelledError:
+        cancellation_token.cancel()
+        raise
+
+    if result_object["schedule"] is None and result_object["message"] is None:
+        result_object["message"] = "No schedule could be generated."
+    if cache_key is not None and result_object["schedule"] is not None:
+        cache.put(cache_key, result_object["schedule"])
     return result_object["schedule"], result_object["message"]
 
 
 # Initial plug & play algorithm
-# TODO Add checks for stop_event to prevent the algorithm from running too long
-def generate_schedule_timer(professors, schedule, result_object, jsonDebug=False):
+# The algorithm checks stop_event (a CancellationToken) regularly and stops once it is set.
+# progress: optional callable, called from the algorithm's thread with a progress event for each step reached:
+# {"stage": "csp_1", "csp_2" or "schedule", "status": "started", "solved", "optimized" or "done",
+#  "elapsed": seconds since the start}
+# prepared_schedule: the schedule's PreparedSchedule, e.g. prepared once for a whole batch; the schedule is then
+# neither validated nor transformed again, and only receives the output.
+# previous_schedule: warm start from an earlier output schedule. Each CSP keeps the previous professors and timeslots
+# which are still consistent and only solves the courses which changed or are new (see CSP.repair), then only
+# optimizes those. If the repair fails, the CSP is solved from scratch.
+# trusted_input: skip validating both the professors and the schedule.
+def generate_schedule_timer(professors, schedule, result_object, jsonDebug=False, stop_event=None, progress=None,
+                            prepared_schedule=None, previous_schedule=None, trusted_input=False):
+    if stop_event is None:
+        stop_event = CancellationToken(timeout=max_time_seconds)
+    schedule_trusted = prepared_schedule is not None or trusted_input
+    professors_trusted = trusted_input
+    professors_streamed = False
     if jsonDebug:
-        # Temp load json files as input:
+        # Temp load json files as input, validated as they are read (see loader.py):
         if professors is None:
-            prof_file = open(os.path.join(os.path.dirname(__file__), 'temp_json_input/professor_object.json'))
-            professors = json.load(prof_file)
-            prof_file.close()
-
-            # Convert timeslot lists to tuples as per the specification if not already tuples
-            for professor in professors:
-                # Error case: converting timeslots lists to tuples timed out.
-                if stop_event.isSet():
-                    result_object["schedule"] = None
-                    result_object["message"] = "Error: Timeout due to large input size."
-                    return
-                for semester, days in professor["preferredTimes"].items():
-                    if days is not None:
-                        for day, timeslots in days.items():
-                            if len(timeslots) > 0:
-                                tuple_list = [tuple(timeslot) for timeslot in timeslots]
-                            else:
-                                tuple_list = None
-                            professor["preferredTimes"][semester][day] = tuple_list
+            # Streamed into transform_input, with the timeslot lists converted to tuples as per the specification
+            prof_path = os.path.join(os.path.dirname(__file__), 'temp_json_input/professor_object.json')
+            professors = iter_professors(prof_path, stop_event=stop_event)
+            professors_trusted = True
+            professors_streamed = True
 
         if schedule is None:
-            schedule_file = open(os.path.join(os.path.dirname(__file__), 'temp_json_input/schedule_object.json'))
-            schedule = json.load(schedule_file)
-            schedule_file.close()
+            schedule = load_schedule(os.path.join(os.path.dirname(__file__), 'temp_json_input/schedule_object.json'))
+            schedule_trusted = True
 
-    # These will throw if the input does not meet the spec
-    validate_schedule_structure(schedule)
-    validate_professors_structure(professors)
+    # These will throw if the input does not meet the spec, with every error found
+    validate_schedule_structure(schedule, trusted=schedule_trusted)
+    validate_professors_structure(professors, trusted=professors_trusted)
 
     start_time = time.time()
 
-    courses, professors = transform_input(schedule, professors)
+    def report_progress(stage, status):
+        if progress is not None:
+            progress({"stage": stage, "status": status, "elapsed": time.time() - start_time})
+
+    hints = None
+    if previous_schedule is not None:
+        hints = previous_assignments(schedule, previous_schedule)
+    if prepared_schedule is None:
+        prepared_schedule = prepare_schedule(schedule, stop_event)
+        # Error case: CSP 2 setting of domains timed out.
+        if prepared_schedule is None:
+            result_object["schedule"] = None
+            result_object["message"] = "Error: Timeout due to large timeslot or course offering input size."
+            return
+        courses = prepared_schedule.courses
+    else:
+        # The prepared courses are shared with the other calls, so this call assigns its own copy.
+        courses = copy_courses(prepared_schedule.courses)
+    professors = transform_professors(professors)
+    add_qualified_professors(courses, professors)
+    # Error case: reading the professors file timed out.
+    if professors_streamed and stop_event.is_set():
+        result_object["schedule"] = None
+        result_object["message"] = "Error: Timeout due to large input size."
+        return
 
     non_static_courses = {
         "fall": {k: v for (k, v) in courses["fall"].items() if v["professor"] is None},
@@ -82,69 +300,20 @@ def generate_schedule_timer(professors, schedule, result_object, jsonDebug=False
         "summer": {k: v for (k, v) in courses["summer"].items() if v["professor"] is None}
     }
 
-    peng_profs = {k: v for (k, v) in professors.items() if v["isPeng"]}
-
     # set domains
     domains_csp_1 = {}
     for semester, offerings in non_static_courses.items():
         for course, course_data in offerings.items():
             # Error case: adding the domains to each variable timed out.
-            if stop_event.isSet():
+            if stop_event.is_set():
                 result_object["schedule"] = None
                 result_object["message"] = "Error: Timeout due to large professor or course offering input size."
                 return
-            original_course_id = course.split("_")[0]
-            if course_data["pengRequired"]:
-                qualified_peng_profs = [k for (k, v) in peng_profs.items()
-                                        for course_preferences in v["qualifiedCoursePreferences"]
-                                        if course_preferences["courseCode"] == original_course_id and
-                                        course_preferences["enthusiasmScore"] != 0]
-                if len(qualified_peng_profs) > 0:
-                    # Sort values (professors) in descending order of enthusiasm score for the variable (course).
-                    def get_enthusiasm_score(prof):
-                        enthusiasm_score_ = 0
-                        for enthusiasm_dict in professors[prof]["qualifiedCoursePreferences"]:
-                            if enthusiasm_dict["courseCode"] == original_course_id:
-                                enthusiasm_score_ = enthusiasm_dict["enthusiasmScore"]
-                        return enthusiasm_score_
-
-                    qualified_peng_profs.sort(reverse=True, key=get_enthusiasm_score)
-
-                    # Remove the researching professors on their research semester
-                    for qualified_prof in qualified_peng_profs:
-                        if professors[qualified_prof]["facultyType"] == "RESEARCH":
-                            if professors[qualified_prof]["preferredNonTeachingSemester"] and semester == \
-                                    professors[qualified_prof]["preferredNonTeachingSemester"].lower():
-                                qualified_peng_profs.remove(qualified_prof)
-
-                    # Assign the sorted professors as the domain for the course.
-                    domains_csp_1[course] = qualified_peng_profs
-            else:
-                qualified_profs = [k for (k, v) in professors.items()
-                                   for course_preferences in v["qualifiedCoursePreferences"]
-                                   if course_preferences["courseCode"] == original_course_id and
-                                   course_preferences["enthusiasmScore"] != 0]
-
-                if len(qualified_profs) > 0:
-                    # Sort values (professors) in descending order of enthusiasm score for the variable (course).
-                    def get_enthusiasm_score(prof):
-                        enthusiasm_score_ = 0
-                        for enthusiasm_dict in professors[prof]["qualifiedCoursePreferences"]:
-                            if enthusiasm_dict["courseCode"] == original_course_id:
-                                enthusiasm_score_ = enthusiasm_dict["enthusiasmScore"]
-                        return enthusiasm_score_
-
-                    qualified_profs.sort(reverse=True, key=get_enthusiasm_score)
-
-                    # Remove the researching professors on their research semester
-                    for qualified_prof in qualified_profs:
-                        if professors[qualified_prof]["facultyType"] == "RESEARCH":
-                            if professors[qualified_prof]["preferredNonTeachingSemester"] and semester == \
-                                    professors[qualified_prof]["preferredNonTeachingSemester"].lower():
-                                qualified_profs.remove(qualified_prof)
-
-                    # Assign the sorted professors as the domain for the course.
-                    domains_csp_1[course] = qualified_profs
+            # The professors who can teach the course, sorted in descending order of enthusiasm score
+            # (see transform_input).
+            qualified_profs = [prof_id for prof_id, _ in course_data["qualifiedProfessors"]]
+            if len(qualified_profs) > 0:
+                domains_csp_1[course] = qualified_profs
 
     # initialize csp solvers
     course_variables_non_static = []
@@ -172,37 +341,65 @@ def generate_schedule_timer(professors, schedule, result_object, jsonDebug=False
         csp_1 = CSP(course_variables_non_static, domains_csp_1)
 
         # add hard constraints
-        csp_1.add_constraint(professor_teaching_load(course_variables_non_static, professors))
-        csp_1.add_constraint(professor_on_leave(course_variables_non_static, professors))
+        # Each professor gets their own constraints, scoped to the courses they could be assigned to,
+        # so that a check only involves the courses competing for the same professor.
+        professor_courses = {prof_id: [] for prof_id in professors}
+        for course in course_variables_non_static:
+            for prof_id in domains_csp_1[course]:
+                professor_courses[prof_id].append(course)
+        for prof_id, prof_courses in professor_courses.items():
+            if prof_courses:
+                csp_1.add_constraint(professor_teaching_load(prof_courses, professors, prof_id))
+                csp_1.add_constraint(professor_on_leave(prof_courses, professors, prof_id))
 
         # add soft constraints
         csp_1.add_soft_constraint(course_preferences_constraint(course_variables_non_static, professors))
 
-        # set search config values
-        config = {
-            "mrv": True,
-            "degree": False,
-            "forward_checking": False,
-            "max_steps": 50000
-        }
+        config = config_csp_1
+        config_opt = config_opt_csp_1
 
         # Error case: setting up CSP 1 timed out.
-        if stop_event.isSet():
+        if stop_event.is_set():
             result_object["schedule"] = None
             result_object["message"] = "Error: Timeout due to large professor or course offering input size."
             return
 
-        # Set optimization config values
-        config_opt = {
-            "max_steps": 1000
-        }
-
         # run csp 1
         start_time_csp_1 = time.time()
-        solution_csp_1 = csp_1.backtracking_search(config=config, stop_event=stop_event, result_object=result_object)
+        report_progress("csp_1", "started")
+        repair_csp_1 = None
+        if hints is not None:
+            repair_csp_1 = csp_1.repair({course: hint["professor"] for course, hint in hints.items()}, config=config,
+                                        stop_event=stop_event, result_object=result_object)
+            if repair_csp_1 is None:
+                log_message("Could not repair the previous professor assignments, solving CSP 1 from scratch")
+        if repair_csp_1 is not None:
+            solution_csp_1, repaired_csp_1 = repair_csp_1
+        elif config_flow["enabled"]:
+            solution_csp_1 = flow_assignment(course_variables_non_static, domains_csp_1, professors, config_flow,
+                                             stop_event)
+            if solution_csp_1 is None:
+                result_object["schedule"] = None
+                result_object["message"] = "Error: Timeout during course scheduling. Please relax the constraints " \
+                                           "or add more professor and timeslot availability. "
+                return
+            # Error case: the flow is maximal, so the courses left over cannot be assigned by any schedule.
+            if len(solution_csp_1) < len(course_variables_non_static):
+                unassigned = [course for course in course_variables_non_static if course not in solution_csp_1]
+                log_message("CSP 1 is infeasible (professors to courses)")
+                result_object["schedule"] = None
+                result_object["message"] = "Error: Not enough available teaching load for " + unassigned[0] + \
+                                           ("" if len(unassigned) == 1 else
+                                            " and " + str(len(unassigned) - 1) + " more courses") + "."
+                return
+        elif config_portfolio["enabled"]:
+            configurations = portfolio_configurations(config, config_opt, config_portfolio)
+            solution_csp_1 = portfolio_search(csp_1, configurations, config_portfolio, stop_event, result_object)
+        else:
+            solution_csp_1 = csp_1.solve(config=config, stop_event=stop_event, result_object=result_object)
 
         # Error case: CSP 1 did not find a solution in the given time limit.
-        if solution_csp_1 is None and stop_event.isSet():
+        if solution_csp_1 is None and stop_event.is_set():
             return
 
         # Error case: CSP 1 did not find a solution.
@@ -213,12 +410,23 @@ def generate_schedule_timer(professors, schedule, result_object, jsonDebug=False
                                        "professors. "
             return
 
-        solution_csp_1 = csp_1.optimize(solution_csp_1, config=config_opt, stop_event=stop_event, result_object=result_object)
+        report_progress("csp_1", "solved")
+
+        # Only the repaired courses are optimized, so that the others keep their previous professors.
+        if repair_csp_1 is not None:
+            if repaired_csp_1:
+                solution_csp_1 = csp_1.optimize(solution_csp_1, config=dict(config_opt, variables=repaired_csp_1),
+                                                stop_event=stop_event, result_object=result_object)
+        # The portfolio optimizes its solutions in the worker processes.
+        elif config_flow["enabled"] or not config_portfolio["enabled"]:
+            solution_csp_1 = csp_1.optimize(solution_csp_1, config=config_opt, stop_event=stop_event,
+                                            result_object=result_object)
         # Error case: CSP 1 did not find a solution in the given time limit.
-        if solution_csp_1 is None and stop_event.isSet():
+        if solution_csp_1 is None and stop_event.is_set():
             return
 
         end_time_csp_1_opt = time.time()
+        report_progress("csp_1", "optimized")
 
     except Exception as e:
         log_message(str(e))
@@ -237,7 +445,7 @@ def generate_schedule_timer(professors, schedule, result_object, jsonDebug=False
                 values["professor"] = solution_csp_1[course]
 
     # Error case: CSP 1 timed out at some point.
-    if stop_event.isSet():
+    if stop_event.is_set():
         result_object["schedule"] = None
         result_object["message"] = "Error: Timeout during professor assignment (likely due to no feasible schedule " \
                                    "existing given the constraints. "
@@ -251,57 +459,26 @@ def generate_schedule_timer(professors, schedule, result_object, jsonDebug=False
 
     static_courses = [course for course in course_variables if course not in course_variables_non_static]
 
-    # Create data structure of all possible timeslot configurations
-    timeslot_configs = timeslot_determination()
-
-    # Set the domains of each variable.
-    timeslot_ids = timeslot_configs.keys()
-    domains_csp_2 = {}
-    semesters = courses.keys()
-    for semester in semesters:
-        for course in courses[semester]:
-            # Error case: CSP 2 setting of domains timed out.
-            if stop_event.isSet():
-                result_object["schedule"] = None
-                result_object["message"] = "Error: Timeout due to large timeslot or course offering input size."
-                return
-
-            timeslot_list = courses[semester][course]["timeSlots"]
-            if timeslot_list:
-
-                # Convert timeslots from their format in the input,
-                # to the corresponding format as it would appear in timeslot_configs.
-                # timeslot_configs uses datetimes, the input uses strings.
-                static_course_timeslots = []
-                for timeslot_dict in timeslot_list:
-                    # Convert the dictionary to a list of form ["DAY", datetime(start), datetime(end)]
-                    start_time_string = timeslot_dict["timeRange"][0].split(':')
-                    end_time_string = timeslot_dict["timeRange"][1].split(':')
-                    start_datetime = datetime.datetime(100, 1, 1, int(start_time_string[0]), int(start_time_string[1]))
-                    end_datetime = datetime.datetime(100, 1, 1, int(end_time_string[0]), int(end_time_string[1]))
-                    timeslot = [
-                        timeslot_dict["dayOfWeek"],
-                        start_datetime,
-                        end_datetime
-                    ]
-                    static_course_timeslots.append(timeslot)
-                for key, timeslot in timeslot_configs.items():
-                    if timeslot == static_course_timeslots:
-                        domains_csp_2[course] = [key]
-            else:
-                domains_csp_2[course] = timeslot_ids
+    # The timeslot configurations and the domains of each variable (see prepare_schedule)
+    timeslot_configs = prepared_schedule.timeslot_configs
+    timeslot_ids_by_config = prepared_schedule.timeslot_ids_by_config
+    # Which pairs of timeslots overlap, computed once per process and shared by all timeslot conflict constraints.
+    conflict_table = catalog_conflict_table()
 
     try:
-        csp_2 = CSP(course_variables, domains_csp_2)
+        csp_2 = CSP(course_variables, dict(prepared_schedule.domains_csp_2))
 
         static_courses_fall = [course for course in static_courses if "fall" in course]
         static_courses_spring = [course for course in static_courses if "spring" in course]
         static_courses_summer = [course for course in static_courses if "summer" in course]
 
         # Add constraints: courses in the same academic year must not overlap.
-        csp_2 = add_year_timeslot_constraint(csp_2, courses, timeslot_configs, "fall", static_courses_fall)
-        csp_2 = add_year_timeslot_constraint(csp_2, courses, timeslot_configs, "spring", static_courses_spring)
-        csp_2 = add_year_timeslot_constraint(csp_2, courses, timeslot_configs, "summer", static_courses_summer)
+        csp_2 = add_year_timeslot_constraint(csp_2, courses, timeslot_configs, "fall", static_courses_fall,
+                                             conflict_table)
+        csp_2 = add_year_timeslot_constraint(csp_2, courses, timeslot_configs, "spring", static_courses_spring,
+                                             conflict_table)
+        csp_2 = add_year_timeslot_constraint(csp_2, courses, timeslot_configs, "summer", static_courses_summer,
+                                             conflict_table)
 
         # Add constraints: courses having the same professor must not overlap.
         all_profs = [k for k in professors.keys()]
@@ -311,38 +488,41 @@ def generate_schedule_timer(professors, schedule, result_object, jsonDebug=False
                                               courses[semester][course]["professor"] == prof_id]
                 if professor_teaching_courses:
                     # For each list:
-                    csp_2.add_constraint(course_timeslot_conflicts(professor_teaching_courses, timeslot_configs, []))
+                    csp_2.add_constraint(course_timeslot_conflicts(professor_teaching_courses, timeslot_configs, [],
+                                                                   conflict_table))
 
         # Add soft constraints.
         csp_2.add_soft_constraint(
             time_slot_constraint(course_variables_non_static, professors, timeslot_configs, solution_csp_1))
 
-        # set search config values
-        config_csp_2 = {
-            "mrv": True,
-            "degree": False,
-            "forward_checking": False,
-            "max_steps": 50000
-        }
+        config_opt = config_opt_csp_2
 
         # Error case: setting up CSP 2 timed out.
-        if stop_event.isSet():
+        if stop_event.is_set():
             result_object["schedule"] = None
             result_object["message"] = "Error: Timeout due to large timeslot or course offering input size."
             return
 
-        # Set optimization config values
-        config_opt = {
-            "max_steps": 500
-        }
-
         # run search
         start_time_csp_2 = time.time()
-        solution_csp_2 = csp_2.backtracking_search(config=config_csp_2, stop_event=stop_event,
-                                                   result_object=result_object)
+        report_progress("csp_2", "started")
+        repair_csp_2 = None
+        if hints is not None:
+            timeslot_hints = {course: timeslot_ids_by_config.get(hint["timeSlots"]) for course, hint in hints.items()}
+            repair_csp_2 = csp_2.repair(timeslot_hints, config=config_csp_2, stop_event=stop_event,
+                                        result_object=result_object)
+            if repair_csp_2 is None:
+                log_message("Could not repair the previous timeslot assignments, solving CSP 2 from scratch")
+        if repair_csp_2 is not None:
+            solution_csp_2, repaired_csp_2 = repair_csp_2
+        elif config_portfolio["enabled"] and not config_bnb["enabled"]:
+            configurations = portfolio_configurations(config_csp_2, config_opt, config_portfolio)
+            solution_csp_2 = portfolio_search(csp_2, configurations, config_portfolio, stop_event, result_object)
+        else:
+            solution_csp_2 = csp_2.solve(config=config_csp_2, stop_event=stop_event, result_object=result_object)
 
         # Error case: CSP 2 did not find a solution in the given time limit.
-        if solution_csp_2 is None and stop_event.isSet():
+        if solution_csp_2 is None and stop_event.is_set():
             return
 
         # Error case: CSP 2 did not find a solution.
@@ -353,12 +533,31 @@ def generate_schedule_timer(professors, schedule, result_object, jsonDebug=False
                                        "timeslots. "
             return
 
-        solution_csp_2 = csp_2.optimize(solution_csp_2, config=config_opt, stop_event=stop_event, result_object=result_object)
+        report_progress("csp_2", "solved")
+
+        # Only the repaired courses are optimized, so that the others keep their previous timeslots.
+        if repair_csp_2 is not None:
+            if repaired_csp_2:
+                solution_csp_2 = csp_2.optimize(solution_csp_2, config=dict(config_opt, variables=repaired_csp_2),
+                                                stop_event=stop_event, result_object=result_object)
+        elif config_bnb["enabled"]:
+            config_bnb_capped = dict(config_bnb)
+            remaining = stop_event.remaining() if hasattr(stop_event, "remaining") else None
+            if remaining is not None:
+                config_bnb_capped["time_limit"] = min(config_bnb["time_limit"], remaining / 2)
+            solution_csp_2 = csp_2.branch_and_bound(solution_csp_2, config=config_bnb_capped, stop_event=stop_event,
+                                                    result_object=result_object)
+            log_message("CSP 2 upper bound: " + str(result_object.pop("upper_bound", None)))
+        # The portfolio optimizes its solutions in the worker processes.
+        elif not config_portfolio["enabled"]:
+            solution_csp_2 = csp_2.optimize(solution_csp_2, config=config_opt, stop_event=stop_event,
+                                            result_object=result_object)
         # Error case: CSP 2 did not find a solution in the given time limit.
-        if solution_csp_2 is None and stop_event.isSet():
+        if solution_csp_2 is None and stop_event.is_set():
             return
 
         end_time_csp_2_opt = time.time()
+        report_progress("csp_2", "optimized")
 
     except Exception as e:
         log_message(str(e))
@@ -377,7 +576,7 @@ def generate_schedule_timer(professors, schedule, result_object, jsonDebug=False
                 values["timeSlots"] = timeslot_configs[solution_csp_2[course]]
 
     # Error case: CSP 2 timed out at some point.
-    if stop_event.isSet():
+    if stop_event.is_set():
         result_object["schedule"] = None
         result_object["message"] = "Error: Timeout during timeslot assignment (likely due to no feasible schedule " \
                                    "existing given the constraints. "
@@ -388,12 +587,56 @@ def generate_schedule_timer(professors, schedule, result_object, jsonDebug=False
     end_time = time.time()
     log_message("Schedule generated successfully")
     log_message("Total runtime: " + str(end_time - start_time) + " seconds")
+    report_progress("schedule", "done")
     result_object["schedule"] = schedule
     result_object["message"] = None
     return
 
 
-def add_year_timeslot_constraint(csp_2, all_courses_input, timeslot_configs, semester, static_courses):
+# The part of the algorithm's data which only depends on the schedule, not on the professors: the transformed
+# courses (see transform_schedule), the timeslot configurations and the CSP 2 domains. It can be prepared once and
+# given to any number of calls with the same schedule (see generate_schedule_timer), and must not be modified.
+PreparedSchedule = namedtuple("PreparedSchedule", ["courses", "timeslot_configs", "timeslot_ids_by_config",
+                                                   "domains_csp_2"])
+
+
+# Prepare the schedule-side data of a validated schedule. Returns None if the stop_event is set first.
+def prepare_schedule(schedule, stop_event=None):
+    courses = transform_schedule(schedule)
+
+    # Create data structure of all possible timeslot configurations
+    timeslot_configs = timeslot_determination()
+
+    # Set the domains of each variable of CSP 2.
+    timeslot_ids = list(timeslot_configs.keys())
+    timeslot_ids_by_config = timeslot_config_ids()
+    domains_csp_2 = {}
+    semesters = courses.keys()
+    for semester in semesters:
+        for course in courses[semester]:
+            if stop_event is not None and stop_event.is_set():
+                return None
+
+            timeslot_list = courses[semester][course]["timeSlots"]
+            if timeslot_list:
+
+                # Convert timeslots from their format in the input,
+                # to the corresponding format as it would appear in timeslot_configs.
+                # timeslot_configs uses minutes since midnight, the input uses strings.
+                static_course_timeslots = tuple(
+                    (timeslot_dict["dayOfWeek"],
+                     time_string_to_minutes(timeslot_dict["timeRange"][0]),
+                     time_string_to_minutes(timeslot_dict["timeRange"][1]))
+                    for timeslot_dict in timeslot_list)
+                if static_course_timeslots in timeslot_ids_by_config:
+                    domains_csp_2[course] = [timeslot_ids_by_config[static_course_timeslots]]
+            else:
+                domains_csp_2[course] = timeslot_ids
+    return PreparedSchedule(courses, timeslot_configs, timeslot_ids_by_config, domains_csp_2)
+
+
+def add_year_timeslot_constraint(csp_2, all_courses_input, timeslot_configs, semester, static_courses,
+                                 conflict_table=None):
     # Group courses by year.
     first_year_courses = [course for course in all_courses_input[semester].keys() if
                           all_courses_input[semester][course]["yearRequired"] == 1]
@@ -405,13 +648,65 @@ def add_year_timeslot_constraint(csp_2, all_courses_input, timeslot_configs, sem
                            all_courses_input[semester][course]["yearRequired"] == 4]
 
     # Add timeslot overlap constraints.
-    csp_2.add_constraint(course_timeslot_conflicts(first_year_courses, timeslot_configs, static_courses))
-    csp_2.add_constraint(course_timeslot_conflicts(second_year_courses, timeslot_configs, static_courses))
-    csp_2.add_constraint(course_timeslot_conflicts(third_year_courses, timeslot_configs, static_courses))
-    csp_2.add_constraint(course_timeslot_conflicts(fourth_year_courses, timeslot_configs, static_courses))
+    csp_2.add_constraint(course_timeslot_conflicts(first_year_courses, timeslot_configs, static_courses,
+                                                   conflict_table))
+    csp_2.add_constraint(course_timeslot_conflicts(second_year_courses, timeslot_configs, static_courses,
+                                                   conflict_table))
+    csp_2.add_constraint(course_timeslot_conflicts(third_year_courses, timeslot_configs, static_courses,
+                                                   conflict_table))
+    csp_2.add_constraint(course_timeslot_conflicts(fourth_year_courses, timeslot_configs, static_courses,
+                                                   conflict_table))
 
     return csp_2
 
 
+# Exact engine for CSP 1: the assignment of professors to courses as a minimum cost flow.
+# Each course sends one unit of flow through a (professor, semester) capacity node of a professor who can teach it
+# (only in the semesters the professor is not on leave), then through the professor's node, whose capacity is their
+# teaching obligations. Each unit costs minus the professor's enthusiasm score for the course, and the units a
+# semester node carries beyond the professor's preferred number of courses in that semester each cost
+# overload_penalty on top. The flow is maximal, so if some course is left without a professor, no assignment
+# satisfying the hard constraints exists.
+# Returns the assignment found (missing the courses which cannot be assigned), or None if the stop_event was set.
+def flow_assignment(course_variables, domains, professors, config_flow, stop_event):
+    on_leave = professor_on_leave(course_variables, professors)
+    network = MinCostFlow(2)
+    source, sink = 0, 1
+    professor_nodes = {}
+    semester_nodes = {}
+
+    def semester_node(prof_id, semester):
+        node = semester_nodes.get((prof_id, semester))
+        if node is None:
+            professor_node = professor_nodes.get(prof_id)
+            if professor_node is None:
+                professor_node = network.add_node()
+                network.add_edge(professor_node, sink, professors[prof_id]["teachingObligations"], 0)
+                professor_nodes[prof_id] = professor_node
+            node = network.add_node()
+            teaching_obligations = professors[prof_id]["teachingObligations"]
+            preferred = min(professors[prof_id]["preferredCoursesPerSemester"][semester], teaching_obligations)
+            network.add_edge(node, professor_node, preferred, 0)
+            network.add_edge(node, professor_node, teaching_obligations - preferred, config_flow["overload_penalty"])
+            semester_nodes[(prof_id, semester)] = node
+        return node
+
+    course_edges = {}
+    for course in course_variables:
+        course_node = network.add_node()
+        network.add_edge(source, course_node, 1, 0)
+        course_code, semester = course.split("_")[:2]
+        for prof_id in domains[course]:
+            if professors[prof_id]["teachingObligations"] <= 0 or not on_leave.course_satisfied(course, prof_id):
+                continue
+            edge = network.add_edge(course_node, semester_node(prof_id, semester), 1,
+                                    -enthusiasm_scores(professors[prof_id]).get(course_code, 0))
+            course_edges[edge] = (course, prof_id)
+
+    if network.solve(source, sink, len(course_variables), stop_event) is None:
+        return None
+    return {course: prof_id for edge, (course, prof_id) in course_edges.items() if network.flow(edge) > 0}
+
+
 if __name__ == '__main__':
     result, error = generate_schedule(None, None, True)
@@ -0,0 +1,111 @@
+import itertools
+import random
+
+from src.coursescheduler.csp import CSP, Constraint, SoftConstraint
+
+
+# Hard constraint used for testing: adjacent variables in the list must be assigned different values.
+class adjacent_different(Constraint):
+    def __init__(self, variables) -> None:
+        super().__init__(variables)
+
+    def satisfied(self, variable, assignment) -> bool:
+        first, second = self.variables
+        if first not in assignment or second not in assignment:
+            return True
+        return assignment[first] != assignment[second]
+
+
+# Hard constraint used for testing: two queens (one per column) must not attack each other.
+class queens_not_attacking(Constraint):
+    def __init__(self, column_1, column_2) -> None:
+        super().__init__([column_1, column_2])
+
+    def satisfied(self, variable, assignment) -> bool:
+        column_1, column_2 = self.variables
+        if column_1 not in assignment or column_2 not in assignment:
+            return True
+        row_1, row_2 = assignment[column_1], assignment[column_2]
+        return row_1 != row_2 and abs(row_1 - row_2) != abs(column_1 - column_2)
+
+    # The row and the diagonals of the other queen.
+    def infeasible_values(self, variable, assignment):
+        other = self.variables[1] if variable == self.variables[0] else self.variables[0]
+        if other not in assignment:
+            return set()
+        distance = abs(variable - other)
+        return {assignment[other], assignment[other] - distance, assignment[other] + distance}
+
+
+# Soft constraint used for testing: fraction of the variables assigned their preferred value.
+class preferred_values(SoftConstraint):
+    def __init__(self, preferences) -> None:
+        super().__init__(list(preferences.keys()))
+        self.preferences = preferences
+
+    def satisfaction_score(self, assignment, variable=None) -> float:
+        satisfied = [variable for variable, value in self.preferences.items() if assignment.get(variable) == value]
+        return len(satisfied) / len(self.preferences)
+
+
+# Soft constraint used for testing: sum of a weight for each variable's value.
+class value_weights(SoftConstraint):
+    def __init__(self, weights) -> None:
+        super().__init__(list(weights.keys()))
+        self.weights = weights
+
+    def satisfaction_score(self, assignment, variable=None) -> float:
+        return sum(self.weights[variable][value] for variable, value in assignment.items())
+
+    def value_score(self, variable, value) -> float:
+        return self.weights[variable][value]
+
+
+# Chain of variables with random weights on their values, and its optimal score found by enumeration.
+def make_weighted_chain_csp(num_variables, num_values, seed):
+    rng = random.Random(seed)
+    csp = make_chain_csp(num_variables, num_values)
+    weights = {variable: {value: rng.randint(0, 9) for value in range(num_values)} for variable in csp.variables}
+    csp.add_soft_constraint(value_weights(weights))
+    best = max(sum(weights[variable][value] for variable, value in enumerate(values))
+               for values in itertools.product(range(num_values), repeat=num_variables)
+               if all(values[i] != values[i + 1] for i in range(num_variables - 1)))
+    return csp, best
+
+
+# Two variables that must differ, each preferring the value the other one holds: only a swap improves on it.
+def make_swap_csp():
+    csp = CSP(["a", "b"], {"a": [0, 1], "b": [0, 1]})
+    csp.add_constraint(adjacent_different(["a", "b"]))
+    csp.add_soft_constraint(preferred_values({"a": 1, "b": 0}))
+    return csp
+
+
+def make_queens_csp(num_queens):
+    columns = list(range(num_queens))
+    domains = {column: list(range(num_queens)) for column in columns}
+    csp = CSP(columns, domains)
+    for column_1 in columns:
+        for column_2 in columns[column_1 + 1:]:
+            csp.add_constraint(queens_not_attacking(column_1, column_2))
+    return csp
+
+
+def make_chain_csp(num_variables, num_values=2):
+    variables = list(range(num_variables))
+    domains = {variable: list(range(num_values)) for variable in variables}
+    csp = CSP(variables, domains)
+    for variable in variables[1:]:
+        csp.add_constraint(adjacent_different([variable - 1, variable]))
+    return csp
+
+
+def search_config(**kwargs):
+    config = {
+        "mrv": False,
+        "degree": False,
+        "forward_checking": False,
+        "max_steps": 50000
+    }
+    config.update(kwargs)
+    return config
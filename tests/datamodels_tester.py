@@ -386,3 +386,32 @@ test_professors = {
         "preferredCourseDaySpreads": []
     }
 }
+
+
+# Professor object as per the specification, preferring each (course code, enthusiasm score) of course_preferences.
+def make_professor(prof_id, is_peng, faculty_type, course_preferences, non_teaching_semester=None):
+    return {
+        "id": prof_id,
+        "name": "Professor " + prof_id,
+        "isPeng": is_peng,
+        "facultyType": faculty_type,
+        "coursePreferences": [{"courseCode": course_code, "enthusiasmScore": score}
+                              for course_code, score in course_preferences],
+        "teachingObligations": 3,
+        "preferredTimes": {"fall": None, "spring": None, "summer": None},
+        "preferredCoursesPerSemester": {"fall": 1, "spring": 1, "summer": 1},
+        "preferredNonTeachingSemester": non_teaching_semester,
+        "preferredCourseDaySpreads": []
+    }
+
+
+# Course offering as per the specification, with a single unassigned section.
+def make_offering(course_code, peng_required):
+    return {
+        "course": {
+            "code": course_code,
+            "pengRequired": {"fall": peng_required, "spring": peng_required, "summer": peng_required},
+            "yearRequired": 1
+        },
+        "sections": [{"professor": None, "timeSlots": []}]
+    }
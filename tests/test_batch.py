@@ -0,0 +1,88 @@
+from unittest import TestCase
+from unittest.mock import patch
+from concurrent.futures import ThreadPoolExecutor
+import json
+import os
+import sys
+import tempfile
+
+from schema import SchemaError
+from src.coursescheduler import batch as batch_module, scheduler, generate_schedules
+from src.coursescheduler.batch import main
+from src.coursescheduler.models import Schedule
+
+input_directory = os.path.join(os.path.dirname(__file__), '../src/coursescheduler/temp_json_input')
+
+
+def load_input(file_name):
+    with open(os.path.join(input_directory, file_name)) as input_file:
+        return json.load(input_file)
+
+
+class PyTestBatch(TestCase):
+
+    def test_generate_schedules(self):
+        professors = load_input('professor_object.json')
+        batch = [
+            {"id": "all", "professors": professors},
+            {"id": "invalid", "professors": [{"id": 1}]},
+            {"professors": professors, "schedule": load_input('schedule_object.json')},
+        ]
+        results = list(generate_schedules(iter(batch), load_input('schedule_object.json'), max_workers=2))
+        results = {result["id"]: result for result in results}
+        self.assertEqual(set(results.keys()), {"all", "invalid", 2})
+        for scenario_id in ["all", 2]:
+            self.assertIsNone(results[scenario_id]["error"])
+            Schedule.validate(results[scenario_id]["schedule"])
+        self.assertIsNone(results["invalid"]["schedule"])
+        self.assertIsNotNone(results["invalid"]["error"])
+
+    def test_generate_schedules_timeout(self):
+        batch = [{"id": i, "professors": load_input('professor_object.json')} for i in range(3)]
+        results = list(generate_schedules(batch, load_input('schedule_object.json'), max_workers=1, timeout=0))
+        self.assertEqual(sorted(result["id"] for result in results), [0, 1, 2])
+        for result in results:
+            self.assertIsNone(result["schedule"])
+            self.assertIsNotNone(result["error"])
+
+    def test_generate_schedules_missing_schedule(self):
+        with self.assertRaises(ValueError):
+            list(generate_schedules([{"professors": []}]))
+
+    def test_generate_schedules_validates_eagerly(self):
+        with self.assertRaises(SchemaError):
+            generate_schedules([], {"fall": None})
+
+    def test_generate_schedules_prepares_schedule_once(self):
+        # The workers run as threads, so that the calls they make are counted as well.
+        batch = [{"id": i, "professors": load_input('professor_object.json')} for i in range(3)]
+        with patch.object(batch_module, "ProcessPoolExecutor", ThreadPoolExecutor), \
+                patch.object(batch_module, "batch_schedule", None), \
+                patch.object(batch_module, "batch_prepared_schedule", None), \
+                patch.object(sys, "stdout", sys.stdout), \
+                patch.object(scheduler, "transform_schedule", wraps=scheduler.transform_schedule) as transform, \
+                patch.object(scheduler, "timeslot_determination", wraps=scheduler.timeslot_determination) as timeslots:
+            results = list(generate_schedules(batch, load_input('schedule_object.json'), max_workers=2))
+        self.assertEqual(sorted(result["id"] for result in results), [0, 1, 2])
+        for result in results:
+            self.assertIsNone(result["error"])
+            Schedule.validate(result["schedule"])
+        self.assertEqual(transform.call_count, 1)
+        self.assertEqual(timeslots.call_count, 1)
+
+    def test_batch_command_line(self):
+        professors = load_input('professor_object.json')
+        with tempfile.TemporaryDirectory() as directory:
+            scenarios_path = os.path.join(directory, 'scenarios.jsonl')
+            output_path = os.path.join(directory, 'results.jsonl')
+            with open(scenarios_path, 'w') as scenarios_file:
+                for scenario_id in ["a", "b"]:
+                    scenarios_file.write(json.dumps({"id": scenario_id, "professors": professors}) + "\n")
+            main([scenarios_path, "--schedule", os.path.join(input_directory, 'schedule_object.json'),
+                  "--output", output_path, "--workers", "2"])
+            with open(output_path) as output_file:
+                results = [json.loads(line) for line in output_file]
+        self.assertEqual(sorted(result["id"] for result in results), ["a", "b"])
+        for result in results:
+            self.assertIsNone(result["error"])
+            Schedule.validate(result["schedule"])
@@ -0,0 +1,86 @@
+import json
+import os
+import tempfile
+import time
+from unittest import TestCase
+
+from src.coursescheduler import generate_schedule
+from src.coursescheduler.cache import SolutionCache
+
+
+class PyTestSolutionCache(TestCase):
+
+    def test_key_canonical(self):
+        cache = SolutionCache()
+        key = cache.key([{"id": "1", "times": (1, 2)}], {"fall": [], "spring": []}, {"seed": 0})
+        self.assertEqual(key, cache.key([{"times": [1, 2], "id": "1"}], {"spring": [], "fall": []}, {"seed": 0}))
+        self.assertNotEqual(key, cache.key([{"id": "1", "times": (1, 2)}], {"fall": [], "spring": []}, {"seed": 1}))
+
+    def test_memory_hit_and_miss(self):
+        cache = SolutionCache()
+        self.assertIsNone(cache.get("a"))
+        cache.put("a", {"fall": []})
+        schedule = cache.get("a")
+        self.assertEqual(schedule, {"fall": []})
+        # Callers get their own copy.
+        schedule["fall"].append(1)
+        self.assertEqual(cache.get("a"), {"fall": []})
+        self.assertEqual(cache.stats(), {"hits": 2, "memory_hits": 2, "disk_hits": 0, "misses": 1,
+                                         "memory_entries": 1})
+
+    def test_memory_evicts_least_recently_used(self):
+        cache = SolutionCache(capacity=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), 1)
+        self.assertEqual(cache.get("c"), 3)
+
+    def test_disk_tier(self):
+        with tempfile.TemporaryDirectory() as directory:
+            SolutionCache(directory=directory).put("a", {"fall": [1]})
+            cache = SolutionCache(directory=directory)
+            self.assertEqual(cache.get("a"), {"fall": [1]})
+            self.assertEqual(cache.get("a"), {"fall": [1]})
+            self.assertEqual(cache.stats()["disk_hits"], 1)
+            self.assertEqual(cache.stats()["memory_hits"], 1)
+            cache.clear()
+            self.assertEqual(os.listdir(directory), [])
+
+    def test_disk_evicts_least_recently_used(self):
+        with tempfile.TemporaryDirectory() as directory:
+            entry_size = len(json.dumps({"fall": [0] * 100}))
+            cache = SolutionCache(capacity=1, directory=directory, max_disk_bytes=2 * entry_size)
+            cache.put("a", {"fall": [0] * 100})
+            cache.put("b", {"fall": [0] * 100})
+            os.utime(os.path.join(directory, "a.json"), (0, 0))
+            cache.put("c", {"fall": [0] * 100})
+            self.assertEqual(sorted(os.listdir(directory)), ["b.json", "c.json"])
+
+    def test_generate_schedule_cached(self):
+        input_directory = os.path.join(os.path.dirname(__file__), "../src/coursescheduler/temp_json_input")
+        with open(os.path.join(input_directory, "professor_object.json")) as prof_file:
+            professors = json.load(prof_file)
+        with open(os.path.join(input_directory, "schedule_object.json")) as schedule_file:
+            schedule_input = json.load(schedule_file)
+
+        cache = SolutionCache()
+        schedule, error = generate_schedule(professors, json.loads(json.dumps(schedule_input)), cache=cache)
+        self.assertIsNone(error)
+        start_time = time.time()
+        cached_input = json.loads(json.dumps(schedule_input))
+        cached_schedule, error = generate_schedule(professors, cached_input, cache=cache)
+        self.assertLess(time.time() - start_time, 0.1)
+        self.assertIsNone(error)
+        self.assertEqual(cached_schedule, schedule)
+        # The schedule passed in is filled in, as on a miss.
+        self.assertIs(cached_schedule, cached_input)
+        self.assertEqual(cache.stats()["hits"], 1)
+        self.assertEqual(cache.stats()["misses"], 1)
+
+        # The seeds in the key make the cached schedule the one generated without the cache.
+        uncached_schedule, error = generate_schedule(professors, json.loads(json.dumps(schedule_input)))
+        self.assertIsNone(error)
+        self.assertEqual(json.loads(json.dumps(uncached_schedule)), json.loads(json.dumps(schedule)))
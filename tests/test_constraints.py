@@ -1,11 +1,15 @@
 import json
 import os
+from threading import Event
 from unittest import TestCase
+from unittest.mock import patch
 
 import pytest
 
+from src.coursescheduler import constraints
 from src.coursescheduler.constraints import qualified_course_prof, course_requires_peng, professor_teaching_load, \
-    course_timeslot_conflicts
+    course_timeslot_conflicts, timeslot_conflict_table, course_preferences_constraint, time_slot_constraint
+from src.coursescheduler.csp import CSP
 from src.coursescheduler.datamodels import timeslot_determination
 from src.coursescheduler.verifyconstraints import verify_requires_peng, \
     verify_assigned_teaching_load, verify_all_courses_assigned_professors, verify_qualified_course_prof
@@ -38,6 +42,14 @@ class PyTestConstraints(TestCase):
         test = professor_teaching_load(["SENG265"], test_professors)
         self.assertTrue(test.satisfied([], test_assignment))
 
+    def test_professor_teaching_load_scoped_ignores_other_professors(self):
+        test = professor_teaching_load(["CSC111", "CSC115", "CSC225"], test_professors, "1")
+        self.assertTrue(test.satisfied([], test_assignment))
+
+    def test_professor_teaching_load_scoped_fail(self):
+        test = professor_teaching_load(["CSC111", "CSC115", "CSC225"], test_professors, "2")
+        self.assertFalse(test.satisfied([], test_assignment))
+
     def test_course_timeslot_conflicts_fail(self):
         timeslot_configs = timeslot_determination()
         static_courses = []
@@ -50,6 +62,101 @@ class PyTestConstraints(TestCase):
         test = course_timeslot_conflicts(["SENG265", "CSC225"], timeslot_configs, static_courses)
         self.assertTrue(test.satisfied([], test_time))
 
+    def test_course_timeslot_conflicts_new_variable_fail(self):
+        timeslot_configs = timeslot_determination()
+        test = course_timeslot_conflicts(["CSC111", "CSC115"], timeslot_configs, [])
+        self.assertFalse(test.satisfied("CSC115", test_time))
+
+    def test_course_timeslot_conflicts_static_courses_pass(self):
+        timeslot_configs = timeslot_determination()
+        test = course_timeslot_conflicts(["CSC111", "CSC115"], timeslot_configs, ["CSC111", "CSC115"])
+        self.assertTrue(test.satisfied("CSC115", test_time))
+
+    def test_timeslot_conflict_table_symmetric(self):
+        conflict_table = timeslot_conflict_table(timeslot_determination())
+        for timeslot_id, conflicts in conflict_table.items():
+            self.assertIn(timeslot_id, conflicts)
+            for other_id in conflicts:
+                self.assertIn(timeslot_id, conflict_table[other_id])
+
+    def test_course_preferences_aggregate_score(self):
+        assignment = {"CSC111_fall": "1", "CSC115_spring": "2", "CSC225_fall": "2"}
+        test = course_preferences_constraint(list(assignment.keys()), test_professors)
+        test.reset(assignment)
+        self.assertAlmostEqual(test.aggregate_score(), test.satisfaction_score(assignment))
+
+    def test_course_preferences_score_delta(self):
+        assignment = {"CSC111_fall": "1", "CSC115_spring": "2", "CSC225_fall": "2"}
+        test = course_preferences_constraint(list(assignment.keys()), test_professors)
+        test.reset(assignment)
+        before = test.satisfaction_score(assignment)
+        delta = test.score_delta(assignment, "CSC225_fall", "1")
+        self.assertEqual(assignment["CSC225_fall"], "2")
+        assignment["CSC225_fall"] = "1"
+        self.assertAlmostEqual(delta, test.satisfaction_score(assignment) - before)
+        test.commit(assignment, "CSC225_fall", "2", "1")
+        self.assertAlmostEqual(test.aggregate_score(), test.satisfaction_score(assignment))
+
+    def test_time_slot_score_delta(self):
+        timeslot_configs = timeslot_determination()
+        csp_1_result = {"CSC111_fall": "1"}
+        test = time_slot_constraint(["CSC111_fall"], test_professors, timeslot_configs, csp_1_result)
+        assignment = {"CSC111_fall": 0}
+        before = test.satisfaction_score(assignment, "CSC111_fall")
+        delta = test.score_delta(assignment, "CSC111_fall", 100)
+        assignment["CSC111_fall"] = 100
+        self.assertAlmostEqual(delta, test.satisfaction_score(assignment, "CSC111_fall") - before)
+
+    def test_course_preferences_score_deltas(self):
+        for numpy in [constraints.numpy, None]:
+            assignment = {"CSC111_fall": "1", "CSC115_spring": "2", "CSC225_fall": "2"}
+            test = course_preferences_constraint(list(assignment.keys()), test_professors)
+            with patch.object(constraints, "numpy", numpy):
+                test.reset(assignment)
+                for course in assignment:
+                    deltas = test.score_deltas(assignment, course, ["1", "2"])
+                    self.assertEqual(list(deltas), [test.score_delta(assignment, course, "1"),
+                                                    test.score_delta(assignment, course, "2")])
+            self.assertAlmostEqual(test.aggregate_score(), test.satisfaction_score(assignment))
+
+    def test_time_slot_score_deltas(self):
+        timeslot_configs = timeslot_determination()
+        csp_1_result = {"CSC111_fall": "1"}
+        test = time_slot_constraint(["CSC111_fall"], test_professors, timeslot_configs, csp_1_result)
+        assignment = {"CSC111_fall": 0}
+        values = list(timeslot_configs.keys())
+        for numpy in [constraints.numpy, None]:
+            with patch.object(constraints, "numpy", numpy):
+                deltas = test.score_deltas(assignment, "CSC111_fall", values)
+            self.assertEqual(list(deltas), [test.score_delta(assignment, "CSC111_fall", value) for value in values])
+
+    def test_professor_teaching_load_infeasible_values(self):
+        test = professor_teaching_load(["CSC111", "CSC115"], test_professors)
+        self.assertIsNone(test.infeasible_values("CSC115", {"CSC111": "2"}))
+        test.reset()
+        test.assign("CSC111", "2")
+        self.assertEqual(test.infeasible_values("CSC115", {"CSC111": "2"}), {"2"})
+
+    def test_course_timeslot_conflicts_infeasible_values(self):
+        timeslot_configs = timeslot_determination()
+        test = course_timeslot_conflicts(["CSC111", "CSC115", "CSC225"], timeslot_configs, [])
+        assignment = {"CSC111": 0, "CSC225": 100}
+        infeasible = test.infeasible_values("CSC115", assignment)
+        for timeslot_id in timeslot_configs:
+            assignment["CSC115"] = timeslot_id
+            self.assertEqual(timeslot_id in infeasible, not test.satisfied("CSC115", assignment))
+
+    def test_time_slot_score_table_memoized(self):
+        timeslot_configs = timeslot_determination()
+        csp_1_result = {"CSC111_fall": "1", "CSC115_fall": "1"}
+        test = time_slot_constraint(["CSC111_fall", "CSC115_fall"], test_professors, timeslot_configs, csp_1_result)
+        score = test.timeslot_score("CSC111_fall", 5)
+        self.assertEqual(list(test.score_tables.keys()), [("1", "fall")])
+        self.assertEqual(len(test.score_tables[("1", "fall")]), len(timeslot_configs))
+        self.assertEqual(test.timeslot_score("CSC115_fall", 5), score)
+        self.assertEqual(score, test.compute_timeslot_score("1", "fall", 5))
+        self.assertEqual(len(test.score_tables), 1)
+
     @pytest.mark.skip
     def test_assigned_teaching_load_passes(self):
         test = verify_assigned_teaching_load()
@@ -79,3 +186,31 @@ class PyTestConstraints(TestCase):
         temp_courses["csc110"]["professor"] = ""
         test = verify_all_courses_assigned_professors()
         self.assertFalse(test.satisfied())
+
+    def test_professor_teaching_load_incremental_fail(self):
+        test = professor_teaching_load(["CSC111", "CSC115"], test_professors)
+        test.reset()
+        test.assign("CSC111", "2")
+        test.assign("CSC115", "2")
+        self.assertFalse(test.satisfied("CSC115", {"CSC111": "2", "CSC115": "2"}))
+
+    def test_professor_teaching_load_released_after_search(self):
+        test = professor_teaching_load(["CSC111", "CSC115"], test_professors)
+        csp = CSP(["CSC111", "CSC115"], {"CSC111": ["1", "2"], "CSC115": ["1", "2"]})
+        csp.add_constraint(test)
+        solution = csp.backtracking_search(config={"mrv": True}, stop_event=Event(), result_object={})
+        self.assertIsNotNone(solution)
+        self.assertIsNone(test.teaching_loads)
+        self.assertFalse(test.satisfied("CSC115", {"CSC111": "2", "CSC115": "2"}))
+        csp.reset_constraints({})
+        csp.release_constraints()
+        self.assertFalse(test.satisfied("CSC115", {"CSC111": "2", "CSC115": "2"}))
+
+    def test_professor_teaching_load_incremental_unassign_pass(self):
+        test = professor_teaching_load(["CSC111", "CSC115"], test_professors)
+        test.reset()
+        test.assign("CSC111", "2")
+        test.assign("CSC115", "2")
+        test.unassign("CSC115", "2")
+        test.assign("CSC115", "1")
+        self.assertTrue(test.satisfied("CSC115", {"CSC111": "2", "CSC115": "1"}))
@@ -0,0 +1,366 @@
+import tracemalloc
+from threading import Event
+from unittest import TestCase
+from unittest.mock import patch
+
+from src.coursescheduler import csp as csp_module
+from src.coursescheduler.csp import CSP, PropagationEngine, NogoodStore, luby, CancellationToken
+from tests.csp_tester import adjacent_different, queens_not_attacking, preferred_values, value_weights, \
+    make_weighted_chain_csp, make_swap_csp, make_queens_csp, make_chain_csp, search_config
+
+
+class PyTestCSP(TestCase):
+
+    def test_backtracking_search_solves_chain(self):
+        csp = make_chain_csp(20)
+        solution = csp.backtracking_search(config=search_config(), stop_event=Event(), result_object={})
+        self.assertEqual(len(solution), 20)
+        for variable in range(1, 20):
+            self.assertNotEqual(solution[variable - 1], solution[variable])
+
+    def test_backtracking_search_no_solution(self):
+        csp = make_chain_csp(3, num_values=1)
+        solution = csp.backtracking_search(config=search_config(), stop_event=Event(), result_object={})
+        self.assertIsNone(solution)
+
+    def test_backtracking_search_timeout(self):
+        csp = make_chain_csp(3)
+        stop_event = Event()
+        stop_event.set()
+        result_object = {}
+        self.assertIsNone(csp.backtracking_search(config=search_config(), stop_event=stop_event,
+                                                  result_object=result_object))
+        self.assertIsNotNone(result_object["message"])
+
+    def test_backtracking_search_mrv_and_degree(self):
+        csp = make_chain_csp(20)
+        solution = csp.backtracking_search(config=search_config(mrv=True, degree=True), stop_event=Event(),
+                                           result_object={})
+        self.assertEqual(len(solution), 20)
+        for variable in range(1, 20):
+            self.assertNotEqual(solution[variable - 1], solution[variable])
+
+    def test_backtracking_search_degree_orders_by_decreasing_degree(self):
+        # Variable 0 shares a constraint with every other variable, variables 3 and 4 with each other as well.
+        csp = CSP([1, 2, 3, 4, 0], {variable: [0, 1, 2] for variable in range(5)})
+        for variable in range(1, 5):
+            csp.add_constraint(adjacent_different([0, variable]))
+        csp.add_constraint(adjacent_different([3, 4]))
+        solution = csp.backtracking_search(config=search_config(degree=True), stop_event=Event(), result_object={})
+        self.assertEqual(csp.variables, [0, 3, 4, 1, 2])
+        self.assertEqual(len(solution), 5)
+
+    def test_backtracking_search_mrv_prefers_constrained_variable(self):
+        # Variable 5 can only take the value 1, so the chain must alternate around it.
+        csp = make_chain_csp(10)
+        csp.domains[5] = [1]
+        solution = csp.backtracking_search(config=search_config(mrv=True), stop_event=Event(), result_object={})
+        self.assertEqual(solution[5], 1)
+        self.assertEqual(solution[4], 0)
+        self.assertEqual(solution[0], 0)
+
+    def test_backtracking_search_forward_checking(self):
+        csp = make_chain_csp(20)
+        solution = csp.backtracking_search(config=search_config(forward_checking=True), stop_event=Event(),
+                                           result_object={})
+        self.assertEqual(len(solution), 20)
+
+    def test_backtracking_search_mac(self):
+        csp = make_chain_csp(20, num_values=3)
+        csp.domains[10] = [2]
+        solution = csp.backtracking_search(config=search_config(mrv=True, propagation="mac"), stop_event=Event(),
+                                           result_object={})
+        self.assertEqual(len(solution), 20)
+        self.assertEqual(solution[10], 2)
+        for variable in range(1, 20):
+            self.assertNotEqual(solution[variable - 1], solution[variable])
+
+    def test_mac_detects_dead_end_before_search(self):
+        csp = make_chain_csp(3)
+        csp.domains[0] = [0]
+        csp.domains[2] = [0]
+        csp.domains[1] = [0]
+        engine = PropagationEngine(csp, {}, csp.neighbors(), "mac")
+        self.assertFalse(engine.initialize())
+
+    def test_propagation_engine_undo(self):
+        csp = make_chain_csp(3)
+        assignment = {}
+        engine = PropagationEngine(csp, assignment, csp.neighbors(), "mac")
+        self.assertTrue(engine.initialize())
+        mark = engine.mark()
+        assignment[1] = 0
+        csp.assign(1, 0)
+        self.assertTrue(engine.propagate(1))
+        self.assertEqual(engine.domains[0], [1])
+        self.assertEqual(engine.domains[2], [1])
+        engine.undo(mark)
+        self.assertEqual(engine.domains[0], [0, 1])
+        self.assertEqual(engine.domains[2], [0, 1])
+
+    def test_neighbors_only_include_shared_constraints(self):
+        csp = make_chain_csp(5)
+        self.assertEqual(csp.neighbors()[0], [1])
+        self.assertEqual(sorted(csp.neighbors()[2]), [1, 3])
+        csp.add_constraint(adjacent_different([0, 4]))
+        self.assertEqual(sorted(csp.neighbors()[0]), [1, 4])
+
+    def test_backtracking_search_backjumping(self):
+        for config in [search_config(backjumping=True), search_config(backjumping=True, mrv=True),
+                       search_config(backjumping=True, mrv=True, propagation="mac")]:
+            csp = make_queens_csp(10)
+            solution = csp.backtracking_search(config=config, stop_event=Event(), result_object={})
+            self.assertEqual(len(solution), 10)
+            for constraint in csp.constraint_list:
+                self.assertTrue(constraint.satisfied(None, solution))
+
+    def test_backtracking_search_backjumping_no_solution(self):
+        for config in [search_config(backjumping=True), search_config(backjumping=True, mrv=True)]:
+            csp = make_queens_csp(3)
+            self.assertIsNone(csp.backtracking_search(config=config, stop_event=Event(), result_object={}))
+
+    def test_nogood_store(self):
+        nogoods = NogoodStore(capacity=2)
+        nogoods.add({"a": 1, "b": 2})
+        self.assertIsNotNone(nogoods.find("b", 2, {"a": 1}))
+        self.assertIsNone(nogoods.find("b", 2, {"a": 3}))
+        self.assertIsNone(nogoods.find("b", 3, {"a": 1}))
+
+    def test_nogood_store_evicts_least_recently_used(self):
+        nogoods = NogoodStore(capacity=2)
+        nogoods.add({"a": 1})
+        nogoods.add({"b": 1})
+        nogoods.find("a", 1, {})
+        nogoods.add({"c": 1})
+        self.assertEqual(len(nogoods), 2)
+        self.assertIsNotNone(nogoods.find("a", 1, {}))
+        self.assertIsNone(nogoods.find("b", 1, {}))
+
+    def test_luby_sequence(self):
+        self.assertEqual([luby(i) for i in range(1, 16)], [1, 1, 2, 1, 1, 2, 4, 1, 1, 2, 1, 1, 2, 4, 8])
+
+    def test_backtracking_search_restarts(self):
+        for restarts in ["luby", "geometric"]:
+            csp = make_queens_csp(12)
+            config = search_config(mrv=True, restarts=restarts, restart_base=1, seed=7)
+            solution = csp.backtracking_search(config=config, stop_event=Event(), result_object={})
+            self.assertEqual(len(solution), 12)
+            for constraint in csp.constraint_list:
+                self.assertTrue(constraint.satisfied(None, solution))
+
+    def test_backtracking_search_restarts_seeded(self):
+        solutions = []
+        for _ in range(2):
+            csp = make_queens_csp(12)
+            config = search_config(mrv=True, restarts="luby", restart_base=1, seed=7)
+            solutions.append(csp.backtracking_search(config=config, stop_event=Event(), result_object={}))
+        self.assertEqual(solutions[0], solutions[1])
+
+    def test_backtracking_search_restarts_no_solution(self):
+        csp = make_queens_csp(3)
+        config = search_config(mrv=True, backjumping=True, restarts="luby", restart_base=1, seed=7)
+        self.assertIsNone(csp.backtracking_search(config=config, stop_event=Event(), result_object={}))
+
+    def test_backtracking_search_allocations_linear(self):
+        # Peak allocations should grow linearly with the number of variables, not quadratically.
+        def peak_allocations(num_variables):
+            csp = make_chain_csp(num_variables)
+            tracemalloc.start()
+            csp.backtracking_search(config=search_config(), stop_event=Event(), result_object={})
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            return peak
+
+        self.assertLess(peak_allocations(400), 3 * peak_allocations(200))
+
+    def test_optimize_hill_climbing_cannot_swap(self):
+        csp = make_swap_csp()
+        solution = csp.optimize({"a": 0, "b": 1}, config={"max_steps": 100}, stop_event=Event(), result_object={})
+        self.assertEqual(solution, {"a": 0, "b": 1})
+
+    def test_optimize_simulated_annealing(self):
+        csp = make_swap_csp()
+        config = {"method": "simulated_annealing", "max_steps": 100, "seed": 0}
+        solution = csp.optimize({"a": 0, "b": 1}, config=config, stop_event=Event(), result_object={})
+        self.assertEqual(solution, {"a": 1, "b": 0})
+
+    def test_optimize_tabu(self):
+        csp = make_swap_csp()
+        config = {"method": "tabu", "max_steps": 100, "seed": 0}
+        solution = csp.optimize({"a": 0, "b": 1}, config=config, stop_event=Event(), result_object={})
+        self.assertEqual(solution, {"a": 1, "b": 0})
+
+    def test_optimize_local_search_keeps_hard_constraints(self):
+        for method in ["simulated_annealing", "tabu"]:
+            csp = make_queens_csp(6)
+            csp.add_soft_constraint(preferred_values({column: 0 for column in range(6)}))
+            solution = csp.backtracking_search(config=search_config(), stop_event=Event(), result_object={})
+            config = {"method": method, "max_steps": 200, "seed": 0, "initial_temperature": 1}
+            solution = csp.optimize(solution, config=config, stop_event=Event(), result_object={})
+            self.assertTrue(all(constraint.satisfied(None, solution) for constraint in csp.constraint_list))
+
+    def test_optimize_vectorized_same_as_value_by_value(self):
+        solutions = []
+        for vectorized, numpy in [(False, csp_module.numpy), (True, csp_module.numpy), (True, None)]:
+            # Six queens on a board with twelve rows, leaving room to move each queen.
+            csp = CSP(list(range(6)), {column: list(range(12)) for column in range(6)})
+            for column_1 in range(6):
+                for column_2 in range(column_1 + 1, 6):
+                    csp.add_constraint(queens_not_attacking(column_1, column_2))
+            csp.add_soft_constraint(preferred_values({column: 11 - 2 * column for column in range(6)}))
+            solution = csp.backtracking_search(config=search_config(), stop_event=Event(), result_object={})
+            with patch.object(csp_module, "numpy", numpy):
+                solution = csp.optimize(solution, config={"max_steps": 300, "vectorized": vectorized, "seed": 3},
+                                        stop_event=Event(), result_object={})
+            self.assertTrue(all(constraint.satisfied(None, solution) for constraint in csp.constraint_list))
+            solutions.append(solution)
+        self.assertGreater(sum(solutions[0][column] == 11 - 2 * column for column in range(6)), 1)
+        self.assertEqual(solutions[0], solutions[1])
+        self.assertEqual(solutions[0], solutions[2])
+
+    def test_infeasible_values_unsupported(self):
+        csp = make_chain_csp(3)
+        self.assertIsNone(csp.infeasible_values(1, {0: 0, 2: 1}))
+        csp = make_queens_csp(4)
+        self.assertEqual(csp.infeasible_values(0, {1: 2}), {1, 2, 3})
+
+    def test_branch_and_bound_optimal(self):
+        for seed in range(5):
+            csp, best = make_weighted_chain_csp(6, 3, seed)
+            result_object = {}
+            solution = csp.branch_and_bound(config={}, stop_event=Event(), result_object=result_object)
+            self.assertTrue(all(constraint.satisfied(None, solution) for constraint in csp.constraint_list))
+            self.assertEqual(csp.score(solution), best)
+            self.assertEqual(result_object["upper_bound"], best)
+
+    def test_branch_and_bound_improves_initial_assignment(self):
+        csp, best = make_weighted_chain_csp(6, 3, 0)
+        initial = {variable: variable % 2 for variable in csp.variables}
+        solution = csp.branch_and_bound(initial, config={}, stop_event=Event(), result_object={})
+        self.assertEqual(csp.score(solution), best)
+
+    def test_branch_and_bound_gap(self):
+        # With a large enough gap, the initial assignment is proven good enough straight away.
+        csp, best = make_weighted_chain_csp(6, 3, 0)
+        initial = {variable: variable % 2 for variable in csp.variables}
+        result_object = {}
+        solution = csp.branch_and_bound(initial, config={"gap": 10}, stop_event=Event(), result_object=result_object)
+        self.assertEqual(solution, initial)
+        self.assertGreaterEqual(result_object["upper_bound"], best)
+
+    def test_branch_and_bound_returns_incumbent_at_deadline(self):
+        csp, best = make_weighted_chain_csp(6, 3, 0)
+        initial = {variable: variable % 2 for variable in csp.variables}
+        result_object = {}
+        solution = csp.branch_and_bound(initial, config={"time_limit": 0}, stop_event=Event(),
+                                        result_object=result_object)
+        self.assertEqual(solution, initial)
+        self.assertGreaterEqual(result_object["upper_bound"], best)
+
+    def test_branch_and_bound_no_solution(self):
+        csp = make_queens_csp(3)
+        csp.add_soft_constraint(value_weights({column: {row: 1 for row in range(3)} for column in range(3)}))
+        self.assertIsNone(csp.branch_and_bound(config={}, stop_event=Event(), result_object={}))
+
+    def test_branch_and_bound_without_stop_event_or_result_object(self):
+        csp, best = make_weighted_chain_csp(6, 3, 0)
+        self.assertEqual(csp.score(csp.branch_and_bound()), best)
+        # Stopped straight away with no incumbent: there is no result object to report the timeout in.
+        self.assertIsNone(csp.branch_and_bound(config={"time_limit": 0}))
+
+    def test_branch_and_bound_requires_value_scores(self):
+        csp = make_swap_csp()
+        with self.assertRaises(ValueError):
+            csp.branch_and_bound(config={}, stop_event=Event(), result_object={})
+
+    def test_repair_keeps_consistent_hints(self):
+        csp = make_chain_csp(6)
+        solution, repaired = csp.repair({0: 0, 1: 1, 2: 0, 3: 0, 4: 0, 5: 1}, config=search_config(), stop_event=Event(),
+                                        result_object={})
+        self.assertEqual(solution, {0: 0, 1: 1, 2: 0, 3: 1, 4: 0, 5: 1})
+        self.assertEqual(repaired, [3])
+
+    def test_repair_consistent_hint_unchanged(self):
+        csp = make_chain_csp(4)
+        hint = {0: 1, 1: 0, 2: 1, 3: 0}
+        self.assertEqual(csp.repair(hint, config=search_config(), stop_event=Event(), result_object={}), (hint, []))
+
+    def test_repair_widens_neighbourhood(self):
+        # Variable 3 cannot differ from both kept neighbours, so the neighbourhood grows until 3, 4 and 5 can change.
+        csp = make_chain_csp(6)
+        hint = {0: 0, 1: 1, 2: 0, 3: 0, 4: 1, 5: 0}
+        solution, repaired = csp.repair(hint, config=search_config(), stop_event=Event(), result_object={})
+        self.assertEqual(solution, {0: 0, 1: 1, 2: 0, 3: 1, 4: 0, 5: 1})
+        self.assertEqual(repaired, [3, 4, 5])
+        self.assertIsNone(csp.repair(hint, config=search_config(max_radius=0), stop_event=Event(), result_object={}))
+        self.assertEqual(csp.domains, {variable: [0, 1] for variable in range(6)})
+
+    def test_optimize_restricted_variables(self):
+        csp, _ = make_weighted_chain_csp(6, 3, 0)
+        initial = {variable: variable % 2 for variable in csp.variables}
+        solution = csp.optimize(initial, config={"max_steps": 100, "variables": [0]}, stop_event=Event(),
+                                result_object={})
+        self.assertEqual({variable: value for variable, value in solution.items() if variable != 0},
+                         {variable: value for variable, value in initial.items() if variable != 0})
+
+    def test_optimize_unknown_method(self):
+        csp = make_swap_csp()
+        with self.assertRaises(ValueError):
+            csp.optimize({"a": 0, "b": 1}, config={"method": "genetic", "max_steps": 1}, stop_event=Event(),
+                         result_object={})
+
+    def test_optimize_local_search_timeout(self):
+        csp = make_swap_csp()
+        stop_event = Event()
+        stop_event.set()
+        result_object = {}
+        config = {"method": "tabu", "max_steps": 100}
+        self.assertIsNone(csp.optimize({"a": 0, "b": 1}, config=config, stop_event=stop_event,
+                                       result_object=result_object))
+        self.assertIsNone(result_object["schedule"])
+
+    def test_min_conflicts_solves_queens(self):
+        csp = make_queens_csp(8)
+        config = search_config(solver="min_conflicts", fallback=False, seed=0)
+        solution = csp.solve(config=config, stop_event=Event(), result_object={})
+        self.assertEqual(len(solution), 8)
+        self.assertTrue(all(constraint.satisfied(None, solution) for constraint in csp.constraint_list))
+
+    def test_min_conflicts_no_solution(self):
+        csp = make_queens_csp(3)
+        config = search_config(solver="min_conflicts", fallback=False, seed=0, max_steps=200)
+        self.assertIsNone(csp.solve(config=config, stop_event=Event(), result_object={}))
+
+    def test_min_conflicts_falls_back_to_backtracking(self):
+        # Without any repair steps the greedy initial assignment of 6 queens is not a solution.
+        csp = make_queens_csp(6)
+        config = search_config(solver="min_conflicts", seed=0, max_steps=0)
+        self.assertIsNone(csp.min_conflicts_search(config=config, stop_event=Event(), result_object={}))
+        solution = csp.solve(config=config, stop_event=Event(), result_object={})
+        self.assertEqual(len(solution), 6)
+        self.assertTrue(all(constraint.satisfied(None, solution) for constraint in csp.constraint_list))
+
+    def test_solve_unknown_solver(self):
+        csp = make_chain_csp(3)
+        with self.assertRaises(ValueError):
+            csp.solve(config=search_config(solver="genetic"), stop_event=Event(), result_object={})
+
+    def test_cancellation_token(self):
+        token = CancellationToken()
+        self.assertFalse(token.is_set())
+        self.assertIsNone(token.remaining())
+        token.cancel()
+        self.assertTrue(token.is_set())
+
+        token = CancellationToken(timeout=0.01)
+        self.assertFalse(token.is_set())
+        self.assertTrue(token.wait())
+        self.assertEqual(token.remaining(), 0)
+
+    def test_backtracking_search_cancellation_token_deadline(self):
+        csp = make_chain_csp(3)
+        result_object = {}
+        solution = csp.backtracking_search(config=search_config(), stop_event=CancellationToken(timeout=0),
+                                           result_object=result_object)
+        self.assertIsNone(solution)
+        self.assertIsNone(result_object["schedule"])
@@ -0,0 +1,87 @@
+from unittest import TestCase
+
+from src.coursescheduler.datamodels import timeslot_determination, timeslot_config_ids, time_string_to_minutes, \
+    minutes_to_time_string, transform_input, enthusiasm_scores, preferred_time_minutes, previous_assignments
+from tests.datamodels_tester import make_professor, make_offering
+
+
+class PyTestDatamodels(TestCase):
+
+    def test_timeslot_determination_cached(self):
+        self.assertIs(timeslot_determination(), timeslot_determination())
+
+    def test_timeslot_determination_alternates_twf_mth(self):
+        timeslot_configs = timeslot_determination()
+        timeslot_ids = list(timeslot_configs.keys())
+        self.assertEqual(len(timeslot_configs[timeslot_ids[0]]), 3)
+        self.assertEqual(len(timeslot_configs[timeslot_ids[1]]), 2)
+        self.assertEqual(len(timeslot_configs[timeslot_ids[2]]), 3)
+
+    def test_timeslot_output_strings(self):
+        timeslot = timeslot_determination()[0][0]
+        self.assertEqual(timeslot.day, "TUESDAY")
+        self.assertEqual((timeslot.start, timeslot.end), (510, 560))
+        self.assertEqual((timeslot.start_string, timeslot.end_string), ("08:30", "09:20"))
+
+    def test_time_string_conversion(self):
+        self.assertEqual(time_string_to_minutes("8:30"), 510)
+        self.assertEqual(minutes_to_time_string(510), "08:30")
+
+    def test_timeslot_config_ids(self):
+        config_ids = timeslot_config_ids()
+        for timeslot_id, config in timeslot_determination().items():
+            self.assertEqual(config_ids[tuple(timeslot[:3] for timeslot in config)], timeslot_id)
+
+    def test_transform_input_qualified_professors(self):
+        schedule = {
+            "fall": [make_offering("CSC111", False), make_offering("SENG265", True)],
+            "spring": [make_offering("CSC111", False)],
+            "summer": []
+        }
+        professors_input = [
+            make_professor("1", False, "TEACHING", [("CSC111", 20), ("SENG265", 195)]),
+            make_professor("2", True, "RESEARCH", [("CSC111", 78), ("SENG265", 40)], "SPRING"),
+            make_professor("3", True, "TEACHING", [("CSC111", 0), ("SENG265", 78)]),
+        ]
+        courses, professors = transform_input(schedule, professors_input)
+
+        # Sorted by enthusiasm, without unqualified professors.
+        self.assertEqual(courses["fall"]["CSC111_fall"]["qualifiedProfessors"], [("2", 78), ("1", 20)])
+        # PEng required.
+        self.assertEqual(courses["fall"]["SENG265_fall"]["qualifiedProfessors"], [("3", 78), ("2", 40)])
+        # Research professor on their non-teaching semester.
+        self.assertEqual(courses["spring"]["CSC111_spring"]["qualifiedProfessors"], [("1", 20)])
+
+        self.assertEqual(professors["1"]["enthusiasmScores"], {"CSC111": 20, "SENG265": 195})
+
+    def test_enthusiasm_scores_built_on_first_use(self):
+        professor = {"qualifiedCoursePreferences": [{"courseCode": "CSC111", "enthusiasmScore": 78}]}
+        self.assertEqual(enthusiasm_scores(professor), {"CSC111": 78})
+        self.assertIs(enthusiasm_scores(professor), professor["enthusiasmScores"])
+
+    def test_preferred_time_minutes(self):
+        professor = {"preferredTimes": {
+            "fall": {"monday": [("8:30", "10:00"), ("13:00", "14:20")], "tuesday": None},
+            "spring": None
+        }}
+        self.assertEqual(preferred_time_minutes(professor), {
+            "fall": {"monday": [(510, 600), (780, 860)], "tuesday": None},
+            "spring": None
+        })
+        self.assertIs(preferred_time_minutes(professor), professor["preferredTimeMinutes"])
+
+    def test_previous_assignments(self):
+        schedule_input = {"fall": [make_offering("CSC111", False), make_offering("SENG265", False)], "spring": []}
+        schedule_input["fall"][1]["sections"] = [{"professor": {"id": "2"}, "timeSlots": []},
+                                                 {"professor": None, "timeSlots": []}]
+        previous_schedule = {"fall": [
+            {"course": {"code": "SENG265"}, "sections": [
+                {"professor": {"id": "2"}, "timeSlots": [{"dayOfWeek": "MONDAY", "timeRange": ("8:30", "9:50")}]},
+                {"professor": {"id": "3"}, "timeSlots": []}]},
+            {"course": {"code": "CSC111"}, "sections": [{"professor": None, "timeSlots": []}]}
+        ]}
+        self.assertEqual(previous_assignments(schedule_input, previous_schedule), {
+            "CSC111_fall": {"professor": None, "timeSlots": None},
+            "SENG265_fall_0": {"professor": "2", "timeSlots": (("MONDAY", 510, 590),)},
+            "SENG265_fall": {"professor": "3", "timeSlots": None}
+        })
@@ -0,0 +1,55 @@
+import itertools
+from threading import Event
+from unittest import TestCase
+
+from src.coursescheduler.flow import MinCostFlow
+
+
+# Transportation problem: supplies -> demands, with a cost per unit on each pair.
+def make_transportation(supplies, demands, costs):
+    network = MinCostFlow(2)
+    supply_nodes = [network.add_node() for _ in supplies]
+    demand_nodes = [network.add_node() for _ in demands]
+    for node, supply in zip(supply_nodes, supplies):
+        network.add_edge(0, node, supply, 0)
+    for node, demand in zip(demand_nodes, demands):
+        network.add_edge(node, 1, demand, 0)
+    edges = {}
+    for i, supply_node in enumerate(supply_nodes):
+        for j, demand_node in enumerate(demand_nodes):
+            edges[(i, j)] = network.add_edge(supply_node, demand_node, supplies[i], costs[i][j])
+    return network, edges
+
+
+class PyTestMinCostFlow(TestCase):
+
+    def test_assignment_optimal(self):
+        costs = [[-4, -1, -3], [-2, 0, -5], [-3, -2, -2]]
+        network, edges = make_transportation([1, 1, 1], [1, 1, 1], costs)
+        flow, cost = network.solve(0, 1)
+        self.assertEqual(flow, 3)
+        best = min(sum(costs[i][j] for i, j in enumerate(permutation))
+                   for permutation in itertools.permutations(range(3)))
+        self.assertEqual(cost, best)
+        self.assertEqual(sum(network.flow(edge) * costs[i][j] for (i, j), edge in edges.items()), cost)
+
+    def test_transportation_capacities(self):
+        network, edges = make_transportation([2, 2], [1, 1, 1], [[1, 5, 1], [2, 1, 9]])
+        flow, cost = network.solve(0, 1)
+        self.assertEqual((flow, cost), (3, 3))
+        self.assertEqual(network.flow(edges[(0, 0)]) + network.flow(edges[(0, 2)]), 2)
+        self.assertEqual(network.flow(edges[(1, 1)]), 1)
+
+    def test_max_flow_limit(self):
+        network, _ = make_transportation([1, 1], [1, 1], [[-1, -2], [-3, -1]])
+        self.assertEqual(network.solve(0, 1, max_flow=1), (1, -3))
+
+    def test_flow_limited_by_capacity(self):
+        network, _ = make_transportation([1, 1], [3], [[0], [0]])
+        self.assertEqual(network.solve(0, 1, max_flow=3), (2, 0))
+
+    def test_stopped(self):
+        network, _ = make_transportation([1], [1], [[0]])
+        stop_event = Event()
+        stop_event.set()
+        self.assertIsNone(network.solve(0, 1, stop_event=stop_event))
@@ -0,0 +1,110 @@
+import copy
+import json
+import os
+import tempfile
+from threading import Event
+from unittest import TestCase
+
+from schema import SchemaError
+
+from src.coursescheduler.datamodels import transform_input
+from src.coursescheduler.loader import open_stream, iter_professors, load_schedule, load_input
+
+input_directory = os.path.join(os.path.dirname(__file__), '../src/coursescheduler/temp_json_input')
+professors_path = os.path.join(input_directory, 'professor_object.json')
+schedule_path = os.path.join(input_directory, 'schedule_object.json')
+
+
+def load_json(path):
+    with open(path, encoding="utf-8") as json_file:
+        return json.load(json_file)
+
+
+class PyTestLoader(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write_json(self, data, name="input.json"):
+        path = os.path.join(self.directory.name, name)
+        with open(path, "w", encoding="utf-8") as json_file:
+            json.dump(data, json_file, ensure_ascii=False)
+        return path
+
+    def test_stream_matches_json_load(self):
+        # Values cut by the chunk boundaries, including a number and multi-byte characters.
+        data = [{"name": "Érica 𝄞", "score": 12345}, 6789, [], {}, "é€", None, [1.5, True]]
+        path = self.write_json(data)
+        for chunk_size in [1, 2, 3, 5, 8, 1 << 20]:
+            with open_stream(path, chunk_size) as stream:
+                self.assertEqual(list(stream.iter_array()), data)
+
+    def test_load_schedule(self):
+        for chunk_size in [7, 1 << 20]:
+            self.assertEqual(load_schedule(schedule_path, chunk_size=chunk_size), load_json(schedule_path))
+
+    def test_professors_normalized(self):
+        professors = list(iter_professors(professors_path, chunk_size=64))
+        self.assertEqual(len(professors), len(load_json(professors_path)))
+        self.assertEqual(professors[0]["preferredTimes"]["fall"]["monday"], [("8:30", "18:30"), ("19:30", "22:00")])
+
+    def test_empty_preferred_times_become_none(self):
+        professor = load_json(professors_path)[0]
+        professor["preferredTimes"]["fall"]["tuesday"] = []
+        professors = list(iter_professors(self.write_json([professor])))
+        self.assertIsNone(professors[0]["preferredTimes"]["fall"]["tuesday"])
+
+    def test_load_input_same_as_transform_input(self):
+        schedule, courses, professors = load_input(schedule_path, professors_path)
+        expected_professors = load_json(professors_path)
+        for professor in expected_professors:
+            for days in professor["preferredTimes"].values():
+                for day, time_ranges in (days or {}).items():
+                    days[day] = [tuple(time_range) for time_range in time_ranges] or None
+        self.assertEqual(schedule, load_json(schedule_path))
+        self.assertEqual((courses, professors), transform_input(load_json(schedule_path), expected_professors))
+
+    def test_invalid_professors_errors_raised_together(self):
+        professors = load_json(professors_path)
+        professors[1]["isPeng"] = "x"
+        professors[4]["teachingObligations"] = "3"
+        yielded = []
+        with self.assertRaises(SchemaError) as context:
+            for professor in iter_professors(self.write_json(professors)):
+                yielded.append(professor)
+        self.assertEqual(len(yielded), 1)
+        self.assertEqual(context.exception.autos, [
+            "Index 1 error:\nKey 'isPeng' error:\n'x' should be instance of 'bool'",
+            "Index 4 error:\nKey 'teachingObligations' error:\n'3' should be instance of 'int'"
+        ])
+        self.assertEqual(len(list(iter_professors(self.write_json(professors), trusted=True))), len(professors))
+
+    def test_invalid_schedule(self):
+        schedule = copy.deepcopy(load_json(schedule_path))
+        schedule["spring"][0]["course"]["yearRequired"] = 5
+        del schedule["summer"]
+        with self.assertRaises(SchemaError) as context:
+            load_schedule(self.write_json(schedule))
+        self.assertEqual(context.exception.autos, [
+            "Key 'spring' error:\nIndex 0 error:\nKey 'course' error:\nKey 'yearRequired' error:\n"
+            "Or(1, 2, 3, 4) did not validate 5",
+            "Missing key: 'summer'"
+        ])
+
+    def test_malformed_json(self):
+        for text in ['[{"a": 1}', '[{"a": 1} {"b": 2}]', '[1] 2', '']:
+            path = os.path.join(self.directory.name, "malformed.json")
+            with open(path, "w") as json_file:
+                json_file.write(text)
+            with self.assertRaises(json.JSONDecodeError):
+                with open_stream(path, 4) as stream:
+                    list(stream.iter_array())
+                    stream.expect_end()
+
+    def test_stop_event(self):
+        stop_event = Event()
+        stop_event.set()
+        self.assertEqual(list(iter_professors(professors_path, stop_event=stop_event)), [])
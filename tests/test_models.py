@@ -0,0 +1,113 @@
+import copy
+import json
+import os
+from unittest import TestCase
+
+from schema import SchemaError
+
+from src.coursescheduler.models import Schedule, Professor, validate_schedule_structure, \
+    validate_professor_structure, validate_professors_structure
+
+input_directory = os.path.join(os.path.dirname(__file__), '../src/coursescheduler/temp_json_input')
+
+
+def load_input(file_name):
+    with open(os.path.join(input_directory, file_name)) as input_file:
+        return json.load(input_file)
+
+
+def validation_errors(validate, data):
+    try:
+        validate(data, print_output=False)
+    except SchemaError as error:
+        return error.autos
+    return []
+
+
+class PyTestModels(TestCase):
+
+    def setUp(self):
+        self.schedule = load_input("schedule_object.json")
+        self.professors = load_input("professor_object.json")
+
+    def test_sample_input_valid(self):
+        self.assertTrue(validate_schedule_structure(self.schedule, print_output=False))
+        self.assertTrue(validate_professors_structure(self.professors, print_output=False))
+
+    def test_professor_errors(self):
+        professor = copy.deepcopy(self.professors[0])
+        del professor["name"]
+        professor["isPeng"] = "x"
+        professor["extra"] = 1
+        professor["preferredTimes"]["fall"]["monday"] = [["10:00", "8:30"]]
+        self.assertEqual(validation_errors(validate_professor_structure, professor), [
+            "Missing key: 'name'",
+            "Wrong key 'extra' in " + repr(professor),
+            "Key 'isPeng' error:\n'x' should be instance of 'bool'",
+            "Key 'preferredTimes' error:\nKey 'fall' error:\nKey 'monday' error:\nIndex 0 error:\n"
+            "validate_time_ranges(['10:00', '8:30']) raised AssertionError()"
+        ])
+
+    def test_professors_errors_reported_together(self):
+        professors = copy.deepcopy(self.professors)
+        professors[1]["teachingObligations"] = True
+        professors[3]["preferredCoursesPerSemester"]["spring"] = -1
+        self.assertEqual(validation_errors(validate_professors_structure, professors), [
+            "Index 1 error:\nKey 'teachingObligations' error:\nTrue should be instance of 'int'",
+            "Index 3 error:\nKey 'preferredCoursesPerSemester' error:\nKey 'spring' error:\n"
+            "<lambda>(-1) should evaluate to True"
+        ])
+
+    def test_schedule_errors(self):
+        schedule = copy.deepcopy(self.schedule)
+        schedule["fall"][0]["course"]["yearRequired"] = 5
+        schedule["spring"][1]["sections"][0]["capacity"] = "x"
+        schedule["summer"][0]["sections"][0]["timeSlots"] = [{"dayOfWeek": "SUNDAY", "timeRange": ("8:30", "9:50")}]
+        self.assertEqual(validation_errors(validate_schedule_structure, schedule), [
+            "Key 'fall' error:\nIndex 0 error:\nKey 'course' error:\nKey 'yearRequired' error:\n"
+            "Or(1, 2, 3, 4) did not validate 5",
+            "Key 'spring' error:\nIndex 1 error:\nKey 'sections' error:\nIndex 0 error:\nKey 'capacity' error:\n"
+            "Or(None, <class 'int'>) did not validate 'x'",
+            "Key 'summer' error:\nIndex 0 error:\nKey 'sections' error:\nIndex 0 error:\nKey 'timeSlots' error:\n"
+            "Index 0 error:\nKey 'dayOfWeek' error:\n"
+            "Or('MONDAY', 'TUESDAY', 'WEDNESDAY', 'THURSDAY', 'FRIDAY') did not validate 'SUNDAY'"
+        ])
+
+    def test_same_acceptance_as_schema(self):
+        professor = self.professors[0]
+        cases = [
+            (Professor, validate_professor_structure, professor, ["preferredTimes", "fall"], None),
+            (Professor, validate_professor_structure, professor, ["preferredTimes", "fall", "monday"], None),
+            (Professor, validate_professor_structure, professor, ["preferredTimes", "fall", "monday", 0],
+             ("8:30", "9:00")),
+            (Professor, validate_professor_structure, professor, ["preferredTimes", "fall", "monday", 0],
+             ["8:30", "24:00"]),
+            (Professor, validate_professor_structure, professor, ["preferredTimes", "fall", "monday", 0], [8, 9]),
+            (Professor, validate_professor_structure, professor, ["coursePreferences", 0, "enthusiasmScore"], False),
+            (Professor, validate_professor_structure, professor, ["preferredCourseDaySpreads"], ["MTh", "TWF"]),
+            (Professor, validate_professor_structure, professor, ["preferredCourseDaySpreads", 0], "S"),
+            (Professor, validate_professor_structure, professor, ["facultyType"], "TEACHING"),
+            (Schedule, validate_schedule_structure, self.schedule, ["fall", 0, "sections", 0, "maxCapacity"], 40),
+            (Schedule, validate_schedule_structure, self.schedule, ["fall", 0, "sections", 0, "professor"],
+             {"id": "1", "name": "Celina Berg"}),
+            (Schedule, validate_schedule_structure, self.schedule, ["fall", 0, "sections", 0, "professor"],
+             {"id": 1, "name": "Celina Berg"}),
+            (Schedule, validate_schedule_structure, self.schedule, ["fall", 0, "sections", 0, "timeSlots"],
+             [{"dayOfWeek": "MONDAY", "timeRange": ["8:30", "9:50"]}] * 4),
+            (Schedule, validate_schedule_structure, self.schedule, ["fall", 0, "course", "yearRequired"], 1.0),
+            (Schedule, validate_schedule_structure, self.schedule, ["spring"], ()),
+        ]
+        for schema, validate, data, path, value in cases:
+            data = copy.deepcopy(data)
+            parent = data
+            for key in path[:-1]:
+                parent = parent[key]
+            parent[path[-1]] = value
+            expected = validation_errors(lambda data, print_output: schema.validate(data), data) == []
+            self.assertEqual(validation_errors(validate, data) == [], expected, (path, value))
+
+    def test_trusted_input_not_validated(self):
+        self.assertTrue(validate_schedule_structure({}, print_output=False, trusted=True))
+        self.assertTrue(validate_professors_structure([{}], print_output=False, trusted=True))
+        with self.assertRaises(SchemaError):
+            validate_schedule_structure({}, print_output=False)
@@ -0,0 +1,79 @@
+from threading import Event, Timer
+from unittest import TestCase
+
+from src.coursescheduler.portfolio import portfolio_search, portfolio_configurations
+from src.coursescheduler import scheduler
+from tests.csp_tester import make_queens_csp, make_swap_csp, search_config
+
+
+class PyTestPortfolio(TestCase):
+
+    def test_portfolio_configurations(self):
+        configurations = portfolio_configurations(search_config(seed=5), {"max_steps": 10},
+                                                  dict(scheduler.config_portfolio, size=6))
+        self.assertEqual(len(configurations), 6)
+        self.assertEqual([config["seed"] for config, _ in configurations], [5, 6, 7, 8, 9, 10])
+        self.assertEqual(configurations[1][0]["solver"], "min_conflicts")
+        self.assertEqual(configurations[1][1]["method"], "tabu")
+        self.assertEqual(configurations[2][1]["max_steps"], 200)
+        self.assertEqual(configurations[4][0], dict(search_config(), seed=9))
+
+    def test_portfolio_configurations_variants(self):
+        variants = [{"search": {"mrv": True}, "optimization": {"method": "tabu"}, "max_steps_factor": 3}]
+        configurations = portfolio_configurations(search_config(), {"max_steps": 10}, {"size": 2, "variants": variants})
+        self.assertEqual(configurations, [
+            (dict(search_config(), mrv=True, seed=0), {"method": "tabu", "max_steps": 30, "seed": 0}),
+            (dict(search_config(), mrv=True, seed=1), {"method": "tabu", "max_steps": 30, "seed": 1}),
+        ])
+
+    def test_portfolio_search_first(self):
+        csp = make_queens_csp(8)
+        configurations = portfolio_configurations(search_config(), {"max_steps": 10}, scheduler.config_portfolio)
+        config_portfolio = {"max_workers": 2, "objective": "first"}
+        solution = portfolio_search(csp, configurations, config_portfolio, Event(), {})
+        self.assertEqual(len(solution), 8)
+        self.assertTrue(all(constraint.satisfied(None, solution) for constraint in csp.constraint_list))
+
+    def test_portfolio_search_best(self):
+        # Hill climbing cannot improve on the solution found, tabu search can by swapping the two values.
+        csp = make_swap_csp()
+        configurations = [
+            (search_config(), {"method": "hill_climbing", "max_steps": 10}),
+            (search_config(), {"method": "tabu", "max_steps": 100, "seed": 0}),
+        ]
+        config_portfolio = {"max_workers": 2, "objective": "best"}
+        solution = portfolio_search(csp, configurations, config_portfolio, Event(), {})
+        self.assertEqual(solution, {"a": 1, "b": 0})
+
+    def test_portfolio_search_no_solution(self):
+        csp = make_queens_csp(3)
+        configurations = [(search_config(), {"max_steps": 10})]
+        self.assertIsNone(portfolio_search(csp, configurations, {"max_workers": 1}, Event(), {}))
+
+    def test_portfolio_search_stopped(self):
+        csp = make_queens_csp(3)
+        stop_event = Event()
+        stop_event.set()
+        result_object = {}
+        configurations = [(search_config(), {"max_steps": 10})]
+        self.assertIsNone(portfolio_search(csp, configurations, {"max_workers": 1}, stop_event, result_object))
+        self.assertIsNone(result_object["schedule"])
+
+    def test_portfolio_search_best_keeps_solution_at_deadline(self):
+        # The tabu search runs until it is cancelled, after the hill climbing configuration has finished.
+        csp = make_swap_csp()
+        configurations = [
+            (search_config(), {"method": "hill_climbing", "max_steps": 10}),
+            (search_config(), {"method": "tabu", "max_steps": 10 ** 9, "seed": 0}),
+        ]
+        stop_event = Event()
+        timer = Timer(3, stop_event.set)
+        timer.start()
+        result_object = {"schedule": None, "message": None}
+        try:
+            solution = portfolio_search(csp, configurations, {"max_workers": 2, "objective": "best"}, stop_event,
+                                        result_object)
+        finally:
+            timer.cancel()
+        self.assertEqual(solution, {"a": 0, "b": 1})
+        self.assertIsNone(result_object["message"])
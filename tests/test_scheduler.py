@@ -1,7 +1,14 @@
-from unittest import TestCase
+from unittest import TestCase, IsolatedAsyncioTestCase
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
 import os, json
-from src.coursescheduler import generate_schedule
+from threading import Event
+from src.coursescheduler import generate_schedule, generate_schedule_async
+from src.coursescheduler.csp import CancellationToken
+from src.coursescheduler.datamodels import transform_input
 from src.coursescheduler.models import Schedule
+from src.coursescheduler.scheduler import flow_assignment
+from tests.datamodels_tester import make_professor, make_offering
 
 class PyTestTesting(TestCase):
     def test_always_passes(self):
@@ -19,3 +26,113 @@ class PyTestTesting(TestCase):
         schedule, error = generate_schedule(None, schedule_input, True)
         self.assertIsNone(error)
         Schedule.validate(schedule)  # will raise exception if invalid
+
+    def test_scheduler_warm_start_from_own_output(self):
+        schedule, error = generate_schedule(None, None, True)
+        self.assertIsNone(error)
+        repaired_schedule, error = generate_schedule(None, None, True, previous_schedule=schedule)
+        self.assertIsNone(error)
+        self.assertEqual(repaired_schedule, schedule)
+
+    def test_scheduler_timeout_does_not_affect_later_calls(self):
+        schedule, error = generate_schedule(None, None, True, timeout=0)
+        self.assertIsNone(schedule)
+        self.assertIsNotNone(error)
+        schedule, error = generate_schedule(None, None, True)
+        self.assertIsNone(error)
+        Schedule.validate(schedule)
+
+    def test_scheduler_cancelled(self):
+        cancellation_token = CancellationToken()
+        cancellation_token.cancel()
+        schedule, error = generate_schedule(None, None, True, cancellation_token=cancellation_token)
+        self.assertIsNone(schedule)
+        self.assertIsNotNone(error)
+
+    def test_scheduler_concurrent_calls_with_independent_timeouts(self):
+        # Calls timing out straight away run alongside calls with the default timeout.
+        timeouts = [0, None, 0, 5 * 60, 0, 5 * 60, 0, None]
+        with ThreadPoolExecutor(max_workers=len(timeouts)) as executor:
+            results = list(executor.map(lambda timeout: generate_schedule(None, None, True, timeout=timeout),
+                                        timeouts))
+        for timeout, (schedule, error) in zip(timeouts, results):
+            if timeout == 0:
+                self.assertIsNone(schedule)
+                self.assertIsNotNone(error)
+            else:
+                self.assertIsNone(error)
+                Schedule.validate(schedule)
+
+
+class PyTestSchedulerAsync(IsolatedAsyncioTestCase):
+
+    async def test_scheduler_async_output_meets_spec(self):
+        progress = asyncio.Queue()
+        schedule, error = await generate_schedule_async(None, None, True, progress=progress)
+        self.assertIsNone(error)
+        Schedule.validate(schedule)
+
+        events = []
+        while not progress.empty():
+            events.append(progress.get_nowait())
+        self.assertEqual([(event["stage"], event["status"]) for event in events], [
+            ("csp_1", "started"), ("csp_1", "solved"), ("csp_1", "optimized"),
+            ("csp_2", "started"), ("csp_2", "solved"), ("csp_2", "optimized"),
+            ("schedule", "done")])
+
+    async def test_scheduler_async_timeout(self):
+        schedule, error = await generate_schedule_async(None, None, True, timeout=0)
+        self.assertIsNone(schedule)
+        self.assertIsNotNone(error)
+
+    async def test_scheduler_async_cancellation_token(self):
+        cancellation_token = CancellationToken()
+        cancellation_token.cancel()
+        schedule, error = await generate_schedule_async(None, None, True, cancellation_token=cancellation_token)
+        self.assertIsNone(schedule)
+        self.assertIsNotNone(error)
+
+    async def test_scheduler_async_cancelled(self):
+        progress = asyncio.Queue()
+        task = asyncio.create_task(generate_schedule_async(None, None, True, progress=progress))
+        self.assertEqual((await progress.get())["stage"], "csp_1")
+        task.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+
+        # The search stops instead of going on to generate the schedule.
+        await asyncio.sleep(2)
+        while not progress.empty():
+            self.assertNotEqual(progress.get_nowait()["stage"], "schedule")
+
+
+class PyTestFlowAssignment(TestCase):
+
+    def flow_assignment(self, professors, offerings, teaching_obligations):
+        courses, professors = transform_input({"fall": offerings, "spring": [], "summer": []}, professors)
+        for prof_id, obligations in teaching_obligations.items():
+            professors[prof_id]["teachingObligations"] = obligations
+        domains = {course: [prof_id for prof_id, _ in course_data["qualifiedProfessors"]]
+                   for course, course_data in courses["fall"].items()}
+        return flow_assignment(list(domains.keys()), domains, professors, {"overload_penalty": 44}, Event())
+
+    def test_flow_assignment_maximizes_enthusiasm(self):
+        professors = [make_professor("1", True, "RESEARCH", [("CSC111", 195), ("CSC115", 40)]),
+                      make_professor("2", True, "RESEARCH", [("CSC111", 120), ("CSC115", 78)])]
+        offerings = [make_offering("CSC111", False), make_offering("CSC115", False)]
+        solution = self.flow_assignment(professors, offerings, {"1": 1, "2": 1})
+        self.assertEqual(solution, {"CSC111_fall": "1", "CSC115_fall": "2"})
+
+    def test_flow_assignment_infeasible(self):
+        professors = [make_professor("1", True, "RESEARCH", [("CSC111", 195), ("CSC115", 40), ("CSC225", 40)])]
+        offerings = [make_offering("CSC111", False), make_offering("CSC115", False), make_offering("CSC225", False)]
+        solution = self.flow_assignment(professors, offerings, {"1": 2})
+        self.assertEqual(len(solution), 2)
+        self.assertEqual(set(solution.values()), {"1"})
+
+    def test_flow_assignment_respects_leave(self):
+        # A teaching professor without preferred times in the fall is on leave then.
+        professors = [make_professor("1", True, "TEACHING", [("CSC111", 195)]),
+                      make_professor("2", True, "RESEARCH", [("CSC111", 20)])]
+        solution = self.flow_assignment(professors, [make_offering("CSC111", False)], {"1": 2, "2": 1})
+        self.assertEqual(solution, {"CSC111_fall": "2"})